@@ -20,6 +20,14 @@ from app.routers import scheduler
 from app.routers import users
 from app.routers import trends
 from app.services.scheduler import start_scheduler, stop_scheduler
+from app.services.database import db, adb
+from app.services.http_pool import http_pool
+from app.services.feed_parser import feed_parser
+from app.services.local_cache import hotlist_cache
+from app.services.smtp_client import smtp_sender
+from app.services.push_service import push_http_pool
+from app.services.push_queue import push_queue
+from app.services.rule_matcher import push_rule_cache
 from app.middleware.auth import AuthMiddleware
 from app.config import settings
 from app.utils.logger import logger
@@ -33,11 +41,24 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时
     logger.info("HotPush 启动中...")
+    await http_pool.start(settings.rsshub_instances)
+    hotlist_cache.start()
+    push_rule_cache.start()
+    push_queue.start()
     start_scheduler()
     logger.info("定时任务已启动")
     yield
     # 关闭时
     stop_scheduler()
+    await push_queue.stop()
+    hotlist_cache.stop()
+    push_rule_cache.stop()
+    await http_pool.close()
+    await push_http_pool.close()
+    feed_parser.shutdown()
+    smtp_sender.close()
+    adb.shutdown()
+    db.close()
     logger.info("HotPush 已关闭")
 
 
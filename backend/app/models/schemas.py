@@ -1,7 +1,7 @@
 """
 数据模型定义
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -37,6 +37,8 @@ class HotList(BaseModel):
     items: List[HotItem]
     updated_at: datetime
     icon: Optional[str] = None
+    # 上游返回 304，内容与上次抓取相同（仅内部使用，不序列化）
+    unchanged: bool = Field(default=False, exclude=True)
 
 
 class PushConfig(BaseModel):
@@ -64,3 +66,5 @@ class PushMessage(BaseModel):
     source: str  # 热榜源 ID
     items: List[HotItem] = []
     ai_summary: Optional[str] = None
+    # 渲染缓存（push_render.MessageView），不参与序列化
+    _render_view: Optional[object] = PrivateAttr(default=None)
@@ -4,15 +4,24 @@ API 路由
 import asyncio
 import json
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 from typing import List, Optional
 from app.services.rss_fetcher import rss_fetcher
-from app.services.push_service import push_service
+from app.services.push_service import push_service, push_http_pool
 from app.services.scheduler import run_once
-from app.services.database import db
+from app.services.database import db, adb
 from app.services.cache import cache
+from app.services.http_pool import http_pool
+from app.services.feed_parser import feed_parser
+from app.services.instance_health import instance_health
+from app.services.local_cache import hotlist_cache
+from app.services.dedup_store import dedup_store
+from app.services.hotlist_payload import HotListPayload, build_list_body, payload_registry
+from app.services.smtp_client import smtp_sender
+from app.config import settings
 from app.models.schemas import HotList, PushMessage, PushChannel
 from app.utils.sources import HOT_SOURCES, CATEGORIES, get_sources_by_category
+from app.utils.metrics import metrics
 
 router = APIRouter()
 
@@ -31,7 +40,7 @@ async def get_sources():
             "type": "builtin"
         })
     # 自定义源
-    custom_sources = db.get_all_custom_sources()
+    custom_sources = await adb.get_all_custom_sources()
     for cs in custom_sources:
         if cs["enabled"]:
             sources.append({
@@ -73,7 +82,7 @@ async def stream_hot_lists(
     if source_ids is None:
         # 获取所有源（内置 + 自定义）
         source_ids = list(HOT_SOURCES.keys())
-        custom_sources = db.get_all_custom_sources()
+        custom_sources = await adb.get_all_custom_sources()
         for cs in custom_sources:
             if cs["enabled"]:
                 source_ids.append(cs["id"])
@@ -110,7 +119,7 @@ async def stream_hot_lists(
                             return await rss_fetcher.fetch_hot_list(source_id)
                         else:
                             # 检查自定义源
-                            custom_source = db.get_custom_source(source_id)
+                            custom_source = await adb.get_custom_source(source_id)
                             if custom_source:
                                 nonlocal source_name
                                 source_name = custom_source.get("name", source_id)
@@ -139,28 +148,8 @@ async def stream_hot_lists(
                     completed += 1
                     if result["type"] == "success":
                         success += 1
-                        hot_list = result["data"]
-                        # 将 HotList 转换为 JSON
-                        data = {
-                            "source": hot_list.source,
-                            "source_name": hot_list.source_name,
-                            "icon": hot_list.icon,
-                            "updated_at": hot_list.updated_at.isoformat() if hot_list.updated_at else None,
-                            "items": [
-                                {
-                                    "id": item.id,
-                                    "title": item.title,
-                                    "url": item.url,
-                                    "hot_score": item.hot_score,
-                                    "source": item.source,
-                                    "published": item.published.isoformat() if item.published else None,
-                                    "description": item.description,
-                                    "image": item.image
-                                }
-                                for item in hot_list.items
-                            ]
-                        }
-                        yield f"event: hotlist\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                        # 使用抓取时生成的事件帧，无需逐连接序列化
+                        yield payload_registry.get(result["data"]).sse_frame
                     elif result["type"] == "failed":
                         # 发送失败事件
                         yield f"event: failed\ndata: {json.dumps({'source_id': result['source_id'], 'source_name': result['source_name']}, ensure_ascii=False)}\n\n"
@@ -208,29 +197,37 @@ async def get_all_hot_lists(
 
     hot_lists = await rss_fetcher.fetch_all_hot_lists(source_ids)
 
-    return {
-        "count": len(hot_lists),
-        "data": hot_lists
-    }
+    # 拼接各源预序列化的 JSON，响应结构为 {"count": n, "data": [...]}
+    body = build_list_body(payload_registry.get(hot_list) for hot_list in hot_lists)
+    return Response(content=body, media_type="application/json")
+
+
+def _payload_response(payload: HotListPayload, request: Request) -> Response:
+    """按 Accept-Encoding 返回预序列化（及预压缩）的热榜 JSON"""
+    body, encoding = payload.encode(request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/hot/{source_id}", response_model=HotList)
-async def get_hot_list(source_id: str):
+async def get_hot_list(source_id: str, request: Request):
     """获取指定源的热榜（支持内置和自定义源）"""
     # 先检查内置源
     if source_id in HOT_SOURCES:
         hot_list = await rss_fetcher.fetch_hot_list(source_id)
         if not hot_list:
             raise HTTPException(status_code=500, detail="获取热榜失败")
-        return hot_list
+        return _payload_response(payload_registry.get(hot_list), request)
 
     # 再检查自定义源
-    custom_source = db.get_custom_source(source_id)
+    custom_source = await adb.get_custom_source(source_id)
     if custom_source:
         hot_list = await rss_fetcher.fetch_custom_source(custom_source)
         if not hot_list:
             raise HTTPException(status_code=500, detail="获取热榜失败")
-        return hot_list
+        return _payload_response(payload_registry.get(hot_list), request)
 
     raise HTTPException(status_code=404, detail=f"未知的热榜源: {source_id}")
 
@@ -280,10 +277,20 @@ async def trigger_fetch(background_tasks: BackgroundTasks):
     return {"message": "抓取任务已触发，请查看日志"}
 
 
+@router.get("/instances")
+async def get_instances():
+    """获取 RSSHub 实例健康状态（成功率、耗时、熔断状态）及当前请求顺序"""
+    await instance_health.sync(settings.rsshub_instances)
+    stats = instance_health.get_stats(settings.rsshub_instances)
+    stats["route_order"] = instance_health.route(settings.rsshub_instances)
+    return stats
+
+
 @router.get("/stats")
 async def get_stats():
     """获取统计信息"""
-    custom_sources = db.get_all_custom_sources()
+    custom_sources = await adb.get_all_custom_sources()
+    await instance_health.sync(settings.rsshub_instances)
     enabled_custom = len([s for s in custom_sources if s["enabled"]])
     return {
         "sources_count": len(HOT_SOURCES) + enabled_custom,
@@ -293,5 +300,14 @@ async def get_stats():
         "configured_channels": len(push_service.get_configured_channels()),
         "total_channels": len(PushChannel),
         "redis_enabled": cache.is_available(),
-        "redis_stats": cache.get_stats() if cache.is_available() else {}
+        "redis_stats": cache.get_stats() if cache.is_available() else {},
+        "db_pool": db.get_pool_stats(),
+        "http_pool": http_pool.get_stats(),
+        "push_http_pool": push_http_pool.get_stats(),
+        "feed_parser": feed_parser.get_stats(),
+        "instances": instance_health.get_stats(settings.rsshub_instances),
+        "local_cache": hotlist_cache.get_stats(),
+        "smtp": smtp_sender.get_stats(),
+        "push_dedup": dedup_store.get_stats(),
+        "metrics": metrics.get_stats()
     }
@@ -8,7 +8,7 @@ from typing import Optional
 
 from app.config import settings
 from app.middleware.auth import create_token, get_current_user, require_auth, is_auth_enabled
-from app.services.database import db
+from app.services.database import adb
 
 
 router = APIRouter()
@@ -83,12 +83,12 @@ async def login(request: LoginRequest):
     if not request.username:
         raise HTTPException(status_code=400, detail="请输入用户名")
 
-    user = db.verify_password(request.username, request.password)
+    user = await adb.verify_password(request.username, request.password)
     if not user:
         raise HTTPException(status_code=401, detail="用户名或密码错误")
 
     # 更新最后登录时间
-    db.update_last_login(user["id"])
+    await adb.update_last_login(user["id"])
 
     # 生成 Token
     token = create_token({
@@ -121,11 +121,11 @@ async def register(request: RegisterRequest):
         raise HTTPException(status_code=400, detail="系统未启用用户注册功能")
 
     # 检查用户名是否已存在
-    if db.get_user_by_username(request.username):
+    if await adb.get_user_by_username(request.username):
         raise HTTPException(status_code=400, detail="用户名已存在")
 
     # 创建用户
-    user_id = db.create_user(
+    user_id = await adb.create_user(
         username=request.username,
         password=request.password,
         role="user"
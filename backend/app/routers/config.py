@@ -8,6 +8,7 @@ from typing import Dict, Any, List, Optional
 
 from app.services.config_service import config_service
 from app.services.push_service import push_service
+from app.services.database import adb
 from app.models.schemas import PushMessage, PushChannel
 from app.middleware.auth import require_auth, require_admin
 from app.utils.sources import HOT_SOURCES, CATEGORIES
@@ -39,7 +40,7 @@ class PushSourcesUpdate(BaseModel):
 @router.get("/settings")
 async def get_settings(_: dict = Depends(require_auth)):
     """获取所有系统设置"""
-    return {"settings": config_service.get_all_settings()}
+    return {"settings": await adb.run(config_service.get_all_settings)}
 
 
 @router.put("/settings")
@@ -49,7 +50,7 @@ async def update_settings(
 ):
     """更新系统设置"""
     for key, value in settings_data.items():
-        config_service.set_setting(key, value)
+        await adb.run(config_service.set_setting, key, value)
     return {"success": True, "message": "设置已更新"}
 
 
@@ -58,7 +59,7 @@ async def update_settings(
 @router.get("/push")
 async def get_push_channels(_: dict = Depends(require_auth)):
     """获取所有推送渠道配置"""
-    channels = config_service.get_all_push_channels()
+    channels = await adb.run(config_service.get_all_push_channels)
 
     # 对敏感配置进行脱敏处理
     for channel in channels:
@@ -89,7 +90,7 @@ async def get_push_channel(
     _: dict = Depends(require_auth)
 ):
     """获取指定推送渠道配置"""
-    channel = config_service.get_push_channel_config(channel_id)
+    channel = await adb.run(config_service.get_push_channel_config, channel_id)
     if not channel:
         raise HTTPException(status_code=404, detail=f"未找到渠道: {channel_id}")
 
@@ -115,7 +116,7 @@ async def update_push_channel(
     config = channel_config.config
     
     # 处理脱敏密码：如果密码包含 "..."，说明是脱敏后的值，需要保留原密码
-    existing_config = config_service.get_push_channel_config(channel_id)
+    existing_config = await adb.run(config_service.get_push_channel_config, channel_id)
     if existing_config and existing_config.get("config"):
         old_config = existing_config["config"]
         sensitive_fields = ["password", "bot_token", "webhook_url"]
@@ -152,10 +153,10 @@ async def update_push_channel(
                 )
 
     # 保存配置
-    config_service.save_push_channel(channel_id, channel_config.enabled, config)
+    await adb.run(config_service.save_push_channel, channel_id, channel_config.enabled, config)
 
     # 通知推送服务刷新配置
-    push_service.refresh_config()
+    await adb.run(push_service.refresh_config)
 
     return {"success": True, "message": f"{channel_id} 配置已更新"}
 
@@ -166,8 +167,8 @@ async def delete_push_channel(
     _: dict = Depends(require_admin)
 ):
     """删除推送渠道配置（恢复使用环境变量）"""
-    config_service.delete_push_channel(channel_id)
-    push_service.refresh_config()
+    await adb.run(config_service.delete_push_channel, channel_id)
+    await adb.run(push_service.refresh_config)
     return {"success": True, "message": f"{channel_id} 配置已删除，将使用环境变量配置"}
 
 
@@ -176,9 +177,7 @@ async def delete_push_channel(
 @router.get("/push-sources")
 async def get_push_sources(_: dict = Depends(require_auth)):
     """获取推送数据源选择配置"""
-    from app.services.database import db
-
-    selected_sources = config_service.get_push_sources()
+    selected_sources = await adb.run(config_service.get_push_sources)
 
     # 构建带分类的数据源列表（内置源）
     all_sources = []
@@ -194,7 +193,7 @@ async def get_push_sources(_: dict = Depends(require_auth)):
     categories = dict(CATEGORIES)
 
     # 添加自定义数据源
-    custom_sources = db.get_all_custom_sources()
+    custom_sources = await adb.get_all_custom_sources()
     custom_ids = []
     for custom in custom_sources:
         if custom["enabled"]:
@@ -225,10 +224,8 @@ async def update_push_sources(
     _: dict = Depends(require_admin)
 ):
     """更新推送数据源选择"""
-    from app.services.database import db
-
     # 获取所有有效的源 ID（内置 + 自定义）
-    custom_ids = {s["id"] for s in db.get_all_custom_sources()}
+    custom_ids = {s["id"] for s in await adb.get_all_custom_sources()}
     valid_ids = set(HOT_SOURCES.keys()) | custom_ids
 
     invalid_sources = [s for s in data.sources if s not in valid_ids]
@@ -238,7 +235,7 @@ async def update_push_sources(
             detail=f"无效的数据源 ID: {', '.join(invalid_sources)}"
         )
 
-    config_service.set_push_sources(data.sources)
+    await adb.run(config_service.set_push_sources, data.sources)
 
     return {
         "success": True,
@@ -255,7 +252,7 @@ async def test_push_channel(
 ):
     """测试推送渠道"""
     # 验证渠道是否配置
-    if not config_service.is_push_channel_configured(channel_id):
+    if not await adb.run(config_service.is_push_channel_configured, channel_id):
         raise HTTPException(status_code=400, detail=f"渠道 {channel_id} 未配置或未启用")
 
     # 发送测试消息
@@ -2,9 +2,12 @@
 推送历史路由
 查询推送历史记录
 """
-from fastapi import APIRouter, Depends, Query
+from typing import Optional
 
-from app.services.database import db
+from fastapi import APIRouter, Depends, Query, HTTPException
+
+from app.services.database import adb
+from app.services.push_queue import push_queue
 from app.middleware.auth import require_auth, require_admin
 
 
@@ -18,8 +21,8 @@ async def get_push_history(
     _: dict = Depends(require_auth)
 ):
     """获取推送历史"""
-    history = db.get_push_history(limit=limit, offset=offset)
-    total = db.get_push_history_count()
+    history = await adb.get_push_history(limit=limit, offset=offset)
+    total = await adb.get_push_history_count()
 
     return {
         "history": history,
@@ -33,7 +36,7 @@ async def get_push_history(
 @router.get("/stats")
 async def get_push_stats(_: dict = Depends(require_auth)):
     """获取推送统计"""
-    history = db.get_push_history(limit=1000)
+    history = await adb.get_push_history(limit=1000)
 
     # 统计
     total = len(history)
@@ -76,5 +79,45 @@ async def cleanup_history(
     _: dict = Depends(require_admin)
 ):
     """清理旧的推送历史"""
-    db.cleanup_push_history(days=days)
+    await adb.cleanup_push_history(days=days)
     return {"success": True, "message": f"已清理 {days} 天前的推送历史"}
+
+
+@router.get("/queue")
+async def get_push_queue(
+    status: Optional[str] = Query(None, pattern="^(pending|sending|sent|dead)$", description="任务状态，dead 为死信"),
+    limit: int = Query(50, ge=1, le=200, description="每页数量"),
+    offset: int = Query(0, ge=0, description="偏移量"),
+    _: dict = Depends(require_auth)
+):
+    """查询推送队列（含死信）"""
+    items = await adb.get_push_queue(status=status, limit=limit, offset=offset)
+    counts = await adb.get_push_queue_counts()
+    for item in items:
+        item.pop("payload", None)
+
+    return {
+        "items": items,
+        "total": counts.get(status, 0) if status else sum(counts.values()),
+        "counts": counts,
+        "stats": push_queue.get_stats(),
+        "limit": limit,
+        "offset": offset,
+    }
+
+
+@router.post("/queue/{job_id}/retry")
+async def retry_push_job(job_id: int, _: dict = Depends(require_admin)):
+    """将死信任务重新放回队列"""
+    if not await adb.requeue_push(job_id):
+        raise HTTPException(status_code=404, detail="死信任务不存在")
+    push_queue.notify()
+    return {"success": True, "message": "已重新加入推送队列"}
+
+
+@router.delete("/queue/{job_id}")
+async def delete_push_job(job_id: int, _: dict = Depends(require_admin)):
+    """删除推送任务"""
+    if not await adb.delete_push_job(job_id):
+        raise HTTPException(status_code=404, detail="推送任务不存在")
+    return {"success": True, "message": "已删除"}
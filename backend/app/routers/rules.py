@@ -6,7 +6,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
-from app.services.database import db
+from app.services.database import adb
+from app.services.rule_matcher import push_rule_cache
 from app.middleware.auth import require_auth, require_admin
 
 
@@ -43,7 +44,7 @@ class PushRuleUpdate(BaseModel):
 @router.get("")
 async def get_push_rules(_: dict = Depends(require_auth)):
     """获取所有推送规则"""
-    rules = db.get_all_push_rules()
+    rules = await adb.get_all_push_rules()
     return {"rules": rules, "count": len(rules)}
 
 
@@ -106,12 +107,13 @@ async def create_push_rule(
     _validate_rule_config(rule.rule_type, rule.rule_config)
 
     # 保存规则
-    rule_id = db.save_push_rule(
+    rule_id = await adb.save_push_rule(
         name=rule.name,
         rule_type=rule.rule_type,
         rule_config=rule.rule_config,
         enabled=rule.enabled
     )
+    push_rule_cache.invalidate()
 
     return {
         "success": True,
@@ -127,7 +129,7 @@ async def update_push_rule(
     _: dict = Depends(require_admin)
 ):
     """更新推送规则"""
-    existing = db.get_push_rule(rule_id)
+    existing = await adb.get_push_rule(rule_id)
     if not existing:
         raise HTTPException(status_code=404, detail=f"规则 {rule_id} 不存在")
 
@@ -140,7 +142,8 @@ async def update_push_rule(
     # 验证规则配置
     _validate_rule_config(rule_type, rule_config)
 
-    db.save_push_rule(name, rule_type, rule_config, enabled, rule_id)
+    await adb.save_push_rule(name, rule_type, rule_config, enabled, rule_id)
+    push_rule_cache.invalidate()
 
     return {"success": True, "message": f"规则 {name} 更新成功"}
 
@@ -151,11 +154,12 @@ async def delete_push_rule(
     _: dict = Depends(require_admin)
 ):
     """删除推送规则"""
-    existing = db.get_push_rule(rule_id)
+    existing = await adb.get_push_rule(rule_id)
     if not existing:
         raise HTTPException(status_code=404, detail=f"规则 {rule_id} 不存在")
 
-    db.delete_push_rule(rule_id)
+    await adb.delete_push_rule(rule_id)
+    push_rule_cache.invalidate()
     return {"success": True, "message": f"规则 {existing['name']} 已删除"}
 
 
@@ -8,7 +8,7 @@ from typing import Optional, List
 
 from app.services.scheduler import scheduler_service
 from app.services.ai_service import ai_service
-from app.services.database import db
+from app.services.database import adb
 from app.middleware.auth import require_auth, require_admin
 
 
@@ -33,7 +33,7 @@ class DigestConfigUpdate(BaseModel):
 @router.get("/status")
 async def get_scheduler_status(_: dict = Depends(require_auth)):
     """获取调度器状态"""
-    status = scheduler_service.get_status()
+    status = await adb.run(scheduler_service.get_status)
     return status
 
 
@@ -56,11 +56,11 @@ async def update_scheduler_config(
     if config.fetch_interval is not None:
         if config.fetch_interval < 1 or config.fetch_interval > 1440:
             raise HTTPException(status_code=400, detail="抓取间隔必须在 1-1440 分钟之间")
-        db.set_setting("fetch_interval", str(config.fetch_interval))
+        await adb.set_setting("fetch_interval", str(config.fetch_interval))
         scheduler_service.update_interval(config.fetch_interval)
 
     if config.enabled is not None:
-        db.set_setting("scheduler_enabled", "1" if config.enabled else "0")
+        await adb.set_setting("scheduler_enabled", "1" if config.enabled else "0")
         if config.enabled:
             scheduler_service.resume()
         else:
@@ -73,7 +73,7 @@ async def update_scheduler_config(
 async def pause_scheduler(_: dict = Depends(require_admin)):
     """暂停调度器"""
     scheduler_service.pause()
-    db.set_setting("scheduler_enabled", "0")
+    await adb.set_setting("scheduler_enabled", "0")
     return {"success": True, "message": "调度器已暂停"}
 
 
@@ -81,7 +81,7 @@ async def pause_scheduler(_: dict = Depends(require_admin)):
 async def resume_scheduler(_: dict = Depends(require_admin)):
     """恢复调度器"""
     scheduler_service.resume()
-    db.set_setting("scheduler_enabled", "1")
+    await adb.set_setting("scheduler_enabled", "1")
     return {"success": True, "message": "调度器已恢复"}
 
 
@@ -90,7 +90,7 @@ async def resume_scheduler(_: dict = Depends(require_admin)):
 @router.get("/digest")
 async def get_digest_status(_: dict = Depends(require_auth)):
     """获取摘要任务状态和配置"""
-    return scheduler_service.get_digest_status()
+    return await adb.run(scheduler_service.get_digest_status)
 
 
 @router.put("/digest")
@@ -99,7 +99,7 @@ async def update_digest_config(
     _: dict = Depends(require_admin)
 ):
     """更新摘要配置"""
-    current_config = scheduler_service.get_digest_config()
+    current_config = await adb.run(scheduler_service.get_digest_config)
     
     # 合并更新
     if config.enabled is not None:
@@ -125,7 +125,7 @@ async def update_digest_config(
             raise HTTPException(status_code=400, detail="weekdays 必须是 1-7 的数字")
         current_config["weekdays"] = config.weekdays
     
-    scheduler_service.set_digest_config(current_config)
+    await adb.run(scheduler_service.set_digest_config, current_config)
     return {"success": True, "message": "摘要配置已更新", "config": current_config}
 
 
@@ -134,7 +134,7 @@ async def trigger_digest(_: dict = Depends(require_admin)):
     """手动触发一次摘要推送"""
     try:
         await scheduler_service.trigger_digest()
-        result = scheduler_service.get_digest_status()
+        result = await adb.run(scheduler_service.get_digest_status)
         return {"success": True, "message": "摘要推送已触发", "result": result.get("last_run_result")}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"触发失败: {str(e)}")
@@ -154,7 +154,7 @@ class AIConfigUpdate(BaseModel):
 @router.get("/ai-config")
 async def get_ai_config(_: dict = Depends(require_admin)):
     """获取 AI 摘要配置（仅管理员可见完整 Key）"""
-    return ai_service.get_config()
+    return await adb.run(ai_service.get_config)
 
 
 @router.put("/ai-config")
@@ -163,7 +163,7 @@ async def update_ai_config(
     _: dict = Depends(require_admin)
 ):
     """更新 AI 摘要配置"""
-    current_config = ai_service.get_config()
+    current_config = await adb.run(ai_service.get_config)
 
     if config.enabled is not None:
         current_config["enabled"] = config.enabled
@@ -178,5 +178,5 @@ async def update_ai_config(
             raise HTTPException(status_code=400, detail="无效的摘要风格")
         current_config["summary_style"] = config.summary_style
 
-    ai_service.set_config(current_config)
+    await adb.run(ai_service.set_config, current_config)
     return {"success": True, "message": "AI 配置已更新", "config": current_config}
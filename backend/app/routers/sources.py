@@ -4,12 +4,12 @@
 """
 import re
 import httpx
-import feedparser
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
 
-from app.services.database import db
+from app.services.database import adb
+from app.services.feed_parser import feed_parser
 from app.middleware.auth import require_auth, require_admin
 from app.utils.sources import HOT_SOURCES
 
@@ -62,7 +62,7 @@ class SourceValidateRequest(BaseModel):
 @router.get("/custom")
 async def get_custom_sources(_: dict = Depends(require_auth)):
     """获取所有自定义数据源"""
-    sources = db.get_all_custom_sources()
+    sources = await adb.get_all_custom_sources()
     return {"sources": sources, "count": len(sources)}
 
 
@@ -76,7 +76,7 @@ async def create_custom_source(
     source_id = f"custom_{re.sub(r'[^a-zA-Z0-9]', '_', source.name.lower())}"
 
     # 检查是否已存在
-    existing = db.get_custom_source(source_id)
+    existing = await adb.get_custom_source(source_id)
     if existing:
         raise HTTPException(status_code=400, detail=f"数据源 {source.name} 已存在")
 
@@ -91,14 +91,14 @@ async def create_custom_source(
                 "User-Agent": "Mozilla/5.0 (compatible; HotPush/1.0)"
             })
             response.raise_for_status()
-            feed = feedparser.parse(response.text)
+            feed = await feed_parser.parse(response.text, source="validate")
             if not feed.entries:
                 raise HTTPException(status_code=400, detail="无法解析 RSS 内容或内容为空")
     except httpx.HTTPError as e:
         raise HTTPException(status_code=400, detail=f"无法访问 RSS 源: {str(e)}")
 
     # 保存到数据库
-    db.save_custom_source(
+    await adb.save_custom_source(
         source_id=source_id,
         name=source.name,
         url=source.url,
@@ -121,7 +121,7 @@ async def update_custom_source(
     _: dict = Depends(require_admin)
 ):
     """更新自定义数据源"""
-    existing = db.get_custom_source(source_id)
+    existing = await adb.get_custom_source(source_id)
     if not existing:
         raise HTTPException(status_code=404, detail=f"数据源 {source_id} 不存在")
 
@@ -132,7 +132,7 @@ async def update_custom_source(
     icon = source.icon if source.icon is not None else existing["icon"]
     enabled = source.enabled if source.enabled is not None else existing["enabled"]
 
-    db.save_custom_source(source_id, name, url, category, icon, enabled)
+    await adb.save_custom_source(source_id, name, url, category, icon, enabled)
 
     return {"success": True, "message": f"数据源 {name} 更新成功"}
 
@@ -143,11 +143,11 @@ async def delete_custom_source(
     _: dict = Depends(require_admin)
 ):
     """删除自定义数据源"""
-    existing = db.get_custom_source(source_id)
+    existing = await adb.get_custom_source(source_id)
     if not existing:
         raise HTTPException(status_code=404, detail=f"数据源 {source_id} 不存在")
 
-    db.delete_custom_source(source_id)
+    await adb.delete_custom_source(source_id)
     return {"success": True, "message": f"数据源 {existing['name']} 已删除"}
 
 
@@ -163,7 +163,7 @@ async def validate_rss_source(
                 "User-Agent": "Mozilla/5.0 (compatible; HotPush/1.0)"
             })
             response.raise_for_status()
-            feed = feedparser.parse(response.text)
+            feed = await feed_parser.parse(response.text, source="validate")
 
             if not feed.entries:
                 return {
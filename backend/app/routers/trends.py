@@ -3,7 +3,7 @@
 提供热搜排名趋势和统计数据
 """
 from fastapi import APIRouter
-from app.services.database import db
+from app.services.database import adb
 from app.utils.sources import HOT_SOURCES, get_source_info
 
 router = APIRouter()
@@ -15,7 +15,7 @@ async def get_ranking_trend(source_id: str, hours: int = 24):
     source_info = get_source_info(source_id)
     source_name = source_info.get("name", source_id) if source_info else source_id
 
-    data = db.get_trend_data(source_id, hours=hours)
+    data = await adb.get_trend_data(source_id, hours=hours)
 
     time_points = sorted(set(d["snapshot_time"] for d in data))
     items_map = {}
@@ -46,14 +46,14 @@ async def get_ranking_trend(source_id: str, hours: int = 24):
 @router.get("/item/{item_id}")
 async def get_item_trend(item_id: str, hours: int = 24):
     """获取指定热搜条目的排名趋势"""
-    data = db.get_item_trend(item_id, hours=hours)
+    data = await adb.get_item_trend(item_id, hours=hours)
     return {"item_id": item_id, "hours": hours, "data": data}
 
 
 @router.get("/overview")
 async def get_overview(hours: int = 24):
     """获取各平台热搜数量统计概览"""
-    stats = db.get_platform_stats(hours=hours)
+    stats = await adb.get_platform_stats(hours=hours)
 
     for item in stats:
         source_info = get_source_info(item["source"])
@@ -66,7 +66,7 @@ async def get_overview(hours: int = 24):
 @router.get("/top")
 async def get_top_items(hours: int = 24, limit: int = 20):
     """获取热度最高的条目"""
-    items = db.get_trending_items(hours=hours, limit=limit)
+    items = await adb.get_trending_items(hours=hours, limit=limit)
 
     for item in items:
         source_info = get_source_info(item["source"])
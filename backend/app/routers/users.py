@@ -6,7 +6,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
 
-from app.services.database import db
+from app.services.database import adb
 from app.middleware.auth import require_admin
 
 
@@ -56,7 +56,7 @@ class UserResponse(BaseModel):
 @router.get("")
 async def get_users(admin: dict = Depends(require_admin)):
     """获取用户列表"""
-    users = db.get_all_users()
+    users = await adb.get_all_users()
     return {
         "users": users,
         "count": len(users)
@@ -66,7 +66,7 @@ async def get_users(admin: dict = Depends(require_admin)):
 @router.get("/{user_id}")
 async def get_user(user_id: int, admin: dict = Depends(require_admin)):
     """获取单个用户信息"""
-    user = db.get_user_by_id(user_id)
+    user = await adb.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
 
@@ -86,23 +86,23 @@ async def update_user(
     admin: dict = Depends(require_admin)
 ):
     """更新用户信息"""
-    user = db.get_user_by_id(user_id)
+    user = await adb.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
 
     # 如果要更改用户名，检查是否已存在
     if user_update.username and user_update.username != user["username"]:
-        existing = db.get_user_by_username(user_update.username)
+        existing = await adb.get_user_by_username(user_update.username)
         if existing:
             raise HTTPException(status_code=400, detail="用户名已存在")
 
     # 如果要将管理员降级为普通用户，检查是否是最后一个管理员
     if user_update.role == "user" and user["role"] == "admin":
-        admin_count = db.get_admin_count()
+        admin_count = await adb.get_admin_count()
         if admin_count <= 1:
             raise HTTPException(status_code=400, detail="不能将唯一的管理员降级为普通用户")
 
-    success = db.update_user(
+    success = await adb.update_user(
         user_id=user_id,
         username=user_update.username,
         password=user_update.password,
@@ -118,13 +118,13 @@ async def update_user(
 @router.delete("/{user_id}")
 async def delete_user(user_id: int, admin: dict = Depends(require_admin)):
     """删除用户"""
-    user = db.get_user_by_id(user_id)
+    user = await adb.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
 
     # 不能删除最后一个管理员
     if user["role"] == "admin":
-        admin_count = db.get_admin_count()
+        admin_count = await adb.get_admin_count()
         if admin_count <= 1:
             raise HTTPException(status_code=400, detail="不能删除唯一的管理员账户")
 
@@ -133,7 +133,7 @@ async def delete_user(user_id: int, admin: dict = Depends(require_admin)):
     if current_user_id and current_user_id == user_id:
         raise HTTPException(status_code=400, detail="不能删除自己的账户")
 
-    success = db.delete_user(user_id)
+    success = await adb.delete_user(user_id)
     if not success:
         raise HTTPException(status_code=500, detail="删除失败")
 
@@ -5,7 +5,7 @@ AI 摘要服务
 import json
 from typing import List, Dict, Any, Optional
 
-from app.services.database import db
+from app.services.database import db, adb
 from app.utils.logger import logger
 
 
@@ -102,7 +102,7 @@ class AIService:
         Returns:
             AI 生成的摘要文本，失败返回 None
         """
-        config = self.get_config()
+        config = await adb.run(self.get_config)
 
         if not config.get("enabled"):
             return None
@@ -4,7 +4,7 @@ Redis 缓存服务
 """
 import json
 import redis
-from typing import Optional, List, Dict, Any, Set
+from typing import Optional, List, Dict, Any, Callable
 from datetime import timedelta
 
 from app.config import settings
@@ -94,69 +94,207 @@ class CacheService:
         except Exception as e:
             print(f"Redis clear hotlists error: {e}")
     
-    # ===== 推送去重 =====
+    # ===== 推送去重（Bloom 过滤器位图） =====
     
-    def is_item_pushed(self, source: str, item_id: str) -> bool:
-        """检查条目是否已推送"""
+    def bloom_add(self, key: str, offsets: List[int], expire_at: int):
+        """将位图中的指定位置为 1，并设置绝对过期时间（不会因再次写入而延长）"""
+        if not self.is_available() or not offsets:
+            return
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for offset in offsets:
+                pipe.setbit(key, offset, 1)
+            pipe.expireat(key, expire_at)
+            pipe.execute()
+        except Exception as e:
+            print(f"Redis bloom add error: {e}")
+    
+    def bloom_check(self, keys: List[str], offsets: List[int]) -> Optional[List[List[int]]]:
+        """
+        一次往返读取多个位图中的相同位置，返回每个位图各位置的值
+        
+        Redis 不可用或所有位图都不存在（过期、被清空）时返回 None，由调用方回退到数据库
+        """
+        if not self.is_available() or not keys or not offsets:
+            return None
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.exists(*keys)
+            args = []
+            for offset in offsets:
+                args.extend(("GET", "u1", offset))
+            for key in keys:
+                pipe.execute_command("BITFIELD", key, *args)
+            results = pipe.execute()
+        except Exception as e:
+            print(f"Redis bloom check error: {e}")
+            return None
+        
+        if not results[0]:
+            return None
+        return results[1:]
+    
+    def get_key_sizes(self, pattern: str) -> Dict[str, int]:
+        """获取匹配的字符串键及其大小（字节）"""
         if not self.is_available():
-            return False
+            return {}
         
         try:
-            key = f"pushed:{source}"
-            return self.client.sismember(key, item_id)
+            keys = list(self.client.scan_iter(match=pattern, count=500))
+            if not keys:
+                return {}
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.strlen(key)
+            return dict(zip(keys, pipe.execute()))
         except Exception as e:
-            print(f"Redis check pushed error: {e}")
-            return False
+            print(f"Redis get key sizes error: {e}")
+            return {}
     
-    def mark_items_pushed(self, source: str, item_ids: List[str], ttl: int = 86400 * 7):
-        """标记条目为已推送（默认保留 7 天）"""
-        if not self.is_available() or not item_ids:
+    # ===== 抓取状态（条件请求） =====
+    
+    def get_feed_state(self, source: str) -> Optional[Dict[str, Any]]:
+        """获取数据源的抓取状态（ETag / Last-Modified 及上次的热榜数据）"""
+        if not self.is_available():
+            return None
+        
+        try:
+            data = self.client.get(f"feed_state:{source}")
+            return json.loads(data) if data else None
+        except Exception as e:
+            print(f"Redis get feed state error: {e}")
+            return None
+    
+    def set_feed_state(self, source: str, state: Dict[str, Any], ttl: int = 86400):
+        """保存数据源的抓取状态（默认保留 1 天）"""
+        if not self.is_available():
             return
         
         try:
-            key = f"pushed:{source}"
-            self.client.sadd(key, *item_ids)
-            self.client.expire(key, ttl)
+            self.client.setex(f"feed_state:{source}", ttl, json.dumps(state, ensure_ascii=False))
         except Exception as e:
-            print(f"Redis mark pushed error: {e}")
+            print(f"Redis set feed state error: {e}")
     
-    def get_pushed_item_ids(self, source: str) -> Set[str]:
-        """获取已推送的条目 ID 集合"""
+    # ===== RSSHub 实例健康度 =====
+    
+    def get_instance_health(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取实例健康状态"""
+        if not self.is_available() or not urls:
+            return {}
+        
+        try:
+            values = self.client.mget([f"instance_health:{url}" for url in urls])
+            return {url: json.loads(v) for url, v in zip(urls, values) if v}
+        except Exception as e:
+            print(f"Redis get instance health error: {e}")
+            return {}
+    
+    def set_instance_health(self, url: str, data: Dict[str, Any], ttl: int = 86400):
+        """保存实例健康状态（默认保留 1 天）"""
         if not self.is_available():
-            return set()
+            return
         
         try:
-            key = f"pushed:{source}"
-            return self.client.smembers(key)
+            self.client.setex(f"instance_health:{url}", ttl, json.dumps(data))
         except Exception as e:
-            print(f"Redis get pushed ids error: {e}")
-            return set()
+            print(f"Redis set instance health error: {e}")
+    
+    def get_sticky_instances(self) -> Dict[str, str]:
+        """获取各源固定使用的实例"""
+        if not self.is_available():
+            return {}
+        
+        try:
+            return self.client.hgetall("instance_sticky")
+        except Exception as e:
+            print(f"Redis get sticky instances error: {e}")
+            return {}
+    
+    def set_sticky_instance(self, source: str, url: str):
+        """设置源固定使用的实例"""
+        if not self.is_available():
+            return
+        
+        try:
+            self.client.hset("instance_sticky", source, url)
+        except Exception as e:
+            print(f"Redis set sticky instance error: {e}")
     
     # ===== 抓取锁 =====
     
-    def acquire_fetch_lock(self, source: str, ttl: int = 60) -> bool:
-        """获取抓取锁，防止并发抓取同一源"""
+    def acquire_fetch_lock(self, source: str, ttl: int = 60, token: str = "1") -> bool:
+        """获取抓取锁，防止并发抓取同一源（token 用于释放时校验锁的持有者）"""
         if not self.is_available():
             return True  # Redis 不可用时默认允许
         
         try:
             key = f"fetch_lock:{source}"
-            return self.client.set(key, "1", nx=True, ex=ttl)
+            return bool(self.client.set(key, token, nx=True, ex=ttl))
         except Exception as e:
             print(f"Redis acquire lock error: {e}")
             return True
     
-    def release_fetch_lock(self, source: str):
-        """释放抓取锁"""
+    def is_fetch_locked(self, source: str) -> bool:
+        """检查源是否正在被抓取"""
+        if not self.is_available():
+            return False
+        
+        try:
+            return bool(self.client.exists(f"fetch_lock:{source}"))
+        except Exception as e:
+            print(f"Redis check lock error: {e}")
+            return False
+    
+    def release_fetch_lock(self, source: str, token: Optional[str] = None):
+        """释放抓取锁，传入 token 时只释放自己持有的锁"""
         if not self.is_available():
             return
         
         try:
             key = f"fetch_lock:{source}"
-            self.client.delete(key)
+            if token is None:
+                self.client.delete(key)
+            else:
+                self.client.eval(
+                    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0",
+                    1, key, token
+                )
         except Exception as e:
             print(f"Redis release lock error: {e}")
     
+    # ===== 发布订阅 =====
+    
+    def publish(self, channel: str, message: Dict[str, Any]):
+        """发布消息到频道"""
+        if not self.is_available():
+            return
+        
+        try:
+            self.client.publish(channel, json.dumps(message, ensure_ascii=False))
+        except Exception as e:
+            print(f"Redis publish error: {e}")
+    
+    def subscribe(self, channel: str, handler: Callable[[Dict[str, Any]], None]):
+        """在后台线程中订阅频道，返回可调用 stop() 的线程；Redis 不可用时返回 None"""
+        if not self.is_available():
+            return None
+        
+        def on_message(message):
+            try:
+                handler(json.loads(message["data"]))
+            except Exception as e:
+                print(f"Redis subscriber error: {e}")
+        
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{channel: on_message})
+            return pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            print(f"Redis subscribe error: {e}")
+            return None
+    
     # ===== 统计信息 =====
     
     def incr_fetch_count(self, source: str):
@@ -5,13 +5,18 @@
 import sqlite3
 import os
 import json
+import asyncio
+import functools
+import threading
 import bcrypt
-from datetime import datetime
-from typing import Set, Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Set, Optional, Dict, Any, List, Tuple
 from contextlib import contextmanager
 from urllib.parse import urlparse
 
 from app.config import settings
+from app.services.db_pool import ConnectionPool
 
 
 class Database:
@@ -31,6 +36,11 @@ class Database:
         else:
             raise ValueError(f"Unsupported database type: {self.db_type}")
 
+        self._pool = self._create_pool()
+        # bulk_write 期间当前线程复用的连接
+        self._local = threading.local()
+        # source_state 行的进程内缓存（只缓存已提交的行，首次抓取判断无需查询）
+        self._source_states: Dict[str, Dict[str, Any]] = {}
         self._init_db()
 
     def _parse_db_type(self, db_url: str) -> str:
@@ -67,35 +77,101 @@ class Database:
             "charset": "utf8mb4"
         }
 
+    def _create_pool(self) -> ConnectionPool:
+        """创建连接池"""
+        if self.db_type == "sqlite":
+            creator, ping = self._connect_sqlite, self._ping_sqlite
+        else:
+            creator, ping = self._connect_mysql, self._ping_mysql
+        return ConnectionPool(
+            name=self.db_type,
+            creator=creator,
+            ping=ping,
+            size=settings.db_pool_size,
+            recycle=settings.db_pool_recycle,
+            timeout=settings.db_pool_timeout,
+        )
+
+    def _connect_sqlite(self):
+        """新建 SQLite 连接（池内连接可能被不同线程使用）"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _connect_mysql(self):
+        """新建 MySQL 连接"""
+        import pymysql
+        return pymysql.connect(
+            **self.mysql_config,
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=False
+        )
+
+    @staticmethod
+    def _ping_sqlite(conn):
+        conn.execute("SELECT 1")
+
+    @staticmethod
+    def _ping_mysql(conn):
+        conn.ping(reconnect=False)
+
     @contextmanager
     def get_connection(self):
-        """获取数据库连接"""
-        if self.db_type == "sqlite":
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+        """从连接池借出数据库连接，正常结束时提交，异常时回滚
+
+        在 bulk_write 中调用时直接复用其连接，由 bulk_write 统一提交
+        """
+        bulk_conn = getattr(self._local, "conn", None)
+        if bulk_conn is not None:
+            yield bulk_conn
+            return
+
+        pooled = self._pool.acquire()
+        conn = pooled.conn
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
             try:
-                yield conn
-                conn.commit()
-            except Exception:
                 conn.rollback()
-                raise
-            finally:
-                conn.close()
-        elif self.db_type == "mysql":
-            import pymysql
-            conn = pymysql.connect(
-                **self.mysql_config,
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=False
-            )
-            try:
-                yield conn
-                conn.commit()
             except Exception:
-                conn.rollback()
-                raise
+                # 回滚失败说明连接已损坏，不再放回池中
+                broken = True
+            raise
+        finally:
+            self._pool.release(pooled, discard=broken)
+
+    @contextmanager
+    def bulk_write(self):
+        """
+        合并多次读写为一个事务
+
+        with db.bulk_write():
+            db.record_fetch(...)
+            db.add_push_history(...)
+
+        块内当前线程的所有数据库方法共用同一连接，块结束时一次提交，任一步失败则整体回滚。
+        支持嵌套，内层块不单独提交。
+        """
+        if getattr(self._local, "conn", None) is not None:
+            yield
+            return
+
+        with self.get_connection() as conn:
+            self._local.conn = conn
+            try:
+                yield
             finally:
-                conn.close()
+                self._local.conn = None
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        return self._pool.get_stats()
+
+    def close(self):
+        """关闭连接池"""
+        self._pool.close()
 
     def _execute(self, conn, sql: str, params: tuple = None):
         """执行 SQL，处理不同数据库的占位符差异"""
@@ -109,6 +185,14 @@ class Database:
             cursor.execute(sql)
         return cursor
 
+    def _executemany(self, conn, sql: str, seq_of_params: list):
+        """批量执行 SQL（MySQL 下 PyMySQL 会将 INSERT ... VALUES 合并为多行语句）"""
+        cursor = conn.cursor()
+        if self.db_type == "mysql":
+            sql = sql.replace("?", "%s")
+        cursor.executemany(sql, seq_of_params)
+        return cursor
+
     def _init_db(self):
         """初始化数据库表"""
         with self.get_connection() as conn:
@@ -117,6 +201,101 @@ class Database:
             elif self.db_type == "mysql":
                 self._init_mysql_tables(conn)
 
+    def _ensure_column(self, conn, table: str, column: str, definition: str):
+        """为已存在的表补充新增列（旧版本创建的表不含该列）"""
+        cursor = conn.cursor()
+        if self.db_type == "sqlite":
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = {row["name"] for row in cursor.fetchall()}
+        else:
+            cursor.execute(f"SHOW COLUMNS FROM {table}")
+            columns = {row["Field"] for row in cursor.fetchall()}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _table_exists(self, conn, table: str) -> bool:
+        cursor = conn.cursor()
+        if self.db_type == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        else:
+            cursor.execute("SHOW TABLES LIKE %s", (table,))
+        return cursor.fetchone() is not None
+
+    def _migrate_legacy_snapshots(self, conn):
+        """
+        将旧版 hot_item_snapshots（每行重复保存标题和链接）拆分到 items / snapshots / snapshot_entries，
+        完成后重命名为 hot_item_snapshots_legacy 保留原始数据
+        """
+        if not self._table_exists(conn, "hot_item_snapshots"):
+            return
+        cursor = conn.cursor()
+        if self.db_type == "sqlite":
+            ignore, rank = "OR IGNORE", "rank"
+        else:
+            ignore, rank = "IGNORE", "`rank`"
+        cursor.execute(f"""
+            INSERT {ignore} INTO items (item_id, source, title, url)
+            SELECT h.item_id, h.source, h.title, h.url
+            FROM hot_item_snapshots h
+            JOIN (
+                SELECT item_id, MAX(snapshot_time) AS latest FROM hot_item_snapshots GROUP BY item_id
+            ) l ON l.item_id = h.item_id AND l.latest = h.snapshot_time
+            ORDER BY h.id DESC
+        """)
+        cursor.execute(f"""
+            INSERT {ignore} INTO snapshots (source, snapshot_time)
+            SELECT source, snapshot_time FROM hot_item_snapshots
+            GROUP BY source, snapshot_time ORDER BY snapshot_time
+        """)
+        cursor.execute(f"""
+            INSERT {ignore} INTO snapshot_entries (snapshot_id, {rank}, item_id, hot_score)
+            SELECT s.id, h.{rank}, h.item_id, h.hot_score
+            FROM hot_item_snapshots h
+            JOIN snapshots s ON s.source = h.source AND s.snapshot_time = h.snapshot_time
+        """)
+        cursor.execute("ALTER TABLE hot_item_snapshots RENAME TO hot_item_snapshots_legacy")
+
+    def _migrate_snapshot_rollups(self, conn):
+        """汇总表为空时由已有快照生成（只在升级后首次启动时执行）"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM source_rollup_hourly LIMIT 1")
+        if cursor.fetchone():
+            return
+        if self.db_type == "sqlite":
+            bucket = "strftime('%Y-%m-%d %H:00:00', s.snapshot_time)"
+            rank = "e.rank"
+        else:
+            bucket = "DATE_FORMAT(s.snapshot_time, '%Y-%m-%d %H:00:00')"
+            rank = "e.`rank`"
+        cursor.execute(f"""
+            INSERT INTO item_rollup_hourly (bucket, item_id, source, title, appearances, best_rank, rank_sum, last_seen)
+            SELECT {bucket}, e.item_id, MAX(i.source), MAX(i.title), COUNT(*), MIN({rank}), SUM({rank}), MAX(s.snapshot_time)
+            FROM snapshot_entries e
+            JOIN snapshots s ON s.id = e.snapshot_id
+            JOIN items i ON i.item_id = e.item_id
+            GROUP BY {bucket}, e.item_id
+        """)
+        cursor.execute(f"""
+            INSERT INTO source_rollup_hourly (bucket, source, snapshot_count, appearances, last_seen)
+            SELECT {bucket}, s.source, COUNT(DISTINCT s.id), COUNT(*), MAX(s.snapshot_time)
+            FROM snapshots s
+            JOIN snapshot_entries e ON e.snapshot_id = s.id
+            GROUP BY {bucket}, s.source
+        """)
+
+    def _migrate_source_state(self, conn):
+        """从旧的 fetch_records 生成各源的状态后删除该表（只在升级后首次启动时执行）"""
+        if not self._table_exists(conn, "fetch_records"):
+            return
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM source_state LIMIT 1")
+        if not cursor.fetchone():
+            cursor.execute("""
+                INSERT INTO source_state (source, first_seen, last_fetch_at, last_item_count)
+                SELECT source, MIN(fetched_at), MAX(fetched_at), 0 FROM fetch_records GROUP BY source
+            """)
+        cursor.execute("DROP TABLE fetch_records")
+
     def _init_sqlite_tables(self, conn):
         """初始化 SQLite 表"""
         cursor = conn.cursor()
@@ -137,15 +316,18 @@ class Database:
             ON pushed_items(source)
         """)
 
-        # 抓取记录表
+        # 数据源状态表（每个源一行，记录首次抓取时间和最近一次抓取的元数据）
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fetch_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source TEXT NOT NULL,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                item_count INTEGER DEFAULT 0
+            CREATE TABLE IF NOT EXISTS source_state (
+                source TEXT PRIMARY KEY,
+                first_seen TIMESTAMP NOT NULL,
+                last_fetch_at TIMESTAMP NOT NULL,
+                last_item_count INTEGER DEFAULT 0,
+                last_hash TEXT,
+                last_etag TEXT
             )
         """)
+        self._migrate_source_state(conn)
 
         # 系统设置表
         cursor.execute("""
@@ -205,15 +387,41 @@ class Database:
                 item_count INTEGER DEFAULT 0,
                 status TEXT DEFAULT 'success',
                 error_message TEXT,
+                latency_ms INTEGER,
                 pushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        self._ensure_column(conn, "push_history", "latency_ms", "INTEGER")
 
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_push_history_pushed_at
             ON push_history(pushed_at DESC)
         """)
 
+        # 推送队列表（每个渠道一条任务，失败后按退避时间重试）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS push_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                channel TEXT NOT NULL,
+                source TEXT,
+                title TEXT,
+                item_count INTEGER DEFAULT 0,
+                payload TEXT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at TIMESTAMP NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_push_queue_due
+            ON push_queue(status, next_attempt_at)
+        """)
+
         # 用户表
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -231,29 +439,72 @@ class Database:
             ON users(username)
         """)
 
-        # 热搜排名快照表
+        # 热搜条目表（标题、链接等只保存一份，快照中按 item_id 引用）
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS hot_item_snapshots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CREATE TABLE IF NOT EXISTS items (
+                item_id TEXT PRIMARY KEY,
                 source TEXT NOT NULL,
-                item_id TEXT NOT NULL,
                 title TEXT NOT NULL,
-                url TEXT,
+                url TEXT
+            ) WITHOUT ROWID
+        """)
+
+        # 热搜排名快照表（每次抓取一行）及其条目排名（按主键聚簇存储，与 MySQL InnoDB 一致）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                snapshot_time TIMESTAMP NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_snapshot_headers_source_time
+            ON snapshots(source, snapshot_time)
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_entries (
+                snapshot_id INTEGER NOT NULL,
                 rank INTEGER NOT NULL,
+                item_id TEXT NOT NULL,
                 hot_score TEXT,
-                snapshot_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+                PRIMARY KEY (snapshot_id, rank)
+            ) WITHOUT ROWID
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_snapshot_entries_item
+            ON snapshot_entries(item_id)
         """)
+        self._migrate_legacy_snapshots(conn)
 
+        # 快照按小时汇总表（趋势统计按小时桶合并，不再扫描原始快照）
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_snapshots_source_time
-            ON hot_item_snapshots(source, snapshot_time)
+            CREATE TABLE IF NOT EXISTS item_rollup_hourly (
+                bucket TIMESTAMP NOT NULL,
+                item_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                appearances INTEGER NOT NULL DEFAULT 0,
+                best_rank INTEGER NOT NULL,
+                rank_sum INTEGER NOT NULL DEFAULT 0,
+                last_seen TIMESTAMP NOT NULL,
+                PRIMARY KEY (bucket, item_id)
+            )
         """)
 
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_snapshots_item
-            ON hot_item_snapshots(item_id, snapshot_time)
+            CREATE TABLE IF NOT EXISTS source_rollup_hourly (
+                bucket TIMESTAMP NOT NULL,
+                source TEXT NOT NULL,
+                snapshot_count INTEGER NOT NULL DEFAULT 0,
+                appearances INTEGER NOT NULL DEFAULT 0,
+                last_seen TIMESTAMP NOT NULL,
+                PRIMARY KEY (bucket, source)
+            )
         """)
+        self._migrate_snapshot_rollups(conn)
 
     def _init_mysql_tables(self, conn):
         """初始化 MySQL 表"""
@@ -271,15 +522,18 @@ class Database:
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
 
-        # 抓取记录表
+        # 数据源状态表（每个源一行，记录首次抓取时间和最近一次抓取的元数据）
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fetch_records (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                source VARCHAR(100) NOT NULL,
-                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                item_count INT DEFAULT 0
+            CREATE TABLE IF NOT EXISTS source_state (
+                source VARCHAR(100) PRIMARY KEY,
+                first_seen DATETIME NOT NULL,
+                last_fetch_at DATETIME NOT NULL,
+                last_item_count INT DEFAULT 0,
+                last_hash VARCHAR(64),
+                last_etag VARCHAR(255)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
+        self._migrate_source_state(conn)
 
         # 系统设置表
         cursor.execute("""
@@ -339,10 +593,33 @@ class Database:
                 item_count INT DEFAULT 0,
                 status VARCHAR(20) DEFAULT 'success',
                 error_message TEXT,
+                latency_ms INT,
                 pushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 INDEX idx_push_history_pushed_at (pushed_at DESC)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
+        self._ensure_column(conn, "push_history", "latency_ms", "INT")
+
+        # 推送队列表（每个渠道一条任务，失败后按退避时间重试）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS push_queue (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                idempotency_key VARCHAR(191) NOT NULL,
+                channel VARCHAR(50) NOT NULL,
+                source VARCHAR(100),
+                title TEXT,
+                item_count INT DEFAULT 0,
+                payload MEDIUMTEXT NOT NULL,
+                status VARCHAR(20) DEFAULT 'pending',
+                attempts INT DEFAULT 0,
+                next_attempt_at DATETIME NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                UNIQUE KEY uk_push_queue_key (idempotency_key),
+                INDEX idx_push_queue_due (status, next_attempt_at)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
 
         # 用户表
         cursor.execute("""
@@ -357,21 +634,65 @@ class Database:
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
 
-        # 热搜排名快照表
+        # 热搜条目表（标题、链接等只保存一份，快照中按 item_id 引用）
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS hot_item_snapshots (
-                id INT AUTO_INCREMENT PRIMARY KEY,
+            CREATE TABLE IF NOT EXISTS items (
+                item_id VARCHAR(255) PRIMARY KEY,
                 source VARCHAR(100) NOT NULL,
-                item_id VARCHAR(255) NOT NULL,
                 title TEXT NOT NULL,
-                url TEXT,
+                url TEXT
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+        # 热搜排名快照表（每次抓取一行）及其条目排名
+        # snapshot_time 保留微秒，同一源在同一秒内的两次抓取不会违反唯一索引
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                source VARCHAR(100) NOT NULL,
+                snapshot_time DATETIME(6) NOT NULL,
+                UNIQUE INDEX idx_snapshot_headers_source_time (source, snapshot_time)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_entries (
+                snapshot_id INT NOT NULL,
                 `rank` INT NOT NULL,
+                item_id VARCHAR(255) NOT NULL,
                 hot_score VARCHAR(100),
-                snapshot_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_snapshots_source_time (source, snapshot_time),
-                INDEX idx_snapshots_item (item_id, snapshot_time)
+                PRIMARY KEY (snapshot_id, `rank`),
+                INDEX idx_snapshot_entries_item (item_id)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
+        self._migrate_legacy_snapshots(conn)
+
+        # 快照按小时汇总表（趋势统计按小时桶合并，不再扫描原始快照）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS item_rollup_hourly (
+                bucket DATETIME NOT NULL,
+                item_id VARCHAR(255) NOT NULL,
+                source VARCHAR(100) NOT NULL,
+                title TEXT NOT NULL,
+                appearances INT NOT NULL DEFAULT 0,
+                best_rank INT NOT NULL,
+                rank_sum INT NOT NULL DEFAULT 0,
+                last_seen DATETIME NOT NULL,
+                PRIMARY KEY (bucket, item_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS source_rollup_hourly (
+                bucket DATETIME NOT NULL,
+                source VARCHAR(100) NOT NULL,
+                snapshot_count INT NOT NULL DEFAULT 0,
+                appearances INT NOT NULL DEFAULT 0,
+                last_seen DATETIME NOT NULL,
+                PRIMARY KEY (bucket, source)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+        self._migrate_snapshot_rollups(conn)
 
     def _row_to_dict(self, row) -> Optional[Dict]:
         """将数据库行转换为字典"""
@@ -393,62 +714,119 @@ class Database:
             )
             return {row["id"] if self.db_type == "mysql" else row["id"] for row in cursor.fetchall()}
 
+    def filter_unpushed_item_ids(self, source: str, item_ids: List[str]) -> Tuple[List[str], bool]:
+        """只检查候选 ID，返回 (未推送的 ID, 是否首次抓取该源)"""
+        is_first = self.is_first_fetch(source)
+        if not item_ids:
+            return [], is_first
+
+        placeholders = ", ".join("?" for _ in item_ids)
+        with self.get_connection() as conn:
+            cursor = self._execute(conn,
+                f"SELECT id FROM pushed_items WHERE source = ? AND id IN ({placeholders})",
+                (source, *item_ids)
+            )
+            pushed = {row["id"] for row in cursor.fetchall()}
+        return [item_id for item_id in item_ids if item_id not in pushed], is_first
+
     def mark_items_pushed(self, source: str, items: list):
         """标记条目为已推送"""
         if not items:
             return
 
+        now = datetime.now()
+        rows = [(item.id, source, item.title, item.url, now) for item in items]
         with self.get_connection() as conn:
-            for item in items:
-                if self.db_type == "sqlite":
-                    self._execute(conn, """
-                        INSERT OR REPLACE INTO pushed_items (id, source, title, url, pushed_at)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (item.id, source, item.title, item.url, datetime.now()))
-                else:
-                    self._execute(conn, """
-                        INSERT INTO pushed_items (id, source, title, url, pushed_at)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON DUPLICATE KEY UPDATE title=%s, url=%s, pushed_at=%s
-                    """, (item.id, source, item.title, item.url, datetime.now(),
-                          item.title, item.url, datetime.now()))
-
-    def is_first_fetch(self, source: str) -> bool:
-        """判断是否是该源的首次抓取"""
+            if self.db_type == "sqlite":
+                self._executemany(conn, """
+                    INSERT OR REPLACE INTO pushed_items (id, source, title, url, pushed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, rows)
+            else:
+                self._executemany(conn, """
+                    INSERT INTO pushed_items (id, source, title, url, pushed_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE title=VALUES(title), url=VALUES(url), pushed_at=VALUES(pushed_at)
+                """, rows)
+
+    def get_source_state(self, source: str) -> Optional[Dict[str, Any]]:
+        """获取数据源状态（首次抓取时间、最近一次抓取的条目数 / 内容哈希 / ETag），从未抓取过时返回 None"""
+        state = self._source_states.get(source)
+        if state is not None:
+            return state
         with self.get_connection() as conn:
-            cursor = self._execute(conn,
-                "SELECT COUNT(*) as count FROM fetch_records WHERE source = ?",
-                (source,)
-            )
+            cursor = self._execute(conn, "SELECT * FROM source_state WHERE source = ?", (source,))
             row = cursor.fetchone()
-            count = row["count"] if self.db_type == "mysql" else row["count"]
-            return count == 0
+        if row is None:
+            return None
+        state = dict(row)
+        self._source_states[source] = state
+        return state
 
-    def record_fetch(self, source: str, item_count: int):
-        """记录一次抓取"""
-        with self.get_connection() as conn:
-            self._execute(conn, """
-                INSERT INTO fetch_records (source, fetched_at, item_count)
-                VALUES (?, ?, ?)
-            """, (source, datetime.now(), item_count))
+    def is_first_fetch(self, source: str) -> bool:
+        """判断是否是该源的首次抓取"""
+        return self.get_source_state(source) is None
 
-    def cleanup_old_records(self, days: int = 7):
-        """清理旧记录（保留最近 N 天）"""
+    def record_fetch(self, source: str, item_count: int, content_hash: Optional[str] = None,
+                     etag: Optional[str] = None):
+        """记录一次抓取（更新该源的状态行）"""
+        now = datetime.now()
         with self.get_connection() as conn:
             if self.db_type == "sqlite":
                 self._execute(conn, """
-                    DELETE FROM pushed_items WHERE pushed_at < datetime('now', ?)
-                """, (f"-{days} days",))
-                self._execute(conn, """
-                    DELETE FROM fetch_records WHERE fetched_at < datetime('now', ?)
-                """, (f"-{days} days",))
+                    INSERT INTO source_state (source, first_seen, last_fetch_at, last_item_count, last_hash, last_etag)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(source) DO UPDATE SET
+                        last_fetch_at = excluded.last_fetch_at,
+                        last_item_count = excluded.last_item_count,
+                        last_hash = excluded.last_hash,
+                        last_etag = excluded.last_etag
+                """, (source, now, now, item_count, content_hash, etag))
             else:
                 self._execute(conn, """
-                    DELETE FROM pushed_items WHERE pushed_at < DATE_SUB(NOW(), INTERVAL %s DAY)
-                """, (days,))
-                self._execute(conn, """
-                    DELETE FROM fetch_records WHERE fetched_at < DATE_SUB(NOW(), INTERVAL %s DAY)
-                """, (days,))
+                    INSERT INTO source_state (source, first_seen, last_fetch_at, last_item_count, last_hash, last_etag)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON DUPLICATE KEY UPDATE
+                        last_fetch_at = VALUES(last_fetch_at),
+                        last_item_count = VALUES(last_item_count),
+                        last_hash = VALUES(last_hash),
+                        last_etag = VALUES(last_etag)
+                """, (source, now, now, item_count, content_hash, etag))
+
+        # 未缓存的源下次读取时再加载（事务可能回滚，不缓存新插入的行）
+        state = self._source_states.get(source)
+        if state is not None:
+            self._source_states[source] = {
+                **state,
+                "last_fetch_at": now,
+                "last_item_count": item_count,
+                "last_hash": content_hash,
+                "last_etag": etag,
+            }
+
+    def touch_sources(self, sources: List[str]):
+        """内容未变化、跳过新增检测的源只刷新最近抓取时间（一条 UPDATE），避免被当作长期未抓取而清理"""
+        if not sources:
+            return
+        now = datetime.now()
+        placeholders = ", ".join("?" for _ in sources)
+        with self.get_connection() as conn:
+            self._execute(conn,
+                f"UPDATE source_state SET last_fetch_at = ? WHERE source IN ({placeholders})",
+                (now, *sources)
+            )
+        for source in sources:
+            state = self._source_states.get(source)
+            if state is not None:
+                self._source_states[source] = {**state, "last_fetch_at": now}
+
+    def cleanup_old_records(self, days: int = 7):
+        """清理旧记录（保留最近 N 天）；长期未抓取的源同时删除状态，再次抓取时按首次抓取处理"""
+        cutoff = datetime.now() - timedelta(days=days)
+        with self.get_connection() as conn:
+            self._execute(conn, "DELETE FROM pushed_items WHERE pushed_at < ?", (cutoff,))
+            self._execute(conn, "DELETE FROM source_state WHERE last_fetch_at < ?", (cutoff,))
+        self._source_states.clear()
 
     # ===== 系统设置相关方法 =====
 
@@ -684,13 +1062,14 @@ class Database:
     # ===== 推送历史相关方法 =====
 
     def add_push_history(self, channel: str, source: str, title: str,
-                        item_count: int, status: str = "success", error_message: str = None):
-        """添加推送历史记录"""
+                        item_count: int, status: str = "success", error_message: str = None,
+                        latency_ms: int = None):
+        """添加推送历史记录（latency_ms 为该渠道推送耗时）"""
         with self.get_connection() as conn:
             self._execute(conn, """
-                INSERT INTO push_history (channel, source, title, item_count, status, error_message, pushed_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (channel, source, title, item_count, status, error_message, datetime.now()))
+                INSERT INTO push_history (channel, source, title, item_count, status, error_message, latency_ms, pushed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (channel, source, title, item_count, status, error_message, latency_ms, datetime.now()))
 
     def get_push_history(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """获取推送历史"""
@@ -708,6 +1087,7 @@ class Database:
                     "item_count": row["item_count"],
                     "status": row["status"],
                     "error_message": row["error_message"],
+                    "latency_ms": row["latency_ms"],
                     "pushed_at": str(row["pushed_at"]) if row["pushed_at"] else None
                 })
             return history
@@ -731,6 +1111,128 @@ class Database:
                     DELETE FROM push_history WHERE pushed_at < DATE_SUB(NOW(), INTERVAL %s DAY)
                 """, (days,))
 
+    # ===== 推送队列相关方法 =====
+
+    @staticmethod
+    def _push_queue_row(row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "idempotency_key": row["idempotency_key"],
+            "channel": row["channel"],
+            "source": row["source"],
+            "title": row["title"],
+            "item_count": row["item_count"],
+            "payload": row["payload"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "next_attempt_at": str(row["next_attempt_at"]) if row["next_attempt_at"] else None,
+            "last_error": row["last_error"],
+            "created_at": str(row["created_at"]) if row["created_at"] else None,
+            "updated_at": str(row["updated_at"]) if row["updated_at"] else None,
+        }
+
+    def enqueue_pushes(self, jobs: List[Dict[str, Any]]) -> List[str]:
+        """写入推送任务，幂等键已存在的任务忽略，返回新写入任务的幂等键"""
+        now = datetime.now()
+        insert = "INSERT OR IGNORE" if self.db_type == "sqlite" else "INSERT IGNORE"
+        inserted = []
+        with self.get_connection() as conn:
+            for job in jobs:
+                cursor = self._execute(conn, f"""
+                    {insert} INTO push_queue
+                        (idempotency_key, channel, source, title, item_count, payload,
+                         status, attempts, next_attempt_at, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, 'pending', 0, ?, ?, ?)
+                """, (job["idempotency_key"], job["channel"], job.get("source"), job.get("title"),
+                      job.get("item_count", 0), job["payload"], now, now, now))
+                if cursor.rowcount:
+                    inserted.append(job["idempotency_key"])
+        return inserted
+
+    def claim_due_push(self, exclude_channels: List[str] = None) -> Optional[Dict[str, Any]]:
+        """领取一条到期的待推送任务并标记为发送中（条件更新，多进程不会重复领取）"""
+        now = datetime.now()
+        sql = "SELECT * FROM push_queue WHERE status = 'pending' AND next_attempt_at <= ?"
+        params = [now]
+        if exclude_channels:
+            sql += f" AND channel NOT IN ({', '.join('?' for _ in exclude_channels)})"
+            params.extend(exclude_channels)
+        sql += " ORDER BY next_attempt_at, id LIMIT 5"
+
+        with self.get_connection() as conn:
+            for row in self._execute(conn, sql, tuple(params)).fetchall():
+                cursor = self._execute(conn, """
+                    UPDATE push_queue SET status = 'sending', updated_at = ?
+                    WHERE id = ? AND status = 'pending'
+                """, (now, row["id"]))
+                if cursor.rowcount:
+                    job = self._push_queue_row(row)
+                    job["status"] = "sending"
+                    return job
+        return None
+
+    def finish_push(self, job_id: int, status: str, attempts: int,
+                    next_attempt_at: datetime = None, error: str = None):
+        """更新任务结果：sent（已送达）/ pending（等待重试）/ dead（放弃）"""
+        now = datetime.now()
+        with self.get_connection() as conn:
+            self._execute(conn, """
+                UPDATE push_queue
+                SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+                WHERE id = ?
+            """, (status, attempts, next_attempt_at or now, error, now, job_id))
+
+    def requeue_push(self, job_id: int) -> bool:
+        """将死信任务重新放回队列"""
+        now = datetime.now()
+        with self.get_connection() as conn:
+            cursor = self._execute(conn, """
+                UPDATE push_queue SET status = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'dead'
+            """, (now, now, job_id))
+            return cursor.rowcount > 0
+
+    def delete_push_job(self, job_id: int) -> bool:
+        """删除推送任务"""
+        with self.get_connection() as conn:
+            cursor = self._execute(conn, "DELETE FROM push_queue WHERE id = ?", (job_id,))
+            return cursor.rowcount > 0
+
+    def reset_stuck_pushes(self, older_than: datetime) -> int:
+        """发送中超过一定时间的任务（进程退出时未完成）重新置为待推送"""
+        with self.get_connection() as conn:
+            cursor = self._execute(conn, """
+                UPDATE push_queue SET status = 'pending', updated_at = ?
+                WHERE status = 'sending' AND updated_at < ?
+            """, (datetime.now(), older_than))
+            return cursor.rowcount
+
+    def get_push_queue(self, status: str = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """查询推送队列（按更新时间倒序）"""
+        sql = "SELECT * FROM push_queue"
+        params: tuple = ()
+        if status:
+            sql += " WHERE status = ?"
+            params = (status,)
+        sql += " ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?"
+        with self.get_connection() as conn:
+            cursor = self._execute(conn, sql, params + (limit, offset))
+            return [self._push_queue_row(row) for row in cursor.fetchall()]
+
+    def get_push_queue_counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self.get_connection() as conn:
+            cursor = self._execute(conn, "SELECT status, COUNT(*) as count FROM push_queue GROUP BY status")
+            return {row["status"]: row["count"] for row in cursor.fetchall()}
+
+    def cleanup_push_queue(self, days: int = 7):
+        """清理已送达的旧任务"""
+        cutoff = datetime.now() - timedelta(days=days)
+        with self.get_connection() as conn:
+            self._execute(conn, """
+                DELETE FROM push_queue WHERE status = 'sent' AND updated_at < ?
+            """, (cutoff,))
+
     # ===== 用户相关方法 =====
 
     def create_user(self, username: str, password: str, role: str = "user") -> int:
@@ -864,42 +1366,132 @@ class Database:
 
     # ===== 热搜快照相关方法 =====
 
-    def save_snapshot(self, source: str, items: list):
-        """保存热搜排名快照"""
+    def save_snapshot(self, source: str, items: list, snapshot_time: Optional[datetime] = None):
+        """保存热搜排名快照（条目标题、链接写入 items 表），并在同一事务中累加到所在小时的汇总"""
         if not items:
             return
-        now = datetime.now()
+        now = snapshot_time or datetime.now()
+        bucket = now.replace(minute=0, second=0, microsecond=0)
+        item_rows = [(item.id, source, item.title, item.url) for item in items]
+        # 出现次数也作为参数传入：PyMySQL 只有 VALUES 全部为占位符时才会合并成一条多行 INSERT
+        rollup_rows = [
+            (bucket, item.id, source, item.title, 1, rank_num, rank_num, now)
+            for rank_num, item in enumerate(items, 1)
+        ]
         with self.get_connection() as conn:
+            snapshot_id = self._execute(conn,
+                "INSERT INTO snapshots (source, snapshot_time) VALUES (?, ?)",
+                (source, now)
+            ).lastrowid
+            entry_rows = [
+                (snapshot_id, rank_num, item.id, item.hot_score)
+                for rank_num, item in enumerate(items, 1)
+            ]
             if self.db_type == "sqlite":
-                for rank_num, item in enumerate(items, 1):
-                    self._execute(conn, """
-                        INSERT INTO hot_item_snapshots (source, item_id, title, url, rank, hot_score, snapshot_time)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (source, item.id, item.title, item.url, rank_num, item.hot_score, now))
+                # 标题和链接未变化时不改写条目行
+                self._executemany(conn, """
+                    INSERT INTO items (item_id, source, title, url) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(item_id) DO UPDATE SET
+                        source = excluded.source,
+                        title = excluded.title,
+                        url = excluded.url
+                    WHERE items.title IS NOT excluded.title
+                       OR items.url IS NOT excluded.url
+                       OR items.source IS NOT excluded.source
+                """, item_rows)
+                self._executemany(conn, """
+                    INSERT INTO snapshot_entries (snapshot_id, rank, item_id, hot_score)
+                    VALUES (?, ?, ?, ?)
+                """, entry_rows)
+                self._executemany(conn, """
+                    INSERT INTO item_rollup_hourly (bucket, item_id, source, title, appearances, best_rank, rank_sum, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(bucket, item_id) DO UPDATE SET
+                        source = excluded.source,
+                        title = excluded.title,
+                        appearances = appearances + excluded.appearances,
+                        best_rank = MIN(best_rank, excluded.best_rank),
+                        rank_sum = rank_sum + excluded.rank_sum,
+                        last_seen = excluded.last_seen
+                """, rollup_rows)
+                self._execute(conn, """
+                    INSERT INTO source_rollup_hourly (bucket, source, snapshot_count, appearances, last_seen)
+                    VALUES (?, ?, 1, ?, ?)
+                    ON CONFLICT(bucket, source) DO UPDATE SET
+                        snapshot_count = snapshot_count + 1,
+                        appearances = appearances + excluded.appearances,
+                        last_seen = excluded.last_seen
+                """, (bucket, source, len(items), now))
             else:
-                for rank_num, item in enumerate(items, 1):
-                    self._execute(conn, """
-                        INSERT INTO hot_item_snapshots (source, item_id, title, url, `rank`, hot_score, snapshot_time)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (source, item.id, item.title, item.url, rank_num, item.hot_score, now))
+                self._executemany(conn, """
+                    INSERT INTO items (item_id, source, title, url) VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE source = VALUES(source), title = VALUES(title), url = VALUES(url)
+                """, item_rows)
+                self._executemany(conn, """
+                    INSERT INTO snapshot_entries (snapshot_id, `rank`, item_id, hot_score)
+                    VALUES (%s, %s, %s, %s)
+                """, entry_rows)
+                self._executemany(conn, """
+                    INSERT INTO item_rollup_hourly (bucket, item_id, source, title, appearances, best_rank, rank_sum, last_seen)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        source = VALUES(source),
+                        title = VALUES(title),
+                        appearances = appearances + VALUES(appearances),
+                        best_rank = LEAST(best_rank, VALUES(best_rank)),
+                        rank_sum = rank_sum + VALUES(rank_sum),
+                        last_seen = VALUES(last_seen)
+                """, rollup_rows)
+                self._execute(conn, """
+                    INSERT INTO source_rollup_hourly (bucket, source, snapshot_count, appearances, last_seen)
+                    VALUES (?, ?, 1, ?, ?)
+                    ON DUPLICATE KEY UPDATE
+                        snapshot_count = snapshot_count + 1,
+                        appearances = appearances + VALUES(appearances),
+                        last_seen = VALUES(last_seen)
+                """, (bucket, source, len(items), now))
+
+    @staticmethod
+    def _rollup_start(hours: int) -> datetime:
+        """时间窗口覆盖的第一个小时桶（包含窗口起点所在的整个小时）"""
+        return (datetime.now() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+
+    def get_latest_snapshot(self, source: str) -> Optional[Dict[str, Any]]:
+        """获取指定源最近一次快照的时间和按排名排列的条目（条目含 item_id / title / url / hot_score）"""
+        rank = "e.rank" if self.db_type == "sqlite" else "e.`rank`"
+        with self.get_connection() as conn:
+            cursor = self._execute(conn,
+                "SELECT id, snapshot_time FROM snapshots WHERE source = ? ORDER BY snapshot_time DESC LIMIT 1",
+                (source,)
+            )
+            snapshot = cursor.fetchone()
+            if snapshot is None:
+                return None
+            cursor = self._execute(conn, f"""
+                SELECT e.item_id, i.title, i.url, e.hot_score
+                FROM snapshot_entries e
+                JOIN items i ON i.item_id = e.item_id
+                WHERE e.snapshot_id = ?
+                ORDER BY {rank} ASC
+            """, (snapshot["id"],))
+            rows = cursor.fetchall()
+        return {
+            "snapshot_time": snapshot["snapshot_time"],
+            "items": [dict(row) if self.db_type == "sqlite" else row for row in rows],
+        }
 
     def get_trend_data(self, source: str, hours: int = 24) -> List[Dict[str, Any]]:
         """获取指定平台的排名趋势数据"""
+        rank = "e.rank" if self.db_type == "sqlite" else "e.`rank`"
         with self.get_connection() as conn:
-            if self.db_type == "sqlite":
-                cursor = self._execute(conn, """
-                    SELECT item_id, title, rank, snapshot_time
-                    FROM hot_item_snapshots
-                    WHERE source = ? AND snapshot_time > datetime('now', ?)
-                    ORDER BY snapshot_time ASC, rank ASC
-                """, (source, f"-{hours} hours"))
-            else:
-                cursor = self._execute(conn, """
-                    SELECT item_id, title, `rank`, snapshot_time
-                    FROM hot_item_snapshots
-                    WHERE source = ? AND snapshot_time > DATE_SUB(NOW(), INTERVAL %s HOUR)
-                    ORDER BY snapshot_time ASC, `rank` ASC
-                """, (source, hours))
+            cursor = self._execute(conn, f"""
+                SELECT e.item_id, i.title, {rank} AS `rank`, s.snapshot_time
+                FROM snapshots s
+                JOIN snapshot_entries e ON e.snapshot_id = s.id
+                JOIN items i ON i.item_id = e.item_id
+                WHERE s.source = ? AND s.snapshot_time > ?
+                ORDER BY s.snapshot_time ASC, {rank} ASC
+            """, (source, datetime.now() - timedelta(hours=hours)))
             rows = cursor.fetchall()
             return [
                 {
@@ -913,21 +1505,16 @@ class Database:
 
     def get_item_trend(self, item_id: str, hours: int = 24) -> List[Dict[str, Any]]:
         """获取指定热搜条目的排名趋势"""
+        rank = "e.rank" if self.db_type == "sqlite" else "e.`rank`"
         with self.get_connection() as conn:
-            if self.db_type == "sqlite":
-                cursor = self._execute(conn, """
-                    SELECT source, title, rank, snapshot_time
-                    FROM hot_item_snapshots
-                    WHERE item_id = ? AND snapshot_time > datetime('now', ?)
-                    ORDER BY snapshot_time ASC
-                """, (item_id, f"-{hours} hours"))
-            else:
-                cursor = self._execute(conn, """
-                    SELECT source, title, `rank`, snapshot_time
-                    FROM hot_item_snapshots
-                    WHERE item_id = ? AND snapshot_time > DATE_SUB(NOW(), INTERVAL %s HOUR)
-                    ORDER BY snapshot_time ASC
-                """, (item_id, hours))
+            cursor = self._execute(conn, f"""
+                SELECT s.source, i.title, {rank} AS `rank`, s.snapshot_time
+                FROM snapshot_entries e
+                JOIN snapshots s ON s.id = e.snapshot_id
+                JOIN items i ON i.item_id = e.item_id
+                WHERE e.item_id = ? AND s.snapshot_time > ?
+                ORDER BY s.snapshot_time ASC
+            """, (item_id, datetime.now() - timedelta(hours=hours)))
             rows = cursor.fetchall()
             return [
                 {
@@ -940,72 +1527,70 @@ class Database:
             ]
 
     def get_platform_stats(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """获取各平台热搜数量统计"""
+        """获取各平台热搜数量统计（按小时汇总表合并）"""
+        start = self._rollup_start(hours)
         with self.get_connection() as conn:
-            if self.db_type == "sqlite":
-                cursor = self._execute(conn, """
-                    SELECT source, COUNT(DISTINCT item_id) as item_count,
-                           COUNT(DISTINCT snapshot_time) as snapshot_count
-                    FROM hot_item_snapshots
-                    WHERE snapshot_time > datetime('now', ?)
-                    GROUP BY source
-                    ORDER BY item_count DESC
-                """, (f"-{hours} hours",))
-            else:
-                cursor = self._execute(conn, """
-                    SELECT source, COUNT(DISTINCT item_id) as item_count,
-                           COUNT(DISTINCT snapshot_time) as snapshot_count
-                    FROM hot_item_snapshots
-                    WHERE snapshot_time > DATE_SUB(NOW(), INTERVAL %s HOUR)
-                    GROUP BY source
-                    ORDER BY item_count DESC
-                """, (hours,))
+            cursor = self._execute(conn, """
+                SELECT source, COUNT(DISTINCT item_id) as item_count
+                FROM item_rollup_hourly
+                WHERE bucket >= ?
+                GROUP BY source
+            """, (start,))
+            item_counts = {row["source"]: row["item_count"] for row in cursor.fetchall()}
+            cursor = self._execute(conn, """
+                SELECT source, SUM(snapshot_count) as snapshot_count
+                FROM source_rollup_hourly
+                WHERE bucket >= ?
+                GROUP BY source
+            """, (start,))
             rows = cursor.fetchall()
-            return [
-                {
-                    "source": row["source"],
-                    "item_count": row["item_count"],
-                    "snapshot_count": row["snapshot_count"]
-                }
-                for row in rows
-            ]
+        stats = [
+            {
+                "source": row["source"],
+                "item_count": item_counts.get(row["source"], 0),
+                "snapshot_count": int(row["snapshot_count"])
+            }
+            for row in rows
+        ]
+        stats.sort(key=lambda x: x["item_count"], reverse=True)
+        return stats
 
     def get_trending_items(self, hours: int = 24, limit: int = 20) -> List[Dict[str, Any]]:
-        """获取热度最高的条目（出现次数最多 + 排名最高）"""
+        """
+        获取热度最高的条目（出现次数最多 + 排名最高，按小时汇总表合并）
+
+        标题取 items 中的当前标题；条目已被清理时取最近一个小时桶中的标题
+        """
         with self.get_connection() as conn:
-            if self.db_type == "sqlite":
-                cursor = self._execute(conn, """
-                    SELECT item_id, title, source,
-                           COUNT(*) as appearances,
-                           MIN(rank) as best_rank,
-                           ROUND(AVG(rank), 1) as avg_rank,
-                           MAX(snapshot_time) as last_seen
-                    FROM hot_item_snapshots
-                    WHERE snapshot_time > datetime('now', ?)
+            cursor = self._execute(conn, """
+                SELECT t.item_id,
+                       COALESCE(i.title, (
+                           SELECT r.title FROM item_rollup_hourly r
+                           WHERE r.item_id = t.item_id ORDER BY r.bucket DESC LIMIT 1
+                       )) as title,
+                       t.source, t.appearances, t.best_rank, t.avg_rank, t.last_seen
+                FROM (
+                    SELECT item_id, MAX(source) as source,
+                           SUM(appearances) as appearances,
+                           MIN(best_rank) as best_rank,
+                           ROUND(SUM(rank_sum) * 1.0 / SUM(appearances), 1) as avg_rank,
+                           MAX(last_seen) as last_seen
+                    FROM item_rollup_hourly
+                    WHERE bucket >= ?
                     GROUP BY item_id
                     ORDER BY appearances DESC, best_rank ASC
                     LIMIT ?
-                """, (f"-{hours} hours", limit))
-            else:
-                cursor = self._execute(conn, """
-                    SELECT item_id, MAX(title) as title, MAX(source) as source,
-                           COUNT(*) as appearances,
-                           MIN(`rank`) as best_rank,
-                           ROUND(AVG(`rank`), 1) as avg_rank,
-                           MAX(snapshot_time) as last_seen
-                    FROM hot_item_snapshots
-                    WHERE snapshot_time > DATE_SUB(NOW(), INTERVAL %s HOUR)
-                    GROUP BY item_id
-                    ORDER BY appearances DESC, best_rank ASC
-                    LIMIT %s
-                """, (hours, limit))
+                ) t
+                LEFT JOIN items i ON i.item_id = t.item_id
+                ORDER BY t.appearances DESC, t.best_rank ASC
+            """, (self._rollup_start(hours), limit))
             rows = cursor.fetchall()
             return [
                 {
                     "item_id": row["item_id"],
                     "title": row["title"],
                     "source": row["source"],
-                    "appearances": row["appearances"],
+                    "appearances": int(row["appearances"]),
                     "best_rank": row["best_rank"],
                     "avg_rank": float(row["avg_rank"]) if row["avg_rank"] else 0,
                     "last_seen": str(row["last_seen"])
@@ -1014,20 +1599,66 @@ class Database:
             ]
 
     def cleanup_old_snapshots(self, days: int = 7):
-        """清理旧的快照数据"""
+        """清理旧的快照数据和小时汇总"""
+        cutoff = datetime.now() - timedelta(days=days)
         with self.get_connection() as conn:
-            if self.db_type == "sqlite":
-                self._execute(conn, """
-                    DELETE FROM hot_item_snapshots WHERE snapshot_time < datetime('now', ?)
-                """, (f"-{days} days",))
-            else:
-                self._execute(conn, """
-                    DELETE FROM hot_item_snapshots WHERE snapshot_time < DATE_SUB(NOW(), INTERVAL %s DAY)
-                """, (days,))
+            self._execute(conn, """
+                DELETE FROM snapshot_entries
+                WHERE snapshot_id IN (SELECT id FROM snapshots WHERE snapshot_time < ?)
+            """, (cutoff,))
+            self._execute(conn, "DELETE FROM snapshots WHERE snapshot_time < ?", (cutoff,))
+            # 不再被任何快照引用的条目
+            self._execute(conn, """
+                DELETE FROM items
+                WHERE NOT EXISTS (SELECT 1 FROM snapshot_entries e WHERE e.item_id = items.item_id)
+            """)
+            self._execute(conn, "DELETE FROM item_rollup_hourly WHERE bucket < ?", (cutoff,))
+            self._execute(conn, "DELETE FROM source_rollup_hourly WHERE bucket < ?", (cutoff,))
+
+
+class AsyncDatabase:
+    """
+    Database 的异步包装
+
+    所有数据库方法在专用线程池中执行，不阻塞事件循环。
+    线程数与连接池大小一致，超出的调用在线程池队列中排队，并发受连接池上限约束。
+
+    用法：await adb.get_setting("key")，或 await adb.run(func, *args) 执行任意同步函数
+    """
+
+    def __init__(self, database: Database, max_workers: int = None):
+        self._db = database
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.db_pool_size,
+            thread_name_prefix="hotpush-db"
+        )
+
+    async def run(self, func, *args, **kwargs):
+        """在数据库线程池中执行同步函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._db, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # 缓存包装后的方法，避免每次调用重新创建
+        setattr(self, name, wrapper)
+        return wrapper
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
 
 
 # 全局实例
 db = Database()
+adb = AsyncDatabase(db)
 
 # 初始化管理员用户
 db.init_admin_user()
@@ -0,0 +1,184 @@
+"""
+数据库连接池
+为 SQLite 和 MySQL 提供有界连接池，支持借出健康检查、按存活时间回收和统计指标
+"""
+import time
+import threading
+from typing import Callable, Any, Dict, List
+
+
+class PoolTimeoutError(Exception):
+    """等待可用连接超时"""
+    pass
+
+
+class _PooledConnection:
+    """池内连接及其元数据"""
+
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    有界数据库连接池
+
+    - 最多同时存在 size 个连接，全部借出时调用方阻塞等待（最多 timeout 秒）
+    - 借出时执行健康检查，失效连接会被丢弃并重建
+    - 存活超过 recycle 秒的连接在借出时回收重建（recycle <= 0 表示不回收）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        creator: Callable[[], Any],
+        ping: Callable[[Any], None],
+        size: int = 5,
+        recycle: int = 3600,
+        timeout: float = 30.0,
+    ):
+        self.name = name
+        self._creator = creator
+        self._ping = ping
+        self.size = max(1, size)
+        self.recycle = recycle
+        self.timeout = timeout
+
+        self._idle: List[_PooledConnection] = []
+        self._in_use = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+
+        # 统计指标
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "discarded": 0,
+        }
+
+    def _total(self) -> int:
+        return self._in_use + len(self._idle)
+
+    def _close_quietly(self, pooled: _PooledConnection):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> _PooledConnection:
+        """借出一个连接"""
+        deadline = None
+        waited = False
+        wait_start = 0.0
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Connection pool {self.name} is closed")
+
+            while not self._idle and self._total() >= self.size:
+                if not waited:
+                    waited = True
+                    wait_start = time.monotonic()
+                    deadline = wait_start + self.timeout
+                    self._stats["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a connection from pool {self.name}"
+                    )
+                self._cond.wait(remaining)
+
+            if waited:
+                wait_time = time.monotonic() - wait_start
+                self._stats["wait_time_total"] += wait_time
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+            pooled = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+
+        # 建连和健康检查都在锁外进行，避免阻塞其他线程
+        try:
+            if pooled is not None:
+                pooled = self._validate(pooled)
+            if pooled is None:
+                pooled = _PooledConnection(self._creator())
+                with self._cond:
+                    self._stats["created"] += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        pooled.last_used_at = time.monotonic()
+        return pooled
+
+    def _validate(self, pooled: _PooledConnection):
+        """检查空闲连接是否可复用，不可复用时关闭并返回 None"""
+        if self.recycle > 0 and time.monotonic() - pooled.created_at > self.recycle:
+            self._close_quietly(pooled)
+            with self._cond:
+                self._stats["recycled"] += 1
+            return None
+
+        try:
+            self._ping(pooled.conn)
+        except Exception:
+            self._close_quietly(pooled)
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return None
+
+        return pooled
+
+    def release(self, pooled: _PooledConnection, discard: bool = False):
+        """归还连接，discard=True 时直接关闭（如连接已损坏）"""
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+
+        if pooled is not None:
+            self._close_quietly(pooled)
+
+    def close(self):
+        """关闭所有空闲连接，借出中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "name": self.name,
+                "size": self.size,
+                "recycle": self.recycle,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+            })
+        waits = stats["waits"]
+        stats["wait_time_avg"] = round(stats["wait_time_total"] / waits, 6) if waits else 0.0
+        stats["wait_time_total"] = round(stats["wait_time_total"], 6)
+        stats["wait_time_max"] = round(stats["wait_time_max"], 6)
+        return stats
@@ -0,0 +1,163 @@
+"""
+推送去重存储
+Redis 中每个源按天分桶保存 Bloom 过滤器位图（dedup:{source}:{day}），每个桶在保留期结束时整体过期，
+内存只与每天的推送量和误判率有关；数据库 pushed_items 为精确记录，用于确认 Bloom 过滤器的命中和 Redis 数据丢失时的回退
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import List, Tuple, Dict, Any
+
+from app.config import settings
+from app.models.schemas import HotItem
+from app.services.cache import cache
+from app.services.database import db
+from app.utils.logger import logger
+
+
+KEY_PREFIX = "dedup"
+BUCKET_SECONDS = 86400
+
+
+def bloom_size(capacity: int, fp_rate: float) -> Tuple[int, int]:
+    """按预计条目数和误判率计算位图大小（位）和哈希函数个数"""
+    capacity = max(capacity, 1)
+    fp_rate = min(max(fp_rate, 1e-9), 0.5)
+    bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class PushDedupStore:
+    """
+    已推送条目的去重存储
+
+    - 检查：一次往返读取保留期内所有桶中候选 ID 的位；都不命中的一定未推送，
+      命中的可能是误判，默认再用一条数据库查询确认
+    - 标记：写入数据库和当天的桶，桶的过期时间固定为当天结束后再保留 retention_days 天
+    - Redis 不可用或该源的桶都不存在时，只用候选 ID 查数据库，并将其中已推送的写回当天的桶；
+      此后一个保留期内该源处于重建状态（dedup:{source}:resync），检查继续按候选 ID 查数据库并回填，
+      避免未回填的旧记录被 Bloom 过滤器误认为未推送
+    """
+
+    def __init__(self, retention_days: int = 7, capacity: int = 5000, fp_rate: float = 0.001, confirm: bool = True):
+        self.retention_days = max(retention_days, 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.confirm = confirm
+        self.bits, self.hashes = bloom_size(capacity, fp_rate)
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._positives = 0
+        self._false_positives = 0
+        self._db_fallbacks = 0
+
+    def _offsets(self, item_id: str) -> List[int]:
+        # 双重哈希：由 128 位摘要的两半生成 k 个位置
+        digest = hashlib.blake2b(item_id.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _bucket_keys(self, source: str, now: float) -> List[str]:
+        """保留期内的所有桶，最新的在前"""
+        day = int(now // BUCKET_SECONDS)
+        return [f"{KEY_PREFIX}:{source}:{d}" for d in range(day, day - self.retention_days - 1, -1)]
+
+    def _resync_key(self, source: str) -> str:
+        return f"{KEY_PREFIX}:{source}:resync"
+
+    def _expire_at(self, now: float) -> int:
+        return (int(now // BUCKET_SECONDS) + 1 + self.retention_days) * BUCKET_SECONDS
+
+    def _add(self, source: str, item_ids: List[str], now: float):
+        day = int(now // BUCKET_SECONDS)
+        offsets = [offset for item_id in item_ids for offset in self._offsets(item_id)]
+        cache.bloom_add(f"{KEY_PREFIX}:{source}:{day}", offsets, self._expire_at(now))
+
+    def _count(self, positives: int = 0, false_positives: int = 0, db_fallback: bool = False):
+        with self._lock:
+            self._checks += 1
+            self._positives += positives
+            self._false_positives += false_positives
+            self._db_fallbacks += int(db_fallback)
+
+    def filter_unpushed(self, source: str, item_ids: List[str]) -> Tuple[List[str], bool]:
+        """返回 (未推送的 ID, 是否首次抓取该源)"""
+        now = time.time()
+        offsets = [o for item_id in item_ids for o in self._offsets(item_id)]
+        # 末尾附加重建标记位（位于过滤器范围之外，只在重建标记键中置位）
+        bitmaps = cache.bloom_check(
+            self._bucket_keys(source, now) + [self._resync_key(source)], offsets + [self.bits]
+        )
+        resyncing = bitmaps is not None and bitmaps[-1][-1] == 1
+        if bitmaps is None or resyncing:
+            unpushed, is_first = db.filter_unpushed_item_ids(source, item_ids)
+            self._count(db_fallback=True)
+            # Redis 中该源的记录已过期或被清空：只回填本次候选中已推送的 ID
+            if cache.is_available() and not is_first:
+                unpushed_set = set(unpushed)
+                pushed = [item_id for item_id in item_ids if item_id not in unpushed_set]
+                if pushed:
+                    self._add(source, pushed, now)
+                if not resyncing:
+                    cache.bloom_add(self._resync_key(source), [self.bits], self._expire_at(now))
+            return unpushed, is_first
+
+        k = self.hashes
+        unpushed = []
+        maybe_pushed = []
+        for index, item_id in enumerate(item_ids):
+            start = index * k
+            if any(all(bits[start:start + k]) for bits in bitmaps):
+                maybe_pushed.append(item_id)
+            else:
+                unpushed.append(item_id)
+
+        false_positives: List[str] = []
+        if self.confirm and maybe_pushed:
+            false_positives, _ = db.filter_unpushed_item_ids(source, maybe_pushed)
+            if false_positives:
+                logger.debug(f"[{source}] Bloom 过滤器误判 {len(false_positives)} 条")
+        self._count(positives=len(maybe_pushed), false_positives=len(false_positives))
+
+        if false_positives:
+            unpushed_set = set(unpushed) | set(false_positives)
+            unpushed = [item_id for item_id in item_ids if item_id in unpushed_set]
+        return unpushed, False
+
+    def mark_pushed(self, source: str, items: List[HotItem]):
+        """将条目标记为已推送（同时写入数据库和 Redis）"""
+        if not items:
+            return
+        db.mark_items_pushed(source, items)
+        if cache.is_available():
+            self._add(source, [item.id for item in items], time.time())
+
+    def get_stats(self) -> Dict[str, Any]:
+        sizes = cache.get_key_sizes(f"{KEY_PREFIX}:*")
+        with self._lock:
+            return {
+                "retention_days": self.retention_days,
+                "bucket_capacity": self.capacity,
+                "fp_rate": self.fp_rate,
+                "bits_per_bucket": self.bits,
+                "hashes": self.hashes,
+                "confirm": self.confirm,
+                "buckets": len(sizes),
+                "memory_bytes": sum(sizes.values()),
+                "checks": self._checks,
+                "positives": self._positives,
+                "false_positives": self._false_positives,
+                "db_fallbacks": self._db_fallbacks,
+            }
+
+
+# 全局实例
+dedup_store = PushDedupStore(
+    retention_days=settings.push_dedup_retention_days,
+    capacity=settings.push_dedup_bucket_capacity,
+    fp_rate=settings.push_dedup_fp_rate,
+    confirm=settings.push_dedup_confirm,
+)
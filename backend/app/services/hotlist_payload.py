@@ -0,0 +1,119 @@
+"""
+热榜响应预序列化
+每次抓取后只生成一次规范 JSON、压缩版本和 SSE 事件帧，接口直接返回这些字节，无需逐请求序列化
+所有热榜（Redis / 进程内缓存命中、过期数据、无 Redis 时的直接抓取、自定义源）都经 payload_registry 取得同一份结果
+"""
+import gzip
+import threading
+from typing import Optional, Tuple, Set, Iterable, Dict, Any
+
+from app.models.schemas import HotList
+
+# brotli 为可选依赖，未安装时只提供 gzip
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+# 小于该字节数的 JSON 不压缩
+MIN_COMPRESS_SIZE = 512
+
+
+def parse_accept_encoding(header: Optional[str]) -> Set[str]:
+    """解析 Accept-Encoding，返回客户端接受的编码（忽略 q=0）"""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+
+class HotListPayload:
+    """热榜的预序列化结果：规范 JSON、gzip / brotli 压缩版本及 SSE hotlist 事件帧"""
+
+    __slots__ = ("json", "gzip", "br", "sse_frame")
+
+    def __init__(self, json_bytes: bytes, compress: bool = True):
+        self.json = json_bytes
+        # 紧凑 JSON 不含换行，可直接作为单行 data
+        self.sse_frame = b"event: hotlist\ndata: " + json_bytes + b"\n\n"
+        self.gzip: Optional[bytes] = None
+        self.br: Optional[bytes] = None
+        if compress and len(json_bytes) >= MIN_COMPRESS_SIZE:
+            self.gzip = gzip.compress(json_bytes, compresslevel=GZIP_LEVEL, mtime=0)
+            if BROTLI_AVAILABLE:
+                self.br = brotli.compress(json_bytes, quality=BROTLI_QUALITY)
+
+    @classmethod
+    def build(cls, hot_list: HotList, compress: bool = True) -> "HotListPayload":
+        return cls(hot_list.model_dump_json().encode(), compress)
+
+    def encode(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """按 Accept-Encoding 选择响应体，返回 (body, Content-Encoding)"""
+        accepted = parse_accept_encoding(accept_encoding)
+        if self.br is not None and "br" in accepted:
+            return self.br, "br"
+        if self.gzip is not None and "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.json, None
+
+
+class PayloadRegistry:
+    """
+    按源保存最近一次抓取结果的预序列化内容
+
+    以 (updated_at, 条目数) 标识一次抓取：缓存反序列化、过期数据回源等路径得到的 HotList 虽是新对象，
+    只要来自同一次抓取就复用已生成的 JSON 和压缩版本；抓取到新数据时覆盖旧结果
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, HotListPayload]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(hot_list: HotList) -> Tuple[Any, int]:
+        return hot_list.updated_at, len(hot_list.items)
+
+    def get(self, hot_list: HotList) -> HotListPayload:
+        """返回热榜的预序列化结果（含压缩版本），同一次抓取只生成一次"""
+        version = self._version(hot_list)
+        with self._lock:
+            entry = self._entries.get(hot_list.source)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        payload = HotListPayload.build(hot_list)
+        with self._lock:
+            self._entries[hot_list.source] = (version, payload)
+        return payload
+
+    def discard(self, source_id: str):
+        with self._lock:
+            self._entries.pop(source_id, None)
+
+
+def build_list_body(payloads: Iterable[HotListPayload]) -> bytes:
+    """拼接多个热榜的 JSON，生成 /api/hot 的响应体"""
+    payloads = list(payloads)
+    return (
+        b'{"count":' + str(len(payloads)).encode()
+        + b',"data":[' + b",".join(p.json for p in payloads) + b"]}"
+    )
+
+
+# 全局实例
+payload_registry = PayloadRegistry()
@@ -0,0 +1,213 @@
+"""
+HTTP 客户端池
+按上游主机（及代理）复用长连接的 httpx.AsyncClient，支持 keep-alive、HTTP/2 和每主机连接数限制
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+from app.utils.logger import logger
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientPool:
+    """
+    进程级 HTTP 客户端池
+
+    每个上游主机（scheme://host:port）和代理的组合对应一个长期存活的 AsyncClient，
+    同一主机的请求复用 TCP/TLS 连接；上游支持时通过 ALPN 协商使用 HTTP/2。
+    在 FastAPI lifespan 中 start/close，未启动时首次使用也会按需创建客户端。
+    通过 lease() 使用的客户端被 retain() 淘汰时，等最后一个使用者释放后再关闭。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_connections_per_host: int = 10,
+        keepalive_expiry: float = 60.0,
+        http2: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.name = name
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = timeout
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        # 正在使用的客户端及使用者数量，已淘汰但仍在使用的客户端
+        self._in_use: Dict[httpx.AsyncClient, int] = {}
+        self._retired: set = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._started = False
+        # retain() 可能在其他线程调用（如配置刷新）
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """提取上游主机标识"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    @classmethod
+    def client_key(cls, url: str, proxy: Optional[str] = None) -> str:
+        """客户端标识：上游主机，经代理访问时附加代理地址"""
+        key = cls.host_key(url)
+        return f"{key}|{proxy}" if proxy else key
+
+    @staticmethod
+    def _display_key(key: str) -> str:
+        """统计信息中隐藏代理地址中的账号密码"""
+        host, _, proxy = key.partition("|")
+        if not proxy:
+            return host
+        parts = urlsplit(proxy)
+        return f"{host} via {parts.scheme}://{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+
+    def _new_stats(self) -> Dict[str, int]:
+        return {"requests": 0, "responses": 0, "errors": 0, "http2_responses": 0}
+
+    def _create_client(self, key: str, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        stats = self._stats.setdefault(key, self._new_stats())
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+        async def on_request(request: httpx.Request):
+            stats["requests"] += 1
+
+        async def on_response(response: httpx.Response):
+            stats["responses"] += 1
+            if response.status_code >= 400:
+                stats["errors"] += 1
+            if response.http_version == "HTTP/2":
+                stats["http2_responses"] += 1
+
+        return httpx.AsyncClient(
+            http2=self.http2,
+            proxy=proxy,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections_per_host,
+                max_keepalive_connections=self.max_connections_per_host,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    def _get_client(self, key: str, proxy: Optional[str]) -> httpx.AsyncClient:
+        # 调用方持有 self._lock
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._create_client(key, proxy)
+            self._clients[key] = client
+        return client
+
+    def get_client(self, url: str, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """获取该 URL 所在主机（经指定代理）的共享客户端"""
+        key = self.client_key(url, proxy)
+        with self._lock:
+            return self._get_client(key, proxy)
+
+    @asynccontextmanager
+    async def lease(self, url: str, proxy: Optional[str] = None):
+        """在使用期间持有共享客户端，期间被 retain() 淘汰也不会被关闭"""
+        key = self.client_key(url, proxy)
+        with self._lock:
+            client = self._get_client(key, proxy)
+            self._in_use[client] = self._in_use.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            with self._lock:
+                remaining = self._in_use.pop(client) - 1
+                if remaining:
+                    self._in_use[client] = remaining
+                close = not remaining and client in self._retired
+                if close:
+                    self._retired.discard(client)
+            if close:
+                await client.aclose()
+
+    def record_error(self, url: str, proxy: Optional[str] = None):
+        """记录连接层错误（超时、连接失败等不会触发 response 钩子）"""
+        key = self.client_key(url, proxy)
+        self._stats.setdefault(key, self._new_stats())["errors"] += 1
+
+    def retain(self, keys: Iterable[str]) -> int:
+        """
+        只保留指定标识的客户端，淘汰其余客户端，返回淘汰的数量（可在其他线程调用）
+
+        空闲的客户端立即关闭；正在使用的客户端等请求结束、最后一个使用者释放后再关闭
+        """
+        keys = set(keys)
+        with self._lock:
+            stale = {key: client for key, client in self._clients.items() if key not in keys}
+            idle = []
+            for key, client in stale.items():
+                del self._clients[key]
+                self._stats.pop(key, None)
+                if client in self._in_use:
+                    self._retired.add(client)
+                else:
+                    idle.append(client)
+        loop = self._loop
+        for client in idle:
+            if loop is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        return len(stale)
+
+    async def start(self, urls=None):
+        """启动连接池，可预先为已知上游创建客户端"""
+        for url in urls or []:
+            self.get_client(url)
+        self._started = True
+        logger.info(f"HTTP 连接池 {self.name} 已启动（HTTP/2: {'开启' if self.http2 else '关闭'}）")
+
+    async def close(self):
+        """关闭所有客户端"""
+        with self._lock:
+            clients = list(self._clients.values()) + list(self._retired)
+            self._clients = {}
+            self._retired = set()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"关闭 HTTP 客户端失败: {e}")
+        self._started = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        return {
+            "name": self.name,
+            "started": self._started,
+            "http2": self.http2,
+            "max_connections_per_host": self.max_connections_per_host,
+            "hosts": {
+                self._display_key(key): {**stats, "open": key in self._clients and not self._clients[key].is_closed}
+                for key, stats in self._stats.items()
+            },
+        }
+
+
+# 全局实例（RSS 抓取使用）
+http_pool = HTTPClientPool(
+    name="rss",
+    max_connections_per_host=settings.http_pool_max_connections,
+    keepalive_expiry=settings.http_pool_keepalive_expiry,
+    http2=settings.http_pool_http2,
+    timeout=settings.fetch_timeout,
+)
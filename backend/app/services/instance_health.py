@@ -0,0 +1,290 @@
+"""
+RSSHub 实例健康度
+记录各实例的滚动成功率、耗时 EWMA 和熔断状态，据此决定请求顺序；Redis 可用时多进程共享
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any, Tuple
+
+from app.config import settings
+from app.services.cache import cache
+from app.utils.sources import HOT_SOURCES
+
+
+# 熔断状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 耗时 EWMA 平滑系数
+EWMA_ALPHA = 0.3
+# 计算对冲等待时间使用的耗时样本数，以及所需的最少样本数
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 5
+# 与 Redis 同步共享状态的间隔（秒）
+SYNC_INTERVAL = 5
+
+
+class InstanceHealth:
+    """单个实例的健康状态"""
+
+    def __init__(self, url: str, window: int = 50):
+        self.url = url
+        self.results = deque(maxlen=window)  # 最近请求结果，True 为成功
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # 最近成功请求耗时（秒）
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.updated_at = 0.0
+        # 半开状态下是否已有试探请求在进行（仅本进程，不共享）
+        self.probing = False
+
+    @property
+    def success_rate(self) -> float:
+        if not self.results:
+            return 1.0
+        return sum(self.results) / len(self.results)
+
+    def state(self, open_seconds: float) -> str:
+        """熔断状态：打开超过 open_seconds 后进入半开，允许试探请求"""
+        if self.opened_at is None:
+            return CLOSED
+        if time.time() - self.opened_at >= open_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "results": [int(r) for r in self.results],
+            "latencies": [round(l, 4) for l in self.latencies],
+            "latency_ewma": self.latency_ewma,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_at": self.opened_at,
+            "last_success_at": self.last_success_at,
+            "last_failure_at": self.last_failure_at,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at,
+        }
+
+    def load(self, data: Dict[str, Any]):
+        self.results.clear()
+        self.results.extend(bool(r) for r in data.get("results", []))
+        self.latencies.clear()
+        self.latencies.extend(data.get("latencies", []))
+        self.latency_ewma = data.get("latency_ewma")
+        self.consecutive_failures = data.get("consecutive_failures", 0)
+        self.opened_at = data.get("opened_at")
+        self.last_success_at = data.get("last_success_at")
+        self.last_failure_at = data.get("last_failure_at")
+        self.last_error = data.get("last_error")
+        self.updated_at = data.get("updated_at", 0.0)
+
+
+class InstanceHealthRegistry:
+    """
+    RSSHub 实例健康度注册表
+
+    - 连续失败 failure_threshold 次后熔断，open_seconds 秒后半开试探，成功即恢复；
+      半开实例同时只放行一个试探请求（acquire_probe），试探进行中视为熔断，其余请求跳过该实例
+    - 请求顺序：未熔断 > 半开 > 熔断，同级按成功率、耗时 EWMA 排序，最后按配置顺序
+    - 需要 Cookie 的源（HOT_SOURCES 中 sticky=True）固定优先使用上次成功的实例
+    - 状态保存在进程内，sync() 定期在线程中与 Redis 交换，多进程间共享（后写覆盖，近似即可）
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        open_seconds: float = 60,
+        window: int = 50,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.window = window
+        self._instances: Dict[str, InstanceHealth] = {}
+        self._sticky: Dict[str, str] = {}
+        self._last_sync = 0.0
+        self._syncing = False
+        # 待写入 Redis 的本进程更新
+        self._dirty: set = set()
+        self._dirty_sticky: Dict[str, str] = {}
+
+    def _get(self, url: str) -> InstanceHealth:
+        health = self._instances.get(url)
+        if health is None:
+            health = InstanceHealth(url, self.window)
+            self._instances[url] = health
+        return health
+
+    # ===== 共享状态 =====
+
+    async def sync(self, urls: List[str]):
+        """定期写出本进程的更新并加载其他进程的更新，Redis 读写在线程中执行，不阻塞事件循环"""
+        now = time.time()
+        if self._syncing or not cache.is_available() or now - self._last_sync < SYNC_INTERVAL:
+            return
+        self._last_sync = now
+        self._syncing = True
+        updates = {url: self._instances[url].to_dict() for url in self._dirty}
+        sticky_updates = dict(self._dirty_sticky)
+        self._dirty.clear()
+        self._dirty_sticky.clear()
+        try:
+            remote, remote_sticky = await asyncio.to_thread(self._exchange, urls, updates, sticky_updates)
+        finally:
+            self._syncing = False
+
+        for url, data in remote.items():
+            health = self._get(url)
+            if data.get("updated_at", 0) > health.updated_at:
+                health.load(data)
+        # 同步期间本进程新产生的固定实例优先
+        for source_id, url in remote_sticky.items():
+            if source_id not in self._dirty_sticky:
+                self._sticky[source_id] = url
+
+    @staticmethod
+    def _exchange(
+        urls: List[str], updates: Dict[str, Dict[str, Any]], sticky_updates: Dict[str, str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """在工作线程中执行的 Redis 读写"""
+        for url, data in updates.items():
+            cache.set_instance_health(url, data)
+        for source_id, url in sticky_updates.items():
+            cache.set_sticky_instance(source_id, url)
+        return cache.get_instance_health(urls), cache.get_sticky_instances()
+
+    def _publish(self, health: InstanceHealth):
+        health.updated_at = time.time()
+        self._dirty.add(health.url)
+
+    # ===== 半开试探 =====
+
+    def _state(self, health: InstanceHealth) -> str:
+        """路由使用的熔断状态：半开实例已有试探请求在进行时视为打开"""
+        state = health.state(self.open_seconds)
+        return OPEN if state == HALF_OPEN and health.probing else state
+
+    def is_half_open(self, url: str) -> bool:
+        health = self._instances.get(url)
+        return health is not None and health.state(self.open_seconds) == HALF_OPEN
+
+    def acquire_probe(self, url: str) -> bool:
+        """获取半开实例的试探名额，已有试探请求在进行时返回 False"""
+        health = self._get(url)
+        if health.probing:
+            return False
+        health.probing = True
+        return True
+
+    def release_probe(self, url: str):
+        """试探请求结束（包括被取消）后释放名额"""
+        self._get(url).probing = False
+
+    # ===== 记录结果 =====
+
+    def record_success(self, url: str, latency: float, source_id: Optional[str] = None):
+        """记录一次成功请求"""
+        health = self._get(url)
+        health.results.append(True)
+        health.latencies.append(latency)
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+        else:
+            health.latency_ewma = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * health.latency_ewma
+        health.consecutive_failures = 0
+        health.opened_at = None
+        health.last_success_at = time.time()
+        self._publish(health)
+
+        if source_id and self.is_sticky_source(source_id) and self._sticky.get(source_id) != url:
+            self._sticky[source_id] = url
+            self._dirty_sticky[source_id] = url
+
+    def record_failure(self, url: str, error: Optional[str] = None):
+        """记录一次失败请求，连续失败达到阈值（或半开试探失败）时熔断"""
+        health = self._get(url)
+        state = health.state(self.open_seconds)
+        health.results.append(False)
+        health.consecutive_failures += 1
+        health.last_failure_at = time.time()
+        health.last_error = error
+        if state == HALF_OPEN or (state == CLOSED and health.consecutive_failures >= self.failure_threshold):
+            health.opened_at = time.time()
+        self._publish(health)
+
+    # ===== 路由 =====
+
+    @staticmethod
+    def is_sticky_source(source_id: str) -> bool:
+        return bool(HOT_SOURCES.get(source_id, {}).get("sticky"))
+
+    def route(self, instances: List[str], source_id: Optional[str] = None) -> List[str]:
+        """
+        按健康度返回实例请求顺序
+
+        熔断打开的实例（含已有试探请求在进行的半开实例）不参与路由，冷却结束且试探名额空闲后才会重新加入；
+        所有实例都熔断时返回空列表，由调用方快速失败
+        """
+        state_rank = {CLOSED: 0, HALF_OPEN: 1}
+
+        def key(item):
+            index, url = item
+            health = self._instances.get(url)
+            if health is None:
+                return (0, -1.0, float("inf"), index)
+            ewma = health.latency_ewma if health.latency_ewma is not None else float("inf")
+            return (state_rank[self._state(health)], -round(health.success_rate, 1), ewma, index)
+
+        available = [
+            (index, url) for index, url in enumerate(instances)
+            if url not in self._instances or self._state(self._instances[url]) != OPEN
+        ]
+        ordered = [url for _, url in sorted(available, key=key)]
+
+        sticky = self._sticky.get(source_id) if source_id else None
+        if sticky in ordered:
+            ordered.remove(sticky)
+            ordered.insert(0, sticky)
+        return ordered
+
+    def hedge_delay(self, url: str, default: float, minimum: float, maximum: float) -> float:
+        """对冲等待时间：取该实例近期成功请求耗时的 p95，样本不足时使用默认值"""
+        health = self._instances.get(url)
+        if health is None or len(health.latencies) < MIN_LATENCY_SAMPLES:
+            delay = default
+        else:
+            ordered = sorted(health.latencies)
+            delay = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(max(delay, minimum), maximum)
+
+    def get_stats(self, instances: Optional[List[str]] = None) -> Dict[str, Any]:
+        """获取各实例健康状态"""
+        urls = instances if instances is not None else list(self._instances)
+        result = []
+        for url in urls:
+            health = self._get(url)
+            result.append({
+                "url": url,
+                "state": self._state(health),
+                "success_rate": round(health.success_rate, 3),
+                "requests": len(health.results),
+                "latency_ewma_ms": round(health.latency_ewma * 1000, 1) if health.latency_ewma is not None else None,
+                "consecutive_failures": health.consecutive_failures,
+                "last_success_at": health.last_success_at,
+                "last_failure_at": health.last_failure_at,
+                "last_error": health.last_error,
+            })
+        return {"instances": result, "sticky": dict(self._sticky)}
+
+
+# 全局实例
+instance_health = InstanceHealthRegistry(
+    failure_threshold=settings.rsshub_circuit_failure_threshold,
+    open_seconds=settings.rsshub_circuit_open_seconds,
+    window=settings.rsshub_health_window,
+)
@@ -0,0 +1,145 @@
+"""
+进程内热榜缓存（L1）
+位于 Redis 之前，缓存已构建好的 HotList（预序列化结果见 hotlist_payload.payload_registry），
+命中时无需访问 Redis、解析 JSON 和重建 pydantic 模型；新数据抓取完成后通过 Redis 发布订阅通知其他进程失效
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from app.config import settings
+from app.models.schemas import HotList
+from app.services.cache import cache
+from app.services.hotlist_payload import payload_registry
+from app.utils.logger import logger
+
+
+# 跨进程失效通知频道
+INVALIDATE_CHANNEL = "hotlist:invalidate"
+
+
+class _Entry:
+    __slots__ = ("hot_list", "cached_at", "stored_at")
+
+    def __init__(self, hot_list: HotList, cached_at: float):
+        self.hot_list = hot_list
+        self.cached_at = cached_at  # 数据写入 Redis 的时间（time.time()）
+        self.stored_at = time.monotonic()
+
+
+class LocalHotListCache:
+    """
+    LRU + TTL 的进程内热榜缓存
+
+    - 最多保存 maxsize 个源，超出时淘汰最久未使用的
+    - 条目在 ttl 秒后过期（应小于 Redis 软过期时间），读取时还会按 Redis 写入时间检查 max_age
+    - 本进程抓取到新数据时直接覆盖，并通过 Redis 发布订阅让其他进程删除旧条目
+    - 失效通知线程运行在后台，读写均加锁
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.worker_id = uuid.uuid4().hex
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._subscriber = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, source_id: str, max_age: Optional[float] = None) -> Optional[HotList]:
+        """获取未过期的热榜；max_age 为距 Redis 写入时间的最长秒数"""
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is not None and (
+                time.monotonic() - entry.stored_at >= self.ttl
+                or (max_age is not None and time.time() - entry.cached_at >= max_age)
+            ):
+                del self._entries[source_id]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(source_id)
+            self._hits += 1
+            return entry.hot_list
+
+    def set(self, source_id: str, hot_list: HotList, cached_at: Optional[float] = None):
+        """写入热榜，cached_at 默认为当前时间"""
+        if not self.enabled:
+            return
+        # 预序列化结果由 payload_registry 按抓取版本保存，这里提前生成
+        payload_registry.get(hot_list)
+        entry = _Entry(hot_list, cached_at if cached_at is not None else time.time())
+        with self._lock:
+            self._entries[source_id] = entry
+            self._entries.move_to_end(source_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, source_id: str):
+        """删除本进程中的条目"""
+        with self._lock:
+            if self._entries.pop(source_id, None) is not None:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ===== 跨进程失效 =====
+
+    def publish_invalidation(self, source_id: str):
+        """通知其他进程该源已有新数据"""
+        cache.publish(INVALIDATE_CHANNEL, {"source": source_id, "origin": self.worker_id})
+
+    def _on_message(self, message: Dict[str, Any]):
+        # 忽略本进程发出的通知（本进程已直接写入新数据）
+        if message.get("origin") == self.worker_id:
+            return
+        source_id = message.get("source")
+        if source_id:
+            self.invalidate(source_id)
+
+    def start(self):
+        """订阅失效通知（Redis 不可用时不订阅，此时也不会写入本缓存）"""
+        if not self.enabled or self._subscriber is not None:
+            return
+        self._subscriber = cache.subscribe(INVALIDATE_CHANNEL, self._on_message)
+        if self._subscriber is not None:
+            logger.info("热榜 L1 缓存已订阅失效通知")
+
+    def stop(self):
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+        self.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "subscribed": self._subscriber is not None,
+            }
+
+
+# 全局实例
+hotlist_cache = LocalHotListCache(
+    maxsize=settings.local_cache_size,
+    ttl=settings.local_cache_ttl,
+)
@@ -0,0 +1,322 @@
+"""
+持久化推送队列
+调度任务把推送消息按渠道写入数据库中的 push_queue 表，后台 worker 按渠道限速发送，
+失败后指数退避重试，超过最大尝试次数进入死信；Redis 仅用于跨进程唤醒 worker
+"""
+import asyncio
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable
+
+from app.config import settings
+from app.models.schemas import PushMessage, PushChannel
+from app.services.cache import cache
+from app.services.database import db, adb
+from app.services.push_service import push_service
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+# 跨进程唤醒频道（新任务入队后通知所有进程的 worker）
+WAKE_CHANNEL = "push_queue:wake"
+
+# 各平台的发送频率限制：(消息数, 时间窗口秒数)
+CHANNEL_RATE_LIMITS = {
+    "telegram": (30, 1),
+    "dingtalk": (20, 60),
+    "wecom": (20, 60),
+    "feishu": (100, 60),
+    "discord": (30, 60),
+}
+
+# 缓存的已解析消息数：同一消息的各渠道任务共用一个 PushMessage，渲染结果只生成一次
+MESSAGE_CACHE_SIZE = 16
+
+# 发送中状态超过该时间（秒）视为进程退出时遗留，重新放回队列
+STUCK_TIMEOUT = 300
+
+
+class TokenBucket:
+    """令牌桶：容量为 rate，每 per 秒补满"""
+
+    def __init__(self, rate: int, per: float):
+        self.capacity = rate
+        self.fill_rate = rate / per
+        self.tokens = float(rate)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.fill_rate)
+        self._updated = now
+
+    def available(self) -> bool:
+        self._refill()
+        return self.tokens >= 1
+
+    def wait_time(self) -> float:
+        """距离下一个令牌可用的秒数"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.fill_rate
+
+    async def acquire(self):
+        while True:
+            wait = self.wait_time()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+
+
+class PushQueue:
+    """
+    推送队列
+
+    - 每条消息按渠道拆成独立任务，幂等键相同的任务只入队一次
+    - 数据库是唯一的事实来源：领取任务使用条件更新，多进程部署时不会重复发送
+    - 渠道令牌用完时 worker 跳过该渠道的任务，不阻塞其他渠道
+    - 失败后按 base_delay * 2^(n-1) 退避（带随机抖动，不超过 max_delay），
+      达到 max_attempts 后标记为 dead，可在推送历史页重新入队
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_attempts: int = 6,
+        base_delay: float = 30,
+        max_delay: float = 3600,
+        poll_interval: float = 5,
+        rate_limits: Dict[str, tuple] = None,
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.worker_id = uuid.uuid4().hex
+        self._buckets = {
+            channel: TokenBucket(rate, per)
+            for channel, (rate, per) in (CHANNEL_RATE_LIMITS if rate_limits is None else rate_limits).items()
+        }
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscriber = None
+        self._last_recover: Optional[float] = None
+        self._messages: "OrderedDict[str, PushMessage]" = OrderedDict()
+        self._sent = 0
+        self._retried = 0
+        self._dead = 0
+
+    # ===== 入队 =====
+
+    def enqueue_sync(
+        self,
+        message: PushMessage,
+        channels: Iterable[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> List[str]:
+        """
+        按渠道写入推送任务（同步，可在 db.bulk_write() 中与其他写操作合并为一个事务）
+
+        channels 默认为所有已配置的渠道；idempotency_key 为空时每次调用都会入队。
+        返回新入队的渠道（幂等键已存在的渠道不会重复入队）
+        """
+        if channels is None:
+            channels = [c.value for c in push_service.get_configured_channels()]
+        channels = [c.value if isinstance(c, PushChannel) else c for c in channels]
+        if not channels:
+            return []
+
+        key = idempotency_key or uuid.uuid4().hex
+        payload = message.model_dump_json()
+        inserted = db.enqueue_pushes([
+            {
+                "idempotency_key": f"{key}:{channel}",
+                "channel": channel,
+                "source": message.source,
+                "title": message.title,
+                "item_count": len(message.items),
+                "payload": payload,
+            }
+            for channel in channels
+        ])
+        metrics.incr("push_queue", result="enqueued")
+        return [k.rsplit(":", 1)[1] for k in inserted]
+
+    async def enqueue(
+        self,
+        message: PushMessage,
+        channels: Iterable[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> List[str]:
+        """入队并唤醒 worker"""
+        queued = await adb.run(self.enqueue_sync, message, channels, idempotency_key)
+        if queued:
+            self.notify()
+        return queued
+
+    def notify(self):
+        """唤醒本进程的 worker，并通过 Redis 通知其他进程"""
+        self._set_wake()
+        cache.publish(WAKE_CHANNEL, {"origin": self.worker_id})
+
+    def _set_wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def _on_message(self, message: Dict[str, Any]):
+        # 订阅回调运行在 Redis 后台线程中
+        if message.get("origin") != self.worker_id and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._set_wake)
+
+    # ===== worker =====
+
+    def _limited_channels(self) -> List[str]:
+        return [channel for channel, bucket in self._buckets.items() if not bucket.available()]
+
+    def _idle_timeout(self, limited: List[str]) -> float:
+        """空闲等待时间：不超过轮询间隔，被限速的渠道有令牌可用时提前醒来"""
+        waits = [self._buckets[channel].wait_time() for channel in limited]
+        return min([self.poll_interval] + waits)
+
+    async def _recover_stuck(self):
+        if self._last_recover is not None and time.monotonic() - self._last_recover < STUCK_TIMEOUT:
+            return
+        self._last_recover = time.monotonic()
+        count = await adb.reset_stuck_pushes(datetime.now() - timedelta(seconds=STUCK_TIMEOUT))
+        if count:
+            logger.warning(f"推送队列：{count} 条发送中任务超时，已重新放回队列")
+
+    async def run_once(self) -> bool:
+        """领取并发送一条到期任务，没有可发送的任务时返回 False"""
+        job = await adb.claim_due_push(exclude_channels=self._limited_channels())
+        if job is None:
+            return False
+        bucket = self._buckets.get(job["channel"])
+        if bucket is not None:
+            await bucket.acquire()
+        await self._deliver(job)
+        return True
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                # 先清除唤醒标记再领取，领取期间入队的任务不会被错过
+                self._wake.clear()
+                if await self.run_once():
+                    continue
+                await self._recover_stuck()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._idle_timeout(self._limited_channels()))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"推送队列 worker {index} 异常: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def _load_message(self, payload: str) -> PushMessage:
+        message = self._messages.get(payload)
+        if message is None:
+            message = PushMessage.model_validate_json(payload)
+            self._messages[payload] = message
+            while len(self._messages) > MESSAGE_CACHE_SIZE:
+                self._messages.popitem(last=False)
+        else:
+            self._messages.move_to_end(payload)
+        return message
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _deliver(self, job: Dict[str, Any]):
+        channel = job["channel"]
+        attempts = job["attempts"] + 1
+        try:
+            message = self._load_message(job["payload"])
+            result = await push_service.push_to_channel_timed(PushChannel(channel), message)
+        except Exception as e:
+            result = {"success": False, "latency_ms": None, "error": str(e)}
+        error = result["error"] or (None if result["success"] else "推送失败")
+
+        if result["success"]:
+            self._sent += 1
+            metrics.incr("push_queue", channel=channel, result="sent")
+            await adb.run(self._finish, job, "sent", attempts, None, None, result["latency_ms"])
+        elif attempts >= self.max_attempts:
+            self._dead += 1
+            metrics.incr("push_queue", channel=channel, result="dead")
+            logger.error(f"[{channel}] 推送失败 {attempts} 次，已放入死信: {error}")
+            await adb.run(self._finish, job, "dead", attempts, None, error, result["latency_ms"])
+        else:
+            self._retried += 1
+            metrics.incr("push_queue", channel=channel, result="retry")
+            delay = self._retry_delay(attempts)
+            logger.warning(f"[{channel}] 推送失败（第 {attempts} 次），{delay:.0f} 秒后重试: {error}")
+            await adb.finish_push(job["id"], "pending", attempts, datetime.now() + timedelta(seconds=delay), error)
+
+    def _finish(self, job: Dict[str, Any], status: str, attempts: int,
+                next_attempt_at: Optional[datetime], error: Optional[str], latency_ms: Optional[int]):
+        """任务最终结果与推送历史在同一事务中写入"""
+        with db.bulk_write():
+            db.finish_push(job["id"], status, attempts, next_attempt_at, error)
+            db.add_push_history(
+                channel=job["channel"],
+                source=job["source"],
+                title=job["title"],
+                item_count=job["item_count"],
+                status="success" if status == "sent" else "failed",
+                error_message=error,
+                latency_ms=latency_ms,
+            )
+
+    # ===== 生命周期 =====
+
+    def start(self):
+        """启动后台 worker 并订阅跨进程唤醒通知"""
+        if self._tasks or self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._last_recover = None
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._subscriber = cache.subscribe(WAKE_CHANNEL, self._on_message)
+        logger.info(f"推送队列已启动（{self.workers} 个 worker）")
+
+    async def stop(self):
+        """停止 worker；正在发送的任务在下次启动后重新放回队列"""
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._wake = None
+        self._loop = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "sent": self._sent,
+            "retried": self._retried,
+            "dead": self._dead,
+            "rate_limited": self._limited_channels(),
+            "subscribed": self._subscriber is not None,
+        }
+
+
+# 全局实例
+push_queue = PushQueue(
+    workers=settings.push_queue_workers,
+    max_attempts=settings.push_queue_max_attempts,
+    base_delay=settings.push_queue_retry_base_delay,
+    max_delay=settings.push_queue_retry_max_delay,
+    poll_interval=settings.push_queue_poll_interval,
+)
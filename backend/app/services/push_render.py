@@ -0,0 +1,352 @@
+"""
+推送消息渲染
+每条消息只解析一次（条目按平台分组、AI 摘要 Markdown）为中间表示 MessageView，
+各格式（Telegram HTML / Markdown / 飞书富文本 / 邮件 HTML / Discord）的渲染结果缓存在消息上，
+多个渠道使用同一格式或同一消息重试时不会重复渲染
+"""
+import html
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple, Callable
+
+from app.models.schemas import PushMessage, HotItem
+from app.utils.metrics import metrics
+
+
+# 按平台分组展示的消息来源（合并推送和摘要）
+GROUPED_SOURCES = ("digest", "combined", "ai_digest")
+
+# Telegram 单条消息最大长度（API 限制 4096）
+TELEGRAM_MAX_LENGTH = 4000
+
+SOURCE_NAMES = {
+    "digest": "每日摘要",
+    "ai_digest": "AI 智能摘要",
+    "test": "测试推送",
+    "combined": "聚合推送",
+    "weibo": "微博热搜",
+    "zhihu": "知乎热榜",
+    "bilibili": "B站热门",
+    "douyin": "抖音热榜",
+    "toutiao": "今日头条",
+}
+
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_MD_HEADING_RE = re.compile(r"^#{1,3}\s+", re.MULTILINE)
+
+# AI 摘要行类型
+H1, H2, H3, HR, BLANK, TEXT = "h1", "h2", "h3", "hr", "blank", "text"
+
+
+def format_source_name(source: str) -> str:
+    """来源 ID 转中文名称"""
+    return SOURCE_NAMES.get(source, source)
+
+
+def _truncate(title: str, length: int) -> str:
+    return title[:length] + "..." if len(title) > length else title
+
+
+def parse_summary(text: str) -> List[Tuple[str, str]]:
+    """
+    将 AI 摘要 Markdown 解析为 [(行类型, 已转义文本)]
+
+    标题行保存去掉 # 后的内容，普通行和空白行保存整行（加粗标记在渲染时替换）
+    """
+    lines = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("### "):
+            lines.append((H3, html.escape(stripped[4:])))
+        elif stripped.startswith("## "):
+            lines.append((H2, html.escape(stripped[3:])))
+        elif stripped.startswith("# "):
+            lines.append((H1, html.escape(stripped[2:])))
+        elif stripped == "---":
+            lines.append((HR, ""))
+        elif not stripped:
+            lines.append((BLANK, html.escape(line)))
+        else:
+            lines.append((TEXT, html.escape(line)))
+    return lines
+
+
+def md_strip(text: str) -> str:
+    """去除 Markdown 标记，保留纯文本"""
+    text = _MD_HEADING_RE.sub("", text)
+    text = _BOLD_RE.sub(r"\1", text)
+    return text.replace("---", "─────────")
+
+
+class MessageView:
+    """推送消息的中间表示：截取后的条目、按平台分组的条目、解析后的 AI 摘要，以及各格式的渲染缓存"""
+
+    def __init__(self, message: PushMessage):
+        self.message = message
+        self.grouped = message.source in GROUPED_SOURCES
+        self.items: List[HotItem] = message.items[:50 if self.grouped else 10]
+        # [(平台名, [(去掉 [平台名] 前缀的标题, URL)])]
+        self.groups: List[Tuple[str, List[Tuple[str, str]]]] = self._group_items() if self.grouped else []
+        self._summary_lines: Optional[List[Tuple[str, str]]] = None
+        self._summary_plain: Optional[str] = None
+        self.rendered: Dict[str, Any] = {}
+
+    def _group_items(self) -> List[Tuple[str, List[Tuple[str, str]]]]:
+        grouped: "OrderedDict[str, List[HotItem]]" = OrderedDict()
+        for item in self.items:
+            grouped.setdefault(item.source, []).append(item)
+
+        groups = []
+        for source, source_items in grouped.items():
+            # 从标题中提取平台名（格式：[平台名] 标题）
+            platform_name = source
+            first_title = source_items[0].title
+            if first_title.startswith("["):
+                end_idx = first_title.find("]")
+                if end_idx > 0:
+                    platform_name = first_title[1:end_idx]
+
+            entries = []
+            for item in source_items:
+                title = item.title
+                if title.startswith("[") and "]" in title:
+                    title = title[title.find("]") + 1:].strip()
+                entries.append((title, item.url))
+            groups.append((platform_name, entries))
+        return groups
+
+    @property
+    def summary_lines(self) -> List[Tuple[str, str]]:
+        if self._summary_lines is None:
+            self._summary_lines = parse_summary(self.message.ai_summary or "")
+        return self._summary_lines
+
+    @property
+    def summary_plain(self) -> str:
+        if self._summary_plain is None:
+            self._summary_plain = md_strip(self.message.ai_summary or "")
+        return self._summary_plain
+
+
+# ===== 各格式渲染器 =====
+
+def _summary_telegram_html(view: MessageView) -> str:
+    result = []
+    for kind, text in view.summary_lines:
+        if kind == H3:
+            result.append(f"<b>{text}</b>")
+        elif kind in (H2, H1):
+            result.append(f"\n<b>{text}</b>")
+        elif kind == HR:
+            result.append("─────────")
+        else:
+            result.append(_BOLD_RE.sub(r"<b>\1</b>", text))
+    return "\n".join(result)
+
+
+def _summary_email_html(view: MessageView) -> str:
+    result = []
+    for kind, text in view.summary_lines:
+        if kind == H3:
+            result.append(f'<h4 style="margin: 12px 0 6px; color: #92400e; font-size: 14px;">{text}</h4>')
+        elif kind == H2:
+            result.append(f'<h3 style="margin: 15px 0 8px; color: #92400e; font-size: 15px;">{text}</h3>')
+        elif kind == H1:
+            result.append(f'<h2 style="margin: 18px 0 10px; color: #78350f; font-size: 16px;">{text}</h2>')
+        elif kind == HR:
+            result.append('<hr style="border: none; border-top: 1px solid #e5e7eb; margin: 12px 0;">')
+        elif kind == BLANK:
+            result.append("<br>")
+        else:
+            result.append(_BOLD_RE.sub(r"<strong>\1</strong>", text) + "<br>")
+    return "\n".join(result)
+
+
+def render_telegram(view: MessageView) -> List[str]:
+    """Telegram HTML，超过长度限制时分割为多条消息"""
+    message = view.message
+    messages = []
+    header = f"<b>{message.title}</b>\n"
+    continued = f"<b>{message.title}（续）</b>\n"
+    current_lines = [header]
+    current_length = len(header)
+
+    def add(line: str, extra: int):
+        nonlocal current_lines, current_length
+        if current_length + len(line) + extra > TELEGRAM_MAX_LENGTH:
+            messages.append("\n".join(current_lines))
+            current_lines = [continued]
+            current_length = len(continued)
+        current_lines.append(line)
+        current_length += len(line) + 1
+
+    if message.ai_summary:
+        summary_block = f"\n{_summary_telegram_html(view)}\n\n{'─' * 18}\n"
+        current_lines.append(summary_block)
+        current_length += len(summary_block)
+
+    if view.grouped:
+        for platform_name, entries in view.groups:
+            add(f"\n<b>📌 {platform_name}</b>", 0)
+            for i, (title, url) in enumerate(entries, 1):
+                add(f"  {i}. <a href='{url}'>{_truncate(title, 55)}</a>", 1)
+    else:
+        for i, item in enumerate(view.items, 1):
+            add(f"{i}. <a href='{item.url}'>{_truncate(item.title, 60)}</a>", 1)
+        current_lines.append(f"\n📍 来源: {message.source}")
+
+    messages.append("\n".join(current_lines))
+    return messages
+
+
+def render_markdown(view: MessageView) -> str:
+    """企业微信 / 钉钉 Markdown"""
+    message = view.message
+    lines = [f"### {message.title}\n"]
+
+    if message.ai_summary:
+        lines.append(message.ai_summary)
+        lines.append("\n---\n")
+
+    if view.grouped:
+        for platform_name, entries in view.groups:
+            lines.append(f"\n**📌 {platform_name}**\n")
+            for i, (title, url) in enumerate(entries, 1):
+                lines.append(f"{i}. [{_truncate(title, 50)}]({url})")
+    else:
+        for i, item in enumerate(view.items, 1):
+            lines.append(f"{i}. [{item.title}]({item.url})")
+        lines.append(f"\n> 来源: {message.source}")
+
+    return "\n".join(lines)
+
+
+def render_discord(view: MessageView) -> str:
+    """Discord Embed 描述（Markdown，标题和来源在 Embed 其他字段中）"""
+    message = view.message
+    lines = []
+
+    if message.ai_summary:
+        lines.append(message.ai_summary)
+        lines.append("\n---\n")
+
+    if view.grouped:
+        for platform_name, entries in view.groups:
+            lines.append(f"\n**📌 {platform_name}**")
+            for i, (title, url) in enumerate(entries, 1):
+                lines.append(f"{i}. [{_truncate(title, 50)}]({url})")
+    else:
+        for i, item in enumerate(view.items, 1):
+            lines.append(f"{i}. [{item.title}]({item.url})")
+
+    return "\n".join(lines)
+
+
+def render_feishu(view: MessageView) -> List[list]:
+    """飞书富文本（post）内容"""
+    message = view.message
+    content = []
+
+    if message.ai_summary:
+        content.append([{"tag": "text", "text": view.summary_plain + "\n\n"}])
+        content.append([{"tag": "text", "text": "─────────────\n\n"}])
+
+    if view.grouped:
+        for platform_name, entries in view.groups:
+            content.append([{"tag": "text", "text": f"\n📌 {platform_name}\n"}])
+            for i, (title, url) in enumerate(entries, 1):
+                content.append([
+                    {"tag": "text", "text": f"{i}. "},
+                    {"tag": "a", "text": _truncate(title, 50), "href": url},
+                    {"tag": "text", "text": "\n"}
+                ])
+    else:
+        for i, item in enumerate(view.items, 1):
+            content.append([
+                {"tag": "text", "text": f"{i}. "},
+                {"tag": "a", "text": item.title, "href": item.url},
+                {"tag": "text", "text": "\n"}
+            ])
+
+    return content
+
+
+def render_email(view: MessageView) -> str:
+    """邮件 HTML"""
+    message = view.message
+    parts = []
+
+    if message.ai_summary:
+        parts.append(f'''
+            <div style="background: #fffbeb; border-left: 4px solid #f59e0b; padding: 15px; margin-bottom: 20px; border-radius: 0 8px 8px 0; line-height: 1.8;">
+                <div style="font-weight: bold; color: #92400e; margin-bottom: 8px;">🤖 AI 摘要</div>
+                <div style="color: #451a03;">{_summary_email_html(view)}</div>
+            </div>
+            <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
+            ''')
+
+    if view.grouped:
+        for platform_name, entries in view.groups:
+            parts.append(f'<h3 style="color: #d97706; margin: 20px 0 10px 0; padding-bottom: 8px; border-bottom: 2px solid #fef3c7; font-size: 16px;">📌 {platform_name}</h3>')
+            parts.append('<ol style="padding-left: 20px; margin: 0 0 15px 0;">')
+            for title, url in entries:
+                parts.append(f'<li style="margin-bottom: 8px;"><a href="{url}" style="color: #374151; text-decoration: none;">{_truncate(title, 70)}</a></li>')
+            parts.append('</ol>')
+    else:
+        # 普通消息不展示 AI 摘要
+        parts = ['<ol style="padding-left: 20px; margin: 0;">']
+        for item in view.items:
+            parts.append(f'<li style="margin-bottom: 8px;"><a href="{item.url}" style="color: #d97706; text-decoration: none;">{_truncate(item.title, 80)}</a></li>')
+        parts.append('</ol>')
+
+    return f"""
+        <html>
+        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f5f5f5;">
+            <div style="background: linear-gradient(135deg, #f59e0b, #d97706); padding: 20px; border-radius: 12px 12px 0 0;">
+                <h1 style="color: white; margin: 0; font-size: 24px;">{message.title}</h1>
+            </div>
+            <div style="background: white; padding: 20px; border-radius: 0 0 12px 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+                {"".join(parts)}
+                <p style="color: #888; font-size: 12px; margin-top: 20px; padding-top: 15px; border-top: 1px solid #eee;">
+                    📍 来源: {format_source_name(message.source)} | 由 HotPush 推送
+                </p>
+            </div>
+        </body>
+        </html>
+        """
+
+
+RENDERERS: Dict[str, Callable[[MessageView], Any]] = {
+    "telegram": render_telegram,
+    "markdown": render_markdown,
+    "discord": render_discord,
+    "feishu": render_feishu,
+    "email": render_email,
+}
+
+
+def get_view(message: PushMessage) -> MessageView:
+    """获取消息的中间表示（首次调用时解析并缓存在消息上）"""
+    view = message._render_view
+    # model_copy 会复制私有属性，需确认缓存属于当前对象
+    if view is None or view.message is not message:
+        view = MessageView(message)
+        message._render_view = view
+    return view
+
+
+def render(message: PushMessage, fmt: str) -> Any:
+    """按格式渲染消息，结果缓存在消息上；返回值供只读使用"""
+    view = get_view(message)
+    result = view.rendered.get(fmt)
+    if result is not None:
+        metrics.incr("push_render", format=fmt, result="hit")
+        return result
+
+    start = time.perf_counter()
+    result = RENDERERS[fmt](view)
+    metrics.observe("push_render_ms", (time.perf_counter() - start) * 1000, format=fmt)
+    metrics.incr("push_render", format=fmt, result="miss")
+    view.rendered[fmt] = result
+    return result
@@ -3,77 +3,18 @@
 支持多渠道推送：Telegram、Discord、Email、Webhook、企业微信、飞书、钉钉
 支持从数据库读取配置，优先于环境变量配置
 """
+import asyncio
+import time
 import httpx
 from typing import Optional, List, Dict, Any
 from abc import ABC, abstractmethod
 from app.config import settings
 from app.models.schemas import PushMessage, HotItem, PushChannel
 from app.utils.logger import logger
-
-
-def _md_to_email_html(text: str) -> str:
-    """将 AI 摘要中的 Markdown 转换为邮件 HTML"""
-    import re
-    import html as html_module
-
-    lines = text.split("\n")
-    result = []
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith("### "):
-            content = html_module.escape(stripped[4:])
-            result.append(f'<h4 style="margin: 12px 0 6px; color: #92400e; font-size: 14px;">{content}</h4>')
-        elif stripped.startswith("## "):
-            content = html_module.escape(stripped[3:])
-            result.append(f'<h3 style="margin: 15px 0 8px; color: #92400e; font-size: 15px;">{content}</h3>')
-        elif stripped.startswith("# "):
-            content = html_module.escape(stripped[2:])
-            result.append(f'<h2 style="margin: 18px 0 10px; color: #78350f; font-size: 16px;">{content}</h2>')
-        elif stripped == "---":
-            result.append('<hr style="border: none; border-top: 1px solid #e5e7eb; margin: 12px 0;">')
-        elif not stripped:
-            result.append("<br>")
-        else:
-            escaped = html_module.escape(line)
-            escaped = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", escaped)
-            result.append(escaped + "<br>")
-    return "\n".join(result)
-
-
-def _md_to_telegram_html(text: str) -> str:
-    """将 AI 摘要中的 Markdown 转换为 Telegram HTML"""
-    import re
-    import html as html_module
-
-    lines = text.split("\n")
-    result = []
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith("### "):
-            content = html_module.escape(stripped[4:])
-            result.append(f"<b>{content}</b>")
-        elif stripped.startswith("## "):
-            content = html_module.escape(stripped[3:])
-            result.append(f"\n<b>{content}</b>")
-        elif stripped.startswith("# "):
-            content = html_module.escape(stripped[2:])
-            result.append(f"\n<b>{content}</b>")
-        elif stripped == "---":
-            result.append("─────────")
-        else:
-            escaped = html_module.escape(line)
-            escaped = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", escaped)
-            result.append(escaped)
-    return "\n".join(result)
-
-
-def _md_strip(text: str) -> str:
-    """去除 Markdown 标记，保留纯文本"""
-    import re
-    text = re.sub(r"^#{1,3}\s+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"\*\*(.+?)\*\*", r"\1", text)
-    text = text.replace("---", "─────────")
-    return text
+from app.utils.metrics import metrics
+from app.services.smtp_client import smtp_sender, parse_recipients
+from app.services.http_pool import HTTPClientPool
+from app.services.push_render import render
 
 
 def get_proxy_config() -> Optional[str]:
@@ -81,6 +22,16 @@ def get_proxy_config() -> Optional[str]:
     return settings.https_proxy or settings.http_proxy
 
 
+# 推送共享的 HTTP 客户端（按目标主机和代理复用连接）
+push_http_pool = HTTPClientPool(
+    name="push",
+    max_connections_per_host=settings.push_pool_max_connections,
+    keepalive_expiry=settings.http_pool_keepalive_expiry,
+    http2=settings.http_pool_http2,
+    timeout=30.0,
+)
+
+
 class BasePusher(ABC):
     """推送器基类"""
 
@@ -91,6 +42,27 @@ class BasePusher(ABC):
         """设置配置"""
         self._config = config or {}
 
+    @property
+    def proxy(self) -> Optional[str]:
+        """推送请求使用的代理"""
+        return None
+
+    def http_endpoint(self) -> Optional[str]:
+        """推送请求的目标 URL，用于复用 HTTP 客户端；不通过 HTTP 推送的渠道返回 None"""
+        return getattr(self, "webhook_url", None)
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """获取目标主机的共享 HTTP 客户端"""
+        return push_http_pool.get_client(url, proxy=self.proxy)
+
+    def lease_client(self, url: str):
+        """在推送期间持有目标主机的共享 HTTP 客户端（配置刷新时不会被提前关闭）"""
+        return push_http_pool.lease(url, proxy=self.proxy)
+
+    def client_key(self) -> Optional[str]:
+        endpoint = self.http_endpoint()
+        return push_http_pool.client_key(endpoint, self.proxy) if endpoint else None
+
     @abstractmethod
     async def push(self, message: PushMessage) -> bool:
         """发送推送"""
@@ -116,6 +88,13 @@ class TelegramPusher(BasePusher):
     def is_configured(self) -> bool:
         return bool(self.bot_token and self.chat_id)
 
+    @property
+    def proxy(self) -> Optional[str]:
+        return get_proxy_config()
+
+    def http_endpoint(self) -> Optional[str]:
+        return "https://api.telegram.org"
+
     async def push(self, message: PushMessage) -> bool:
         if not self.is_configured():
             return False
@@ -123,11 +102,10 @@ class TelegramPusher(BasePusher):
         url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
 
         # 格式化消息并分割
-        texts = self._format_message(message)
+        texts = render(message, "telegram")
 
         try:
-            proxy = get_proxy_config()
-            async with httpx.AsyncClient(proxy=proxy, timeout=30.0) as client:
+            async with self.lease_client(url) as client:
                 for text in texts:
                     response = await client.post(url, json={
                         "chat_id": self.chat_id,
@@ -136,96 +114,12 @@ class TelegramPusher(BasePusher):
                         "disable_web_page_preview": True
                     })
                     response.raise_for_status()
-                logger.info(f"Telegram 推送成功，共 {len(texts)} 条消息")
-                return True
+            logger.info(f"Telegram 推送成功，共 {len(texts)} 条消息")
+            return True
         except Exception as e:
             logger.error(f"Telegram 推送失败: {e}")
             return False
 
-    def _format_message(self, message: PushMessage) -> list:
-        """格式化 Telegram 消息，返回消息列表（支持分割长消息）"""
-        import html as html_module
-
-        max_items = 50 if message.source in ["digest", "combined", "ai_digest"] else 10
-        items = message.items[:max_items]
-        
-        MAX_LENGTH = 4000
-        
-        messages = []
-        current_lines = [f"<b>{message.title}</b>\n"]
-        current_length = len(current_lines[0])
-
-        if message.ai_summary:
-            telegram_summary = _md_to_telegram_html(message.ai_summary)
-            summary_block = f"\n{telegram_summary}\n\n{'─' * 18}\n"
-            current_lines.append(summary_block)
-            current_length += len(summary_block)
-        
-        # 合并推送和摘要：按平台分组显示
-        if message.source in ["digest", "combined", "ai_digest"]:
-            # 按 source 分组
-            from collections import OrderedDict
-            grouped = OrderedDict()
-            for item in items:
-                if item.source not in grouped:
-                    grouped[item.source] = []
-                grouped[item.source].append(item)
-            
-            for source, source_items in grouped.items():
-                # 从标题中提取平台名（格式：[平台名] 标题）
-                platform_name = source
-                if source_items and source_items[0].title.startswith("["):
-                    end_idx = source_items[0].title.find("]")
-                    if end_idx > 0:
-                        platform_name = source_items[0].title[1:end_idx]
-                
-                # 添加平台标题
-                section_header = f"\n<b>📌 {platform_name}</b>"
-                if current_length + len(section_header) > MAX_LENGTH:
-                    messages.append("\n".join(current_lines))
-                    current_lines = [f"<b>{message.title}（续）</b>\n"]
-                    current_length = len(current_lines[0])
-                
-                current_lines.append(section_header)
-                current_length += len(section_header) + 1
-                
-                # 添加该平台的条目
-                for i, item in enumerate(source_items, 1):
-                    # 去掉标题中的 [平台名] 前缀
-                    title = item.title
-                    if title.startswith("[") and "]" in title:
-                        title = title[title.find("]")+1:].strip()
-                    title = title[:55] + "..." if len(title) > 55 else title
-                    line = f"  {i}. <a href='{item.url}'>{title}</a>"
-                    
-                    if current_length + len(line) + 1 > MAX_LENGTH:
-                        messages.append("\n".join(current_lines))
-                        current_lines = [f"<b>{message.title}（续）</b>\n"]
-                        current_length = len(current_lines[0])
-                    
-                    current_lines.append(line)
-                    current_length += len(line) + 1
-        else:
-            # 普通消息格式
-            for i, item in enumerate(items, 1):
-                title = item.title[:60] + "..." if len(item.title) > 60 else item.title
-                line = f"{i}. <a href='{item.url}'>{title}</a>"
-                
-                if current_length + len(line) + 1 > MAX_LENGTH:
-                    messages.append("\n".join(current_lines))
-                    current_lines = [f"<b>{message.title}（续）</b>\n"]
-                    current_length = len(current_lines[0])
-                
-                current_lines.append(line)
-                current_length += len(line) + 1
-            
-            if message.source not in ["digest", "combined", "ai_digest"]:
-                current_lines.append(f"\n📍 来源: {message.source}")
-        
-        messages.append("\n".join(current_lines))
-        
-        return messages
-
 
 class DiscordPusher(BasePusher):
     """Discord Webhook 推送"""
@@ -244,61 +138,23 @@ class DiscordPusher(BasePusher):
         # 格式化为 Discord Embed
         embed = {
             "title": message.title,
-            "description": self._format_items(message),
+            "description": render(message, "discord"),
             "color": 16750592,  # 橙色
             "footer": {"text": f"来源: {message.source}"}
         }
 
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.lease_client(self.webhook_url) as client:
                 response = await client.post(self.webhook_url, json={
                     "embeds": [embed]
                 })
                 response.raise_for_status()
-                logger.info("Discord 推送成功")
-                return True
+            logger.info("Discord 推送成功")
+            return True
         except Exception as e:
             logger.error(f"Discord 推送失败: {e}")
             return False
 
-    def _format_items(self, message: PushMessage) -> str:
-        max_items = 50 if message.source in ["digest", "combined", "ai_digest"] else 10
-        items = message.items[:max_items]
-        
-        lines = []
-
-        if message.ai_summary:
-            lines.append(message.ai_summary)
-            lines.append("\n---\n")
-
-        if message.source in ["digest", "combined", "ai_digest"]:
-            from collections import OrderedDict
-            grouped = OrderedDict()
-            for item in items:
-                if item.source not in grouped:
-                    grouped[item.source] = []
-                grouped[item.source].append(item)
-            
-            for source, source_items in grouped.items():
-                platform_name = source
-                if source_items and source_items[0].title.startswith("["):
-                    end_idx = source_items[0].title.find("]")
-                    if end_idx > 0:
-                        platform_name = source_items[0].title[1:end_idx]
-                
-                lines.append(f"\n**📌 {platform_name}**")
-                for i, item in enumerate(source_items, 1):
-                    title = item.title
-                    if title.startswith("[") and "]" in title:
-                        title = title[title.find("]")+1:].strip()
-                    title = title[:50] + "..." if len(title) > 50 else title
-                    lines.append(f"{i}. [{title}]({item.url})")
-        else:
-            for i, item in enumerate(items, 1):
-                lines.append(f"{i}. [{item.title}]({item.url})")
-        
-        return "\n".join(lines)
-
 
 class WeComPusher(BasePusher):
     """企业微信 Webhook 推送"""
@@ -315,60 +171,21 @@ class WeComPusher(BasePusher):
             return False
 
         # 格式化为 Markdown
-        content = self._format_markdown(message)
+        content = render(message, "markdown")
 
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.lease_client(self.webhook_url) as client:
                 response = await client.post(self.webhook_url, json={
                     "msgtype": "markdown",
                     "markdown": {"content": content}
                 })
                 response.raise_for_status()
-                logger.info("企业微信推送成功")
-                return True
+            logger.info("企业微信推送成功")
+            return True
         except Exception as e:
             logger.error(f"企业微信推送失败: {e}")
             return False
 
-    def _format_markdown(self, message: PushMessage) -> str:
-        max_items = 50 if message.source in ["digest", "combined", "ai_digest"] else 10
-        items = message.items[:max_items]
-        
-        lines = [f"### {message.title}\n"]
-
-        if message.ai_summary:
-            lines.append(message.ai_summary)
-            lines.append("\n---\n")
-
-        if message.source in ["digest", "combined", "ai_digest"]:
-            from collections import OrderedDict
-            grouped = OrderedDict()
-            for item in items:
-                if item.source not in grouped:
-                    grouped[item.source] = []
-                grouped[item.source].append(item)
-            
-            for source, source_items in grouped.items():
-                platform_name = source
-                if source_items and source_items[0].title.startswith("["):
-                    end_idx = source_items[0].title.find("]")
-                    if end_idx > 0:
-                        platform_name = source_items[0].title[1:end_idx]
-                
-                lines.append(f"\n**📌 {platform_name}**\n")
-                for i, item in enumerate(source_items, 1):
-                    title = item.title
-                    if title.startswith("[") and "]" in title:
-                        title = title[title.find("]")+1:].strip()
-                    title = title[:50] + "..." if len(title) > 50 else title
-                    lines.append(f"{i}. [{title}]({item.url})")
-        else:
-            for i, item in enumerate(items, 1):
-                lines.append(f"{i}. [{item.title}]({item.url})")
-            lines.append(f"\n> 来源: {message.source}")
-        
-        return "\n".join(lines)
-
 
 class FeishuPusher(BasePusher):
     """飞书 Webhook 推送"""
@@ -385,10 +202,10 @@ class FeishuPusher(BasePusher):
             return False
 
         # 飞书富文本消息
-        content = self._build_content(message)
+        content = render(message, "feishu")
 
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.lease_client(self.webhook_url) as client:
                 response = await client.post(self.webhook_url, json={
                     "msg_type": "post",
                     "content": {
@@ -401,62 +218,12 @@ class FeishuPusher(BasePusher):
                     }
                 })
                 response.raise_for_status()
-                logger.info("飞书推送成功")
-                return True
+            logger.info("飞书推送成功")
+            return True
         except Exception as e:
             logger.error(f"飞书推送失败: {e}")
             return False
 
-    def _build_content(self, message: PushMessage) -> list:
-        max_items = 50 if message.source in ["digest", "combined", "ai_digest"] else 10
-        items = message.items[:max_items]
-        
-        content = []
-
-        if message.ai_summary:
-            content.append([{"tag": "text", "text": _md_strip(message.ai_summary) + "\n\n"}])
-            content.append([{"tag": "text", "text": "─────────────\n\n"}])
-
-        # 合并推送：按平台分组显示
-        if message.source in ["digest", "combined", "ai_digest"]:
-            from collections import OrderedDict
-            grouped = OrderedDict()
-            for item in items:
-                if item.source not in grouped:
-                    grouped[item.source] = []
-                grouped[item.source].append(item)
-            
-            for source, source_items in grouped.items():
-                platform_name = source
-                if source_items and source_items[0].title.startswith("["):
-                    end_idx = source_items[0].title.find("]")
-                    if end_idx > 0:
-                        platform_name = source_items[0].title[1:end_idx]
-                
-                # 平台标题
-                content.append([{"tag": "text", "text": f"\n📌 {platform_name}\n"}])
-                
-                # 该平台的条目
-                for i, item in enumerate(source_items, 1):
-                    title = item.title
-                    if title.startswith("[") and "]" in title:
-                        title = title[title.find("]")+1:].strip()
-                    title = title[:50] + "..." if len(title) > 50 else title
-                    content.append([
-                        {"tag": "text", "text": f"{i}. "},
-                        {"tag": "a", "text": title, "href": item.url},
-                        {"tag": "text", "text": "\n"}
-                    ])
-        else:
-            for i, item in enumerate(items, 1):
-                content.append([
-                    {"tag": "text", "text": f"{i}. "},
-                    {"tag": "a", "text": item.title, "href": item.url},
-                    {"tag": "text", "text": "\n"}
-                ])
-        
-        return content
-
 
 class DingTalkPusher(BasePusher):
     """钉钉 Webhook 推送"""
@@ -473,10 +240,10 @@ class DingTalkPusher(BasePusher):
             return False
 
         # 钉钉 Markdown 消息
-        text = self._format_markdown(message)
+        text = render(message, "markdown")
 
         try:
-            async with httpx.AsyncClient() as client:
+            async with self.lease_client(self.webhook_url) as client:
                 response = await client.post(self.webhook_url, json={
                     "msgtype": "markdown",
                     "markdown": {
@@ -485,53 +252,12 @@ class DingTalkPusher(BasePusher):
                     }
                 })
                 response.raise_for_status()
-                logger.info("钉钉推送成功")
-                return True
+            logger.info("钉钉推送成功")
+            return True
         except Exception as e:
             logger.error(f"钉钉推送失败: {e}")
             return False
 
-    def _format_markdown(self, message: PushMessage) -> str:
-        max_items = 50 if message.source in ["digest", "combined", "ai_digest"] else 10
-        items = message.items[:max_items]
-        
-        lines = [f"### {message.title}\n"]
-
-        if message.ai_summary:
-            lines.append(message.ai_summary)
-            lines.append("\n---\n")
-
-        # 合并推送：按平台分组显示
-        if message.source in ["digest", "combined", "ai_digest"]:
-            from collections import OrderedDict
-            grouped = OrderedDict()
-            for item in items:
-                if item.source not in grouped:
-                    grouped[item.source] = []
-                grouped[item.source].append(item)
-            
-            for source, source_items in grouped.items():
-                # 从标题中提取平台名
-                platform_name = source
-                if source_items and source_items[0].title.startswith("["):
-                    end_idx = source_items[0].title.find("]")
-                    if end_idx > 0:
-                        platform_name = source_items[0].title[1:end_idx]
-                
-                lines.append(f"\n**📌 {platform_name}**\n")
-                for i, item in enumerate(source_items, 1):
-                    title = item.title
-                    if title.startswith("[") and "]" in title:
-                        title = title[title.find("]")+1:].strip()
-                    title = title[:50] + "..." if len(title) > 50 else title
-                    lines.append(f"{i}. [{title}]({item.url})")
-        else:
-            for i, item in enumerate(items, 1):
-                lines.append(f"{i}. [{item.title}]({item.url})")
-            lines.append(f"\n> 来源: {message.source}")
-        
-        return "\n".join(lines)
-
 
 class WebhookPusher(BasePusher):
     """通用 Webhook 推送"""
@@ -557,11 +283,11 @@ class WebhookPusher(BasePusher):
             if message.ai_summary:
                 payload["ai_summary"] = message.ai_summary
 
-            async with httpx.AsyncClient() as client:
+            async with self.lease_client(self.webhook_url) as client:
                 response = await client.post(self.webhook_url, json=payload)
                 response.raise_for_status()
-                logger.info("Webhook 推送成功")
-                return True
+            logger.info("Webhook 推送成功")
+            return True
         except Exception as e:
             logger.error(f"Webhook 推送失败: {e}")
             return False
@@ -591,129 +317,48 @@ class EmailPusher(BasePusher):
     def to_email(self) -> Optional[str]:
         return self._config.get("to_email")
 
+    @property
+    def recipients(self) -> List[str]:
+        """收件人列表（to_email 可填写多个地址，用逗号或分号分隔）"""
+        return parse_recipients(self.to_email)
+
     def is_configured(self) -> bool:
-        return bool(self.smtp_host and self.username and self.password and self.to_email)
+        return bool(self.smtp_host and self.username and self.password and self.recipients)
 
     async def push(self, message: PushMessage) -> bool:
         if not self.is_configured():
             return False
 
-        import smtplib
         from email.mime.text import MIMEText
         from email.mime.multipart import MIMEMultipart
 
         try:
             # 构建邮件内容
-            html_content = self._format_html(message)
+            html_content = render(message, "email")
+            recipients = self.recipients
 
             msg = MIMEMultipart("alternative")
             msg["Subject"] = message.title
             msg["From"] = self.username
-            msg["To"] = self.to_email
+            msg["To"] = ", ".join(recipients)
 
             # 添加 HTML 内容
             msg.attach(MIMEText(html_content, "html", "utf-8"))
 
-            # 发送邮件
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(self.username, self.to_email, msg.as_string())
+            # 发送邮件：在 SMTP 专用线程中执行并复用已认证的连接，所有收件人一次发送
+            refused = await smtp_sender.send(
+                self.smtp_host, self.smtp_port, self.username, self.password,
+                self.username, recipients, msg.as_string()
+            )
+            if refused:
+                logger.warning(f"部分收件人被拒绝: {', '.join(refused)}")
 
-            logger.info("邮件推送成功")
+            logger.info(f"邮件推送成功（{len(recipients) - len(refused)} 位收件人）")
             return True
         except Exception as e:
             logger.error(f"邮件推送失败: {e}")
             return False
 
-    def _format_source(self, source: str) -> str:
-        """格式化来源名称为中文"""
-        source_names = {
-            "digest": "每日摘要",
-            "ai_digest": "AI 智能摘要",
-            "test": "测试推送",
-            "combined": "聚合推送",
-            "weibo": "微博热搜",
-            "zhihu": "知乎热榜",
-            "bilibili": "B站热门",
-            "douyin": "抖音热榜",
-            "toutiao": "今日头条",
-        }
-        return source_names.get(source, source)
-
-    def _format_html(self, message: PushMessage) -> str:
-        """格式化 HTML 邮件"""
-        import html as html_module
-
-        max_items = 50 if message.source in ["digest", "combined", "ai_digest"] else 10
-        items = message.items[:max_items]
-
-        content_html = ""
-
-        if message.ai_summary:
-            summary_html = _md_to_email_html(message.ai_summary)
-            content_html += f'''
-            <div style="background: #fffbeb; border-left: 4px solid #f59e0b; padding: 15px; margin-bottom: 20px; border-radius: 0 8px 8px 0; line-height: 1.8;">
-                <div style="font-weight: bold; color: #92400e; margin-bottom: 8px;">🤖 AI 摘要</div>
-                <div style="color: #451a03;">{summary_html}</div>
-            </div>
-            <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 20px 0;">
-            '''
-
-        # 合并推送：按平台分组显示
-        if message.source in ["digest", "combined", "ai_digest"]:
-            from collections import OrderedDict
-            grouped = OrderedDict()
-            for item in items:
-                if item.source not in grouped:
-                    grouped[item.source] = []
-                grouped[item.source].append(item)
-            
-            for source, source_items in grouped.items():
-                # 从标题中提取平台名
-                platform_name = source
-                if source_items and source_items[0].title.startswith("["):
-                    end_idx = source_items[0].title.find("]")
-                    if end_idx > 0:
-                        platform_name = source_items[0].title[1:end_idx]
-                
-                # 平台标题
-                content_html += f'<h3 style="color: #d97706; margin: 20px 0 10px 0; padding-bottom: 8px; border-bottom: 2px solid #fef3c7; font-size: 16px;">📌 {platform_name}</h3>'
-                content_html += '<ol style="padding-left: 20px; margin: 0 0 15px 0;">'
-                
-                for item in source_items:
-                    # 去掉标题中的 [平台名] 前缀
-                    title = item.title
-                    if title.startswith("[") and "]" in title:
-                        title = title[title.find("]")+1:].strip()
-                    title = title[:70] + "..." if len(title) > 70 else title
-                    content_html += f'<li style="margin-bottom: 8px;"><a href="{item.url}" style="color: #374151; text-decoration: none;">{title}</a></li>'
-                
-                content_html += '</ol>'
-        else:
-            # 普通消息格式
-            content_html = '<ol style="padding-left: 20px; margin: 0;">'
-            for item in items:
-                title = item.title[:80] + "..." if len(item.title) > 80 else item.title
-                content_html += f'<li style="margin-bottom: 8px;"><a href="{item.url}" style="color: #d97706; text-decoration: none;">{title}</a></li>'
-            content_html += '</ol>'
-
-        return f"""
-        <html>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f5f5f5;">
-            <div style="background: linear-gradient(135deg, #f59e0b, #d97706); padding: 20px; border-radius: 12px 12px 0 0;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">{message.title}</h1>
-            </div>
-            <div style="background: white; padding: 20px; border-radius: 0 0 12px 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                {content_html}
-                <p style="color: #888; font-size: 12px; margin-top: 20px; padding-top: 15px; border-top: 1px solid #eee;">
-                    📍 来源: {self._format_source(message.source)} | 由 HotPush 推送
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-
 
 class PushService:
     """推送服务管理器"""
@@ -747,9 +392,14 @@ class PushService:
             logger.warning(f"加载推送配置失败，使用环境变量配置: {e}")
 
     def refresh_config(self):
-        """刷新配置（配置更新后调用）"""
+        """刷新配置（配置更新后调用），关闭目标地址或代理已变化的 HTTP 客户端"""
         self._load_config()
-        logger.info("推送配置已刷新")
+        active = {
+            pusher.client_key() for pusher in self.pushers.values()
+            if pusher.is_configured() and pusher.client_key()
+        }
+        closed = push_http_pool.retain(active)
+        logger.info(f"推送配置已刷新（关闭 {closed} 个 HTTP 客户端）" if closed else "推送配置已刷新")
 
     def get_configured_channels(self) -> List[PushChannel]:
         """获取已配置的推送渠道"""
@@ -765,13 +415,61 @@ class PushService:
             return await pusher.push(message)
         return False
 
-    async def push_to_all(self, message: PushMessage) -> dict:
-        """推送到所有已配置的渠道"""
+    async def push_to_channel_timed(self, channel: PushChannel, message: PushMessage) -> Dict[str, Any]:
+        """推送到单个渠道，限制超时并记录耗时，返回 {success, latency_ms, error}"""
+        timeout = settings.push_channel_timeout
+        error = None
+        start = time.perf_counter()
+        try:
+            success = await asyncio.wait_for(self.push_to_channel(channel, message), timeout)
+        except asyncio.TimeoutError:
+            success, error = False, f"推送超时（{timeout:g} 秒）"
+        except Exception as e:
+            success, error = False, str(e)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        if error:
+            logger.warning(f"[{channel.value}] {error}")
+        metrics.observe("push_latency_ms", latency_ms, channel=channel.value)
+        metrics.incr("push", channel=channel.value, result="success" if success else "failed")
+        return {"success": success, "latency_ms": round(latency_ms), "error": error}
+
+    async def push_to_all_detailed(self, message: PushMessage) -> Dict[str, Dict[str, Any]]:
+        """
+        并发推送到所有已配置的渠道，返回 {渠道: {success, latency_ms, error}}
+
+        每个渠道单独超时（push_channel_timeout），整体不超过 push_deadline，
+        超过总时限仍未完成的渠道会被取消并记为失败
+        """
+        channels = self.get_configured_channels()
+        if not channels:
+            return {}
+
+        deadline = settings.push_deadline
+        tasks = {channel: asyncio.ensure_future(self.push_to_channel_timed(channel, message)) for channel in channels}
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
         results = {}
-        for channel in self.get_configured_channels():
-            results[channel.value] = await self.push_to_channel(channel, message)
+        for channel, task in tasks.items():
+            if task in pending:
+                logger.warning(f"[{channel.value}] 超过推送总时限（{deadline:g} 秒），已取消")
+                metrics.incr("push", channel=channel.value, result="failed")
+                results[channel.value] = {
+                    "success": False,
+                    "latency_ms": round(deadline * 1000),
+                    "error": f"超过推送总时限（{deadline:g} 秒）",
+                }
+            else:
+                results[channel.value] = task.result()
         return results
 
+    async def push_to_all(self, message: PushMessage) -> Dict[str, bool]:
+        """并发推送到所有已配置的渠道，返回 {渠道: 是否成功}"""
+        results = await self.push_to_all_detailed(message)
+        return {channel: result["success"] for channel, result in results.items()}
+
 
 # 全局实例
 push_service = PushService()
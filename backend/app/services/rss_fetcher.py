@@ -4,21 +4,42 @@ RSS 抓取服务
 """
 import asyncio
 import hashlib
+import time
+import uuid
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 import httpx
 import feedparser
 from app.config import settings
 from app.models.schemas import HotItem, HotList
 from app.utils.sources import HOT_SOURCES, get_source_info
-from app.services.database import db
+from app.services.database import db, adb
 from app.services.cache import cache
+from app.services.dedup_store import dedup_store
+from app.services.http_pool import http_pool
+from app.services.feed_parser import feed_parser
+from app.services.stream_parser import StreamFeedParser, StreamParseError
+from app.services.instance_health import instance_health
+from app.services.local_cache import hotlist_cache
+from app.services.hotlist_payload import payload_registry
 from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+# 上游返回 304 Not Modified 时 fetch_feed 返回的 feed
+NOT_MODIFIED = object()
+# 响应体哈希与上次相同时 fetch_feed 返回的 feed
+CONTENT_UNCHANGED = object()
 
 
 class RSSFetcher:
     """RSS 抓取器"""
 
+    # 每个源最多保留的条目数
+    MAX_ITEMS = 50
+    # 等待其他进程抓取时轮询缓存的间隔（秒）
+    LOCK_POLL_INTERVAL = 0.2
+
     # 请求头，模拟浏览器
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -30,21 +51,111 @@ class RSSFetcher:
         self.instances = [u.rstrip('/') for u in settings.rsshub_instances]
         self.timeout = settings.fetch_timeout
         self.retry_count = settings.fetch_retry_count
+        # 各源的抓取状态（Redis 不可用时仅保存在内存中）
+        self._feed_states: Dict[str, dict] = {}
+        # 进程内正在进行的抓取（请求合并）
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background_tasks = set()
+
+    # ===== 增量抓取（条件请求 / 内容哈希） =====
+
+    def _get_feed_state(self, source_id: str) -> Optional[dict]:
+        """获取源的抓取状态，内存中没有时从 Redis 加载"""
+        state = self._feed_states.get(source_id)
+        if state is None:
+            state = cache.get_feed_state(source_id)
+            if state:
+                self._feed_states[source_id] = state
+        return state
+
+    async def _restore_feed_state(self, source_id: str, source_info: dict) -> Optional[dict]:
+        """
+        内存和 Redis 中都没有抓取状态时（如未启用 Redis 的进程重启后），
+        用 source_state 中的 ETag / 响应体哈希和最近一次快照重建状态，避免重新下载和解析未变化的内容
+        """
+        source_state = await adb.run(db.get_source_state, source_id)
+        if not source_state or not (source_state.get("last_etag") or source_state.get("last_hash")):
+            return None
+        snapshot = await adb.run(db.get_latest_snapshot, source_id)
+        if not snapshot:
+            return None
+        snapshot_time = snapshot["snapshot_time"]
+        if not isinstance(snapshot_time, datetime):
+            snapshot_time = datetime.fromisoformat(str(snapshot_time))
+        hot_list = HotList(
+            source=source_id,
+            source_name=source_info.get("name", source_id),
+            items=[
+                HotItem(id=row["item_id"], title=row["title"], url=row["url"] or "",
+                        hot_score=row["hot_score"], source=source_id)
+                for row in snapshot["items"]
+            ],
+            updated_at=snapshot_time,
+            icon=source_info.get("icon")
+        )
+        # 快照不含请求地址：RSSHub 的 ETag 由响应内容生成，任一实例都可用于条件请求
+        state = {
+            "url": None,
+            "etag": source_state.get("last_etag"),
+            "last_modified": None,
+            "body_hash": source_state.get("last_hash"),
+            "hotlist": self._to_cache_data(hot_list),
+        }
+        self._feed_states[source_id] = state
+        return state
+
+    def _save_feed_state(self, source_id: str, feed: feedparser.FeedParserDict, hot_list: HotList):
+        """保存本次响应的校验值、响应体哈希和热榜数据"""
+        state = {
+            "url": feed.get("href"),
+            "etag": feed.get("etag"),
+            "last_modified": feed.get("last_modified"),
+            "body_hash": feed.get("body_hash"),
+            "hotlist": self._to_cache_data(hot_list),
+        }
+        self._feed_states[source_id] = state
+        cache.set_feed_state(source_id, state, ttl=settings.feed_state_ttl)
+
+    def _build_headers(self, url: str, state: Optional[dict]) -> dict:
+        """构造请求头，请求地址与上次一致（或状态从数据库恢复）时附带条件请求头"""
+        headers = dict(self.HEADERS)
+        if state and state.get("url") in (url, None):
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    async def _request_feed(self, url: str, state: Optional[dict] = None, source_id: Optional[str] = None):
+        """
+        请求并解析 Feed
 
-    async def _fetch_from_instance(
-        self,
-        client: httpx.AsyncClient,
-        base_url: str,
-        route: str,
-        source_name: str = ""
-    ) -> Optional[feedparser.FeedParserDict]:
-        """从单个实例获取 Feed"""
-        url = f"{base_url}{route}"
+        Returns:
+            FeedParserDict（附带 href / etag / last_modified / body_hash）、
+            NOT_MODIFIED、CONTENT_UNCHANGED 或 None
+        """
+        source = source_id or "unknown"
         try:
-            response = await client.get(url, headers=self.HEADERS)
-            response.raise_for_status()
-            feed = feedparser.parse(response.text)
-            if feed.entries:
+            client = http_pool.get_client(url)
+            async with client.stream("GET", url, headers=self._build_headers(url, state)) as response:
+                if response.status_code == 304:
+                    return NOT_MODIFIED
+                response.raise_for_status()
+
+                if settings.feed_stream_parse:
+                    feed, body_hash = await self._parse_stream(response, source)
+                else:
+                    feed, body_hash = await self._parse_body(response, source, state)
+
+            # 很多上游不支持条件请求，内容与上次相同时同样跳过后续处理
+            if body_hash and state and state.get("body_hash") == body_hash:
+                return CONTENT_UNCHANGED
+
+            if feed is not None and feed.entries:
+                feed["href"] = url
+                feed["etag"] = response.headers.get("etag")
+                feed["last_modified"] = response.headers.get("last-modified")
+                feed["body_hash"] = body_hash
                 return feed
             return None
         except httpx.HTTPStatusError as e:
@@ -52,40 +163,248 @@ class RSSFetcher:
             return None
         except Exception as e:
             # 静默处理，在上层统一输出
+            http_pool.record_error(url)
             return None
 
-    async def fetch_feed(self, route: str, source_name: str = "") -> Optional[feedparser.FeedParserDict]:
+    async def _parse_body(self, response: httpx.Response, source: str, state: Optional[dict] = None):
+        """读取完整响应体后用 feedparser 解析，返回 (feed, 响应体哈希)"""
+        body = await response.aread()
+        body_hash = hashlib.md5(body).hexdigest()
+        if state and state.get("body_hash") == body_hash:
+            return None, body_hash
+        # 在解析池中执行，不阻塞事件循环
+        return await feed_parser.parse(response.text, source=source), body_hash
+
+    async def _parse_stream(self, response: httpx.Response, source: str):
+        """
+        边接收边解析，取满 MAX_ITEMS 条后停止读取，返回 (feed, 条目内容哈希)
+
+        内容无法增量解析时（非 UTF-8 编码、HTML 实体等）回退到 feedparser。这类错误通常出现在
+        第一个条目之前，因此只在解析出第一个条目前暂存已收到的数据，之后即丢弃；
+        此后才出错时重新请求完整内容。每个数据块的解析在解析池中执行，不阻塞事件循环，
+        并与完整解析共用解析池的在途任务上限
+        """
+        parser = StreamFeedParser(limit=self.MAX_ITEMS)
+        chunks = response.aiter_bytes()
+        buffered: Optional[list] = []
+        try:
+            async for chunk in chunks:
+                if buffered is not None:
+                    buffered.append(chunk)
+                if await feed_parser.run(parser.feed, chunk):
+                    break
+                if buffered is not None and parser.entries:
+                    buffered = None
+            else:
+                await feed_parser.run(parser.close)
+        except StreamParseError:
+            metrics.incr("feed_stream_fallback", source=source)
+            if buffered is not None:
+                async for chunk in chunks:
+                    buffered.append(chunk)
+                body = b"".join(buffered)
+                encoding = response.encoding
+            else:
+                metrics.incr("feed_stream_refetch", source=source)
+                url = str(response.request.url)
+                full = await http_pool.get_client(url).get(url, headers=self._build_headers(url, None))
+                full.raise_for_status()
+                body, encoding = full.content, full.encoding
+            text = body.decode(encoding or "utf-8", errors="replace")
+            return await feed_parser.parse(text, source=source), hashlib.md5(body).hexdigest()
+
+        metrics.observe("feed_parse_ms", parser.parse_time * 1000, source=source)
+        return parser.result(), parser.content_hash()
+
+    async def _fetch_from_instance(
+        self,
+        base_url: str,
+        route: str,
+        source_name: str = "",
+        state: Optional[dict] = None,
+        source_id: Optional[str] = None
+    ):
+        """从单个实例获取 Feed"""
+        return await self._request_feed(f"{base_url}{route}", state, source_id)
+
+    async def fetch_feed(
+        self,
+        route: str,
+        source_name: str = "",
+        state: Optional[dict] = None,
+        source_id: Optional[str] = None
+    ):
         """
         获取 RSS Feed（支持多实例容错）
 
-        依次尝试所有配置的 RSSHub 实例，直到成功获取数据
+        按实例健康度依次尝试 RSSHub 实例，直到成功获取数据（开启对冲请求时见 _fetch_hedged）
         如果 route 是完整 URL（以 http:// 或 https:// 开头），则直接请求
+        传入 state 时发送条件请求，上游返回 304 时 feed 为 NOT_MODIFIED，
+        响应体与上次相同时 feed 为 CONTENT_UNCHANGED
         """
         display_name = source_name or route
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            # 如果是完整 URL，直接请求
-            if route.startswith("http://") or route.startswith("https://"):
-                try:
-                    response = await client.get(route, headers=self.HEADERS)
-                    response.raise_for_status()
-                    feed = feedparser.parse(response.text)
-                    if feed.entries:
-                        return feed, route
-                except Exception:
-                    pass
-                return None, None
-
-            # 否则使用 RSSHub 实例
-            for instance in self.instances:
-                feed = await self._fetch_from_instance(client, instance, route, source_name)
-                if feed:
-                    return feed, instance  # 返回 feed 和成功的实例
-
-            # 所有实例都失败
+        # 如果是完整 URL，直接请求
+        if route.startswith("http://") or route.startswith("https://"):
+            feed = await self._request_feed(route, state, source_id)
+            if feed is not None:
+                return feed, route
             return None, None
 
+        # 按实例健康度决定请求顺序（需要 Cookie 的源固定优先使用上次成功的实例）
+        await instance_health.sync(self.instances)
+        instances = instance_health.route(self.instances, source_id)
+        if not instances:
+            # 所有实例都处于熔断状态：不再请求，由调用方使用缓存数据
+            metrics.incr("feed_fetch", source=source_id or "unknown", result="all_open")
+            logger.warning(f"[{display_name}] 所有 RSSHub 实例均已熔断，跳过请求")
+            return None, None
+
+        # 多实例时对冲请求：主实例迟迟不返回时并行请求下一个实例
+        if settings.fetch_hedge_enabled and len(instances) > 1:
+            return await self._fetch_hedged(instances, route, source_name, state, source_id)
+
+        # 否则依次使用 RSSHub 实例（共享连接池，复用连接）
+        for instance in instances:
+            feed = await self._timed_fetch(instance, route, source_name, state, source_id)
+            if feed is not None:
+                return feed, instance  # 返回 feed 和成功的实例
+
+        # 所有实例都失败
+        return None, None
+
+    # ===== 对冲请求 =====
+
+    async def _timed_fetch(
+        self,
+        instance: str,
+        route: str,
+        source_name: str = "",
+        state: Optional[dict] = None,
+        source_id: Optional[str] = None
+    ):
+        """
+        请求单个实例，并记录结果到实例健康度（被取消的对冲请求不记录）
+
+        半开实例已有试探请求在进行时跳过该实例，返回 None
+        """
+        probe = instance_health.is_half_open(instance)
+        if probe and not instance_health.acquire_probe(instance):
+            logger.debug(f"[{source_name or route}] {instance} 正在半开试探，跳过")
+            return None
+        try:
+            start = time.perf_counter()
+            feed = await self._fetch_from_instance(instance, route, source_name, state, source_id)
+            if feed is not None:
+                instance_health.record_success(instance, time.perf_counter() - start, source_id)
+            else:
+                instance_health.record_failure(instance, f"{route} 请求失败或内容为空")
+            return feed
+        finally:
+            if probe:
+                instance_health.release_probe(instance)
+
+    def _hedge_delay(self, instance: str) -> float:
+        """对冲等待时间：取该实例近期成功请求耗时的 p95，样本不足时使用默认值"""
+        return instance_health.hedge_delay(
+            instance,
+            default=settings.fetch_hedge_default_delay,
+            minimum=settings.fetch_hedge_min_delay,
+            maximum=settings.fetch_hedge_max_delay,
+        )
+
+    async def _fetch_hedged(
+        self,
+        instances: List[str],
+        route: str,
+        source_name: str = "",
+        state: Optional[dict] = None,
+        source_id: Optional[str] = None
+    ):
+        """
+        对冲请求多个实例
+
+        先请求第一个实例；超过其 p95 耗时仍未返回时再请求下一个实例，
+        某个实例失败时立即请求下一个。取最先返回有效结果的实例，其余请求取消。
+        """
+        remaining = list(instances)
+        pending: Dict[asyncio.Task, str] = {}
+        last_started = None
+
+        def start_next():
+            nonlocal last_started
+            instance = remaining.pop(0)
+            task = asyncio.create_task(self._timed_fetch(instance, route, source_name, state, source_id))
+            pending[task] = instance
+            last_started = instance
+            if len(pending) > 1:
+                metrics.incr("feed_hedge", result="launched")
+
+        start_next()
+        try:
+            while pending:
+                timeout = self._hedge_delay(last_started) if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.debug(f"[{source_name or route}] {last_started} 响应慢，并行请求下一个实例")
+                    start_next()
+                    continue
+
+                for task in done:
+                    instance = pending.pop(task)
+                    feed = task.result()
+                    if feed is not None:
+                        if instance != instances[0]:
+                            metrics.incr("feed_hedge", result="fallback_won")
+                        return feed, instance
+
+                # 已返回的实例都失败了，立即请求下一个
+                if remaining:
+                    start_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return None, None
+
+    def _to_cache_data(self, hot_list: HotList) -> dict:
+        """热榜转换为可缓存的字典"""
+        return {
+            "source": hot_list.source,
+            "source_name": hot_list.source_name,
+            "items": [item.model_dump(mode="json") for item in hot_list.items],
+            "updated_at": hot_list.updated_at.isoformat() if hot_list.updated_at else None,
+            "icon": hot_list.icon
+        }
+
+    def _from_cache_data(self, data: dict) -> HotList:
+        """从缓存字典重建热榜"""
+        return HotList(
+            source=data.get("source"),
+            source_name=data.get("source_name"),
+            items=[HotItem(**item) for item in data.get("items", [])],
+            updated_at=datetime.fromisoformat(data.get("updated_at")) if data.get("updated_at") else datetime.now(),
+            icon=data.get("icon")
+        )
+
+    def _is_unchanged(self, feed) -> bool:
+        return feed is NOT_MODIFIED or feed is CONTENT_UNCHANGED
+
+    def _unchanged_hot_list(self, source_id: str, source_name: str, feed, state: dict) -> HotList:
+        """内容未变化时复用上次的热榜数据"""
+        reason = "not_modified" if feed is NOT_MODIFIED else "content_unchanged"
+        metrics.incr("feed_fetch", source=source_id, result=reason)
+        logger.info(f"[{source_name}] 内容未变化（{'304' if feed is NOT_MODIFIED else '哈希相同'}），跳过解析")
+        hot_list = self._from_cache_data(state["hotlist"])
+        hot_list.unchanged = True
+        return hot_list
+
     async def fetch_custom_source(self, source_config: dict) -> Optional[HotList]:
-        """获取自定义数据源"""
+        """获取自定义数据源（同一源的并发请求共享一次抓取）"""
+        key = f"custom:{source_config.get('id')}"
+        return await self._single_flight(key, lambda: self._fetch_custom_source(source_config))
+
+    async def _fetch_custom_source(self, source_config: dict) -> Optional[HotList]:
+        """从上游抓取自定义数据源"""
         source_id = source_config.get("id")
         source_name = source_config.get("name", source_id)
         url = source_config.get("url")
@@ -94,21 +413,21 @@ class RSSFetcher:
             logger.warning(f"自定义源 {source_id} 没有配置 URL")
             return None
 
-        result = await self.fetch_feed(url, source_name)
+        state = self._get_feed_state(source_id)
+        feed, instance = await self.fetch_feed(url, source_name, state, source_id)
 
-        if isinstance(result, tuple):
-            feed, instance = result
-        else:
-            feed, instance = result, None
+        if self._is_unchanged(feed):
+            return self._unchanged_hot_list(source_id, source_name, feed, state)
 
         if not feed or not feed.entries:
             logger.error(f"[{source_name}] 获取失败")
             return None
 
         logger.info(f"[{source_name}] 获取成功，共 {len(feed.entries)} 条")
+        metrics.incr("feed_fetch", source=source_id, result="parsed")
 
         items = []
-        for entry in feed.entries[:50]:
+        for entry in feed.entries[:self.MAX_ITEMS]:
             item_id = hashlib.md5(
                 f"{source_id}:{entry.get('link', entry.get('title', ''))}".encode()
             ).hexdigest()[:12]
@@ -129,46 +448,164 @@ class RSSFetcher:
             )
             items.append(item)
 
-        return HotList(
+        hot_list = HotList(
             source=source_id,
             source_name=source_name,
             items=items,
             updated_at=datetime.now(),
             icon=source_config.get("icon")
         )
+        self._save_feed_state(source_id, feed, hot_list)
+        payload_registry.get(hot_list)
+        return hot_list
+
+    async def fetch_hot_list(
+        self,
+        source_id: str,
+        use_cache: bool = True,
+        allow_stale: bool = True
+    ) -> Optional[HotList]:
+        """
+        获取指定源的热榜
 
-    async def fetch_hot_list(self, source_id: str, use_cache: bool = True) -> Optional[HotList]:
-        """获取指定源的热榜"""
+        缓存未超过软过期时间（redis_cache_ttl）时直接返回；超过软过期但未超过硬过期时间
+        （redis_cache_stale_ttl）时立即返回旧数据并在后台刷新（allow_stale=False 时同步抓取）。
+        返回数据的 updated_at 为实际抓取时间，客户端据此判断数据新旧。
+        """
         source_info = get_source_info(source_id)
         if not source_info:
             logger.warning(f"未知的源: {source_id}")
             return None
 
         source_name = source_info.get("name", source_id)
-        
-        # 尝试从 Redis 缓存获取
+
+        def fetch():
+            # 同一源的并发请求共享一次抓取
+            return self._single_flight(source_id, lambda: self._fetch_hot_list_locked(source_id, source_info))
+
+        # 尝试从缓存获取：先查进程内缓存，再查 Redis
         if use_cache and cache.is_available():
+            hot_list = hotlist_cache.get(source_id, max_age=settings.redis_cache_ttl)
+            if hot_list is not None:
+                metrics.incr("hotlist_cache", source=source_id, result="local_hit")
+                return hot_list
+
             cached_data = cache.get_hotlist(source_id)
             if cached_data:
-                logger.debug(f"[{source_name}] 命中缓存")
-                # 从缓存重建 HotList 对象
-                items = [HotItem(**item) for item in cached_data.get("items", [])]
-                return HotList(
-                    source=cached_data.get("source"),
-                    source_name=cached_data.get("source_name"),
-                    items=items,
-                    updated_at=datetime.fromisoformat(cached_data.get("updated_at")) if cached_data.get("updated_at") else datetime.now(),
-                    icon=cached_data.get("icon")
-                )
-        
-        route = source_info.get("route")
-        result = await self.fetch_feed(route, source_name)
+                age = time.time() - cached_data.get("cached_at", 0)
+                if age < settings.redis_cache_ttl:
+                    metrics.incr("hotlist_cache", source=source_id, result="hit")
+                    logger.debug(f"[{source_name}] 命中缓存")
+                    # 从缓存重建 HotList 对象，并放入进程内缓存
+                    hot_list = self._from_cache_data(cached_data)
+                    hotlist_cache.set(source_id, hot_list, cached_data.get("cached_at"))
+                    return hot_list
+                if allow_stale:
+                    metrics.incr("hotlist_cache", source=source_id, result="stale")
+                    logger.debug(f"[{source_name}] 缓存已过期 {int(age)} 秒，返回旧数据并后台刷新")
+                    self._refresh_in_background(source_id, fetch)
+                    return self._from_cache_data(cached_data)
+
+        metrics.incr("hotlist_cache", source=source_id, result="miss")
+        return await fetch()
+
+    def _refresh_in_background(self, source_id: str, fetch):
+        """后台刷新缓存，同一源正在抓取时不重复发起"""
+        if source_id in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await fetch()
+            except Exception as e:
+                logger.warning(f"[{source_id}] 后台刷新失败: {e}")
+
+        task = asyncio.ensure_future(refresh())
+        # 保留引用，避免任务被垃圾回收
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _set_cached_hotlist(self, source_id: str, hot_list: HotList, data: dict):
+        """写入 Redis 和进程内缓存，记录写入时间用于判断软过期；Redis 键在硬过期时间后删除"""
+        cached_at = time.time()
+        cache.set_hotlist(
+            source_id,
+            {**data, "cached_at": cached_at},
+            ttl=max(settings.redis_cache_stale_ttl, settings.redis_cache_ttl)
+        )
+        hotlist_cache.set(source_id, hot_list, cached_at)
 
-        # 处理返回值
-        if isinstance(result, tuple):
-            feed, instance = result
+    # ===== 请求合并 =====
+
+    async def _single_flight(self, key: str, factory):
+        """进程内请求合并：同一 key 正在抓取时，后来的调用方等待同一结果"""
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr("fetch_coalesced", source=key, scope="process")
         else:
-            feed, instance = result, None
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield：某个调用方被取消（如客户端断开）时不影响其他等待者
+        return await asyncio.shield(task)
+
+    def _lock_ttl(self) -> int:
+        return settings.fetch_timeout * 2
+
+    async def _fetch_hot_list_locked(self, source_id: str, source_info: dict) -> Optional[HotList]:
+        """跨进程请求合并：通过 Redis 抓取锁保证同一时间只有一个进程抓取该源"""
+        token = None
+        if cache.is_available():
+            token = uuid.uuid4().hex
+            if not cache.acquire_fetch_lock(source_id, ttl=self._lock_ttl(), token=token):
+                metrics.incr("fetch_coalesced", source=source_id, scope="redis")
+                hot_list = await self._wait_for_peer_fetch(source_id)
+                if hot_list is not None:
+                    return hot_list
+                # 其他进程抓取失败或超时，自行抓取
+                if not cache.acquire_fetch_lock(source_id, ttl=self._lock_ttl(), token=token):
+                    token = None
+        try:
+            return await self._fetch_hot_list(source_id, source_info)
+        finally:
+            if token:
+                cache.release_fetch_lock(source_id, token)
+
+    async def _wait_for_peer_fetch(self, source_id: str) -> Optional[HotList]:
+        """等待其他进程抓取完成，轮询 Redis 缓存获取新结果"""
+        before = cache.get_hotlist(source_id)
+        before_cached = before.get("cached_at") if before else None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._lock_ttl()
+
+        while loop.time() < deadline:
+            await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+            data = cache.get_hotlist(source_id)
+            if data and data.get("cached_at") != before_cached:
+                return self._from_cache_data(data)
+            if not cache.is_fetch_locked(source_id):
+                # 锁已释放：缓存未刷新说明对方抓取失败
+                data = cache.get_hotlist(source_id)
+                if data and data.get("cached_at") != before_cached:
+                    return self._from_cache_data(data)
+                return None
+        return None
+
+    async def _fetch_hot_list(self, source_id: str, source_info: dict) -> Optional[HotList]:
+        """从上游抓取热榜，保存快照并写入缓存"""
+        source_name = source_info.get("name", source_id)
+        route = source_info.get("route")
+        state = self._get_feed_state(source_id) or await self._restore_feed_state(source_id, source_info)
+        feed, instance = await self.fetch_feed(route, source_name, state, source_id)
+
+        # 内容未变化：跳过解析和快照，仅刷新缓存
+        if self._is_unchanged(feed):
+            hot_list = self._unchanged_hot_list(source_id, source_name, feed, state)
+            if cache.is_available():
+                self._set_cached_hotlist(
+                    source_id, hot_list.model_copy(update={"unchanged": False}), state["hotlist"]
+                )
+            return hot_list
 
         if not feed or not feed.entries:
             logger.error(f"[{source_name}] 获取失败")
@@ -178,9 +615,10 @@ class RSSFetcher:
         
         # 更新抓取统计
         cache.incr_fetch_count(source_id)
+        metrics.incr("feed_fetch", source=source_id, result="parsed")
 
         items = []
-        for entry in feed.entries[:50]:  # 最多取50条
+        for entry in feed.entries[:self.MAX_ITEMS]:  # 最多取 MAX_ITEMS 条
             # 生成唯一 ID
             item_id = hashlib.md5(
                 f"{source_id}:{entry.get('link', entry.get('title', ''))}".encode()
@@ -218,20 +656,19 @@ class RSSFetcher:
 
         # 保存排名快照（用于趋势分析）
         try:
-            db.save_snapshot(source_id, items)
+            await adb.save_snapshot(source_id, items)
         except Exception as e:
             logger.warning(f"[{source_name}] 保存快照失败: {e}")
         
-        # 写入 Redis 缓存
+        # 写入缓存，并通知其他进程丢弃旧的进程内缓存；无 Redis 时也生成一次预序列化结果
         if cache.is_available():
-            cache_data = {
-                "source": hot_list.source,
-                "source_name": hot_list.source_name,
-                "items": [item.model_dump(mode="json") for item in hot_list.items],
-                "updated_at": hot_list.updated_at.isoformat() if hot_list.updated_at else None,
-                "icon": hot_list.icon
-            }
-            cache.set_hotlist(source_id, cache_data, ttl=settings.redis_cache_ttl)
+            self._set_cached_hotlist(source_id, hot_list, self._to_cache_data(hot_list))
+            hotlist_cache.publish_invalidation(source_id)
+        else:
+            payload_registry.get(hot_list)
+
+        # 记录校验值和内容哈希，下次抓取据此跳过未变化的内容
+        self._save_feed_state(source_id, feed, hot_list)
         
         return hot_list
 
@@ -254,7 +691,8 @@ class RSSFetcher:
     async def fetch_all_hot_lists(
         self,
         source_ids: List[str] = None,
-        concurrency: int = 5
+        concurrency: int = 5,
+        allow_stale: bool = True
     ) -> List[HotList]:
         """
         批量并发获取热榜
@@ -262,6 +700,7 @@ class RSSFetcher:
         Args:
             source_ids: 要抓取的源 ID 列表，为 None 时抓取全部
             concurrency: 并发数限制，避免请求过多被限流
+            allow_stale: 是否允许返回软过期的缓存（定时任务需要最新数据时传 False）
 
         Returns:
             成功获取的热榜列表
@@ -274,7 +713,7 @@ class RSSFetcher:
 
         async def fetch_with_limit(source_id: str) -> Optional[HotList]:
             async with semaphore:
-                return await self.fetch_hot_list(source_id)
+                return await self.fetch_hot_list(source_id, allow_stale=allow_stale)
 
         # 并发执行所有抓取任务
         tasks = [fetch_with_limit(sid) for sid in source_ids]
@@ -292,33 +731,19 @@ class RSSFetcher:
 
     def get_new_items(self, source_id: str, items: List[HotItem]) -> Tuple[List[HotItem], bool]:
         """
-        检测新增条目（优先使用 Redis，MySQL 作为备份）
+        检测新增条目（优先使用 Redis，数据库作为精确记录）
 
         Returns:
             Tuple[List[HotItem], bool]: (新增条目列表, 是否为首次抓取)
         """
-        # 检查是否首次抓取该源
-        is_first = db.is_first_fetch(source_id)
-
-        # 获取已推送的 ID（优先从 Redis 获取，否则从 MySQL）
-        if cache.is_available():
-            pushed_ids = cache.get_pushed_item_ids(source_id)
-            # 如果 Redis 为空但不是首次抓取，从 MySQL 加载
-            if not pushed_ids and not is_first:
-                pushed_ids = db.get_pushed_item_ids(source_id)
-                # 同步到 Redis
-                if pushed_ids:
-                    cache.mark_items_pushed(source_id, list(pushed_ids))
-        else:
-            pushed_ids = db.get_pushed_item_ids(source_id)
-
-        new_items = []
-        for item in items:
-            if item.id not in pushed_ids:
-                new_items.append(item)
+        # 只检查本次的候选 ID（Redis 中的 Bloom 过滤器，不可用时查数据库，同时判断是否首次抓取）
+        unpushed, is_first = dedup_store.filter_unpushed(source_id, [item.id for item in items])
+        unpushed_ids = set(unpushed)
+        new_items = [item for item in items if item.id in unpushed_ids]
 
-        # 记录本次抓取
-        db.record_fetch(source_id, len(items))
+        # 记录本次抓取（响应体哈希和 ETag 一并保存到源状态）
+        feed_state = self._feed_states.get(source_id) or {}
+        db.record_fetch(source_id, len(items), feed_state.get("body_hash"), feed_state.get("etag"))
 
         # 首次抓取时，将所有条目标记为已推送（避免全量推送）
         if is_first and items:
@@ -329,16 +754,7 @@ class RSSFetcher:
 
     def mark_as_pushed(self, source_id: str, items: List[HotItem]):
         """将条目标记为已推送（同时写入 Redis 和 MySQL）"""
-        if not items:
-            return
-        
-        # 写入 MySQL（持久化）
-        db.mark_items_pushed(source_id, items)
-        
-        # 写入 Redis（快速查询）
-        if cache.is_available():
-            item_ids = [item.id for item in items]
-            cache.mark_items_pushed(source_id, item_ids)
+        dedup_store.mark_pushed(source_id, items)
 
 
 # 全局实例
@@ -0,0 +1,258 @@
+"""
+推送规则匹配
+将启用的推送规则编译为匹配器：关键词较少时合并为按前缀树生成的单个正则，较多时使用 Aho-Corasick 自动机，
+每个标题只转换一次小写、每条规则只扫描一次；编译结果缓存到规则被增删改为止
+"""
+import re
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable, Pattern
+
+from app.models.schemas import HotItem
+from app.services.cache import cache
+from app.services.database import adb
+from app.utils.logger import logger
+
+
+# 跨进程失效通知频道（规则在其他进程中被修改时清除编译缓存）
+INVALIDATE_CHANNEL = "push_rules:invalidate"
+
+# 关键词数超过该值时使用 Aho-Corasick（正则的分支在每个位置逐一尝试，关键词很多时反而更慢）
+AHO_CORASICK_THRESHOLD = 200
+
+
+def build_trie_pattern(words: Iterable[str]) -> Optional[str]:
+    """
+    将关键词集合编译为等价于「包含任一关键词」的正则
+
+    共享前缀的关键词合并到同一分支（如 苹果 / 苹果手机 → 苹果），
+    一个关键词是另一个的前缀时只保留较短的，匹配时无需回溯尝试每个关键词
+    """
+    trie: Dict[str, Any] = {}
+    for word in sorted(set(words), key=len):
+        node = trie
+        for ch in word:
+            if "" in node:
+                break
+            node = node.setdefault(ch, {})
+        else:
+            node.clear()
+            node[""] = True
+    if not trie:
+        return None
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = []
+        chars = []
+        for ch in sorted(node):
+            child = node[ch]
+            if "" in child:
+                chars.append(re.escape(ch))
+            else:
+                branches.append(re.escape(ch) + build(child))
+        if chars:
+            branches.append(chars[0] if len(chars) == 1 else "[" + "".join(chars) + "]")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class AhoCorasick:
+    """Aho-Corasick 自动机，只判断文本是否包含任一关键词（扫描一遍文本，与关键词数量无关）"""
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[bool] = [False]
+        for word in sorted(set(words), key=len):
+            state = 0
+            for ch in word:
+                # 已有更短的关键词是其前缀，无需再插入
+                if self._out[state]:
+                    break
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._out.append(False)
+                    self._goto[state][ch] = nxt
+                state = nxt
+            else:
+                self._out[state] = True
+        self._fail = [0] * len(self._goto)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt] = out[nxt] or out[fail[nxt]]
+
+    def search(self, text: str) -> bool:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                return True
+        return False
+
+
+class KeywordMatcher:
+    """关键词集合匹配器（不区分大小写，调用方传入已转小写的文本）"""
+
+    def __init__(self, keywords: Iterable[str], use_automaton: Optional[bool] = None):
+        keywords = [str(kw).lower() for kw in keywords]
+        # 空关键词与任何标题都匹配（与 `"" in title` 一致）
+        self.match_all = "" in keywords
+        self.size = len(keywords)
+        if use_automaton is None:
+            use_automaton = self.size > AHO_CORASICK_THRESHOLD
+        self._search = None
+        if self.match_all or not keywords:
+            return
+        if use_automaton:
+            self._search = AhoCorasick(keywords).search
+        else:
+            regex: Pattern = re.compile(build_trie_pattern(keywords))
+            self._search = lambda text: regex.search(text) is not None
+
+    def search(self, lowered: str) -> bool:
+        if self.match_all:
+            return True
+        return self._search is not None and self._search(lowered)
+
+
+class CompiledRules:
+    """
+    编译后的推送规则
+
+    - keyword_include：每条规则一个匹配器，条目需满足所有规则（规则内任一关键词即可）
+    - keyword_exclude：所有规则的关键词合并为一个匹配器
+    - time_range / source_filter：与条目无关，每次过滤时按当前时间和来源判断
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.includes: List[KeywordMatcher] = []
+        exclude_keywords: List[str] = []
+        self.time_ranges: List[Dict[str, Any]] = []
+        self.source_filters: List[Dict[str, Any]] = []
+
+        for rule in rules:
+            rule_type = rule["rule_type"]
+            config = rule["rule_config"]
+            if rule_type == "keyword_include":
+                self.includes.append(KeywordMatcher(config.get("keywords", [])))
+            elif rule_type == "keyword_exclude":
+                exclude_keywords.extend(config.get("keywords", []))
+            elif rule_type == "time_range":
+                self.time_ranges.append(config)
+            elif rule_type == "source_filter":
+                self.source_filters.append(config)
+
+        self.exclude = KeywordMatcher(exclude_keywords) if exclude_keywords else None
+
+    def _time_allowed(self, now: datetime) -> bool:
+        current_hour = now.hour
+        current_weekday = now.isoweekday()  # 1=Monday, 7=Sunday
+        for config in self.time_ranges:
+            weekdays = config.get("weekdays", [])
+            if weekdays and current_weekday not in weekdays:
+                return False
+
+            start_hour = config.get("start_hour", 0)
+            end_hour = config.get("end_hour", 23)
+            if start_hour <= end_hour:
+                if not (start_hour <= current_hour <= end_hour):
+                    return False
+            # 跨越午夜的情况
+            elif not (current_hour >= start_hour or current_hour <= end_hour):
+                return False
+        return True
+
+    def _source_allowed(self, source: str) -> bool:
+        for config in self.source_filters:
+            sources_list = config.get("sources", [])
+            mode = config.get("mode", "include")
+            if mode == "include" and source not in sources_list:
+                return False
+            if mode == "exclude" and source in sources_list:
+                return False
+        return True
+
+    def filter(self, items: List[HotItem], source: str, now: Optional[datetime] = None) -> List[HotItem]:
+        """返回满足所有规则的条目"""
+        if not self.rules:
+            return items
+        if not self._source_allowed(source) or not self._time_allowed(now or datetime.now()):
+            return []
+        if not self.includes and self.exclude is None:
+            return items
+
+        result = []
+        for item in items:
+            title = item.title.lower()
+            if self.exclude is not None and self.exclude.search(title):
+                continue
+            if all(matcher.search(title) for matcher in self.includes):
+                result.append(item)
+        return result
+
+
+class PushRuleCache:
+    """启用规则的编译缓存：规则增删改后失效，下次使用时从数据库重新加载并编译"""
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._compiled: Optional[CompiledRules] = None
+        self._version = 0
+        self._subscriber = None
+
+    async def get(self) -> CompiledRules:
+        while self._compiled is None:
+            version = self._version
+            rules = await adb.get_enabled_push_rules()
+            # 关键词较多时编译耗时较长，放到数据库线程池中执行
+            compiled = await adb.run(CompiledRules, rules)
+            # 加载期间规则又被修改时重新加载
+            if version == self._version:
+                self._compiled = compiled
+                logger.debug(f"推送规则已编译（{len(rules)} 条）")
+        return self._compiled
+
+    def invalidate(self, publish: bool = True):
+        """清除编译缓存；publish 为 True 时通知其他进程"""
+        self._version += 1
+        self._compiled = None
+        if publish:
+            cache.publish(INVALIDATE_CHANNEL, {"origin": self.worker_id})
+
+    def _on_message(self, message: Dict[str, Any]):
+        if message.get("origin") != self.worker_id:
+            self.invalidate(publish=False)
+
+    def start(self):
+        """订阅其他进程的失效通知"""
+        if self._subscriber is None:
+            self._subscriber = cache.subscribe(INVALIDATE_CHANNEL, self._on_message)
+
+    def stop(self):
+        if self._subscriber is not None:
+            self._subscriber.stop()
+            self._subscriber = None
+        self._compiled = None
+
+
+# 全局实例
+push_rule_cache = PushRuleCache()
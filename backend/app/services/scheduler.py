@@ -3,21 +3,25 @@
 负责定时抓取热榜并推送，支持动态配置和状态管理
 支持定时摘要功能
 """
+import hashlib
 import json
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from app.config import settings
 from app.services.rss_fetcher import rss_fetcher
 from app.services.push_service import push_service
-from app.services.database import db
-from app.models.schemas import PushMessage, HotItem
+from app.services.push_queue import push_queue
+from app.services.rule_matcher import push_rule_cache
+from app.services.database import db, adb
+from app.models.schemas import PushMessage, HotItem, HotList
 from app.utils.sources import HOT_SOURCES
 from app.services.config_service import config_service
 from app.services.ai_service import ai_service
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 
 
 # 默认摘要配置
@@ -40,6 +44,8 @@ class SchedulerService:
         self._last_run_result = None
         self._last_digest_run = None
         self._last_digest_result = None
+        # 各源上次已检测新增的热榜版本（updated_at），用于跳过未变化的源
+        self._processed_versions: Dict[str, datetime] = {}
 
     def get_status(self) -> dict:
         """获取调度器状态"""
@@ -171,6 +177,7 @@ class SchedulerService:
         self.scheduler.add_job(
             self._digest_job,
             trigger=CronTrigger(hour=hour, minute=minute, day_of_week=cron_days),
+            kwargs={"scheduled_time": f"{hour:02d}:{minute:02d}"},
             id=job_id,
             name="每日热榜摘要",
             replace_existing=True
@@ -181,17 +188,18 @@ class SchedulerService:
         """手动触发一次摘要推送"""
         await self._digest_job(is_test=is_test)
 
-    async def _digest_job(self, is_test: bool = False):
+    async def _digest_job(self, is_test: bool = False, scheduled_time: Optional[str] = None):
         """执行摘要推送任务
         
         Args:
             is_test: 是否为测试模式，测试模式下每个源只取2条，最多20条
+            scheduled_time: 定时任务的计划时间（HH:MM），用于入队去重
         """
         logger.info(f"开始生成热榜摘要...{'（测试模式）' if is_test else ''}")
         self._last_digest_run = datetime.now()
         
         try:
-            config = self.get_digest_config()
+            config = await adb.run(self.get_digest_config)
             
             # 定时任务才检查星期，手动触发不检查
             if not is_test:
@@ -215,7 +223,7 @@ class SchedulerService:
             top_n = 2 if is_test else config.get("top_n", 10)
             
             # 抓取所有热榜
-            hot_lists = await rss_fetcher.fetch_all_hot_lists(source_ids=list(HOT_SOURCES.keys()))
+            hot_lists = await rss_fetcher.fetch_all_hot_lists(source_ids=list(HOT_SOURCES.keys()), allow_stale=False)
             
             # 过滤源
             if source_filter:
@@ -227,7 +235,7 @@ class SchedulerService:
                 return
             
             # 尝试生成 AI 摘要
-            ai_config = ai_service.get_config()
+            ai_config = await adb.run(ai_service.get_config)
             ai_summary = None
             if ai_config.get("enabled"):
                 style = ai_config.get("summary_style", "brief")
@@ -268,25 +276,17 @@ class SchedulerService:
                 ai_summary=ai_summary,
             )
             
-            # 推送
-            results = await push_service.push_to_all(message)
-            
-            # 记录历史
-            success_count = sum(1 for s in results.values() if s)
-            for channel, success in results.items():
-                db.add_push_history(
-                    channel=channel,
-                    source="digest",
-                    title=message.title,
-                    item_count=len(digest_items),
-                    status="success" if success else "failed"
-                )
+            # 写入推送队列（同一天同一计划时间的正式摘要只入队一次），由后台 worker 发送并记录历史
+            now = datetime.now()
+            key = None if is_test else f"digest:{now.strftime('%Y-%m-%d')}:{scheduled_time or now.strftime('%H:%M')}"
+            queued = await adb.run(self._enqueue_push, message, key)
+            push_queue.notify()
             
             self._last_digest_result = {
                 "success": True,
                 "sources_count": len(hot_lists),
                 "items_count": len(digest_items),
-                "channels_success": success_count,
+                "channels_queued": len(queued),
                 "ai_summary": bool(ai_summary),
             }
             logger.info(f"摘要推送完成: {len(hot_lists)} 个源，{len(digest_items)} 条内容")
@@ -307,10 +307,10 @@ class SchedulerService:
                 logger.warning("未配置任何推送渠道，跳过推送")
 
             # 获取用户选择的推送数据源
-            push_source_filter = config_service.get_push_sources()
+            push_source_filter = await adb.run(config_service.get_push_sources)
 
             # 获取自定义数据源
-            custom_sources = db.get_all_custom_sources()
+            custom_sources = await adb.get_all_custom_sources()
             custom_source_ids = [s["id"] for s in custom_sources if s["enabled"]]
 
             # 确定要抓取的内置数据源
@@ -324,7 +324,7 @@ class SchedulerService:
             all_source_ids = builtin_source_ids + custom_source_ids
 
             # 抓取选中的热榜
-            hot_lists = await rss_fetcher.fetch_all_hot_lists(source_ids=builtin_source_ids)
+            hot_lists = await rss_fetcher.fetch_all_hot_lists(source_ids=builtin_source_ids, allow_stale=False)
 
             # 抓取自定义数据源（同样受推送数据源选择限制）
             for custom in custom_sources:
@@ -338,25 +338,40 @@ class SchedulerService:
                         hot_lists.append(hot_list)
 
             # 获取推送规则
-            rules = db.get_enabled_push_rules()
+            rules = await push_rule_cache.get()
 
             total_new = 0
-            total_pushed = 0
+            channels_queued = 0
             
             # 收集所有更新内容，用于合并推送
             all_updates = []  # [(source_name, source, filtered_items, new_items)]
 
+            # 内容未变化（304 或哈希相同）且该版本已检测过的源直接跳过，不再比对新增
+            changed_lists = []
+            skipped_sources = []
             for hot_list in hot_lists:
-                # 检测新增内容
-                new_items, is_first_fetch = rss_fetcher.get_new_items(hot_list.source, hot_list.items)
+                if hot_list.unchanged and self._processed_versions.get(hot_list.source) == hot_list.updated_at:
+                    metrics.incr("new_item_detection_skipped", source=hot_list.source)
+                    skipped_sources.append(hot_list.source)
+                else:
+                    changed_lists.append(hot_list)
+            unchanged_count = len(hot_lists) - len(changed_lists)
+            if unchanged_count:
+                logger.info(f"{unchanged_count} 个源内容未变化，跳过新增检测")
+
+            # 检测新增内容（所有源的抓取记录在同一事务中写入，跳过的源只刷新抓取时间）
+            detections = await adb.run(self._detect_new_items, changed_lists, skipped_sources)
+            for hot_list in changed_lists:
+                self._processed_versions[hot_list.source] = hot_list.updated_at
 
+            for hot_list, (new_items, is_first_fetch) in zip(changed_lists, detections):
                 if is_first_fetch:
                     logger.info(f"{hot_list.source_name}: 首次抓取，已缓存 {len(hot_list.items)} 条，跳过推送")
                     continue
 
                 if new_items and configured_channels:
                     # 应用推送规则过滤
-                    filtered_items = self._apply_rules(new_items, hot_list.source, rules)
+                    filtered_items = rules.filter(new_items, hot_list.source)
 
                     if filtered_items:
                         logger.info(f"{hot_list.source_name} 有 {len(filtered_items)} 条新热点（过滤后）")
@@ -390,32 +405,25 @@ class SchedulerService:
                     items=all_items
                 )
                 
-                # 推送到所有渠道
-                results = await push_service.push_to_all(message)
-                
-                # 记录推送历史
-                for channel, success in results.items():
-                    db.add_push_history(
-                        channel=channel,
-                        source="combined",
-                        title=message.title,
-                        item_count=len(all_items),
-                        status="success" if success else "failed"
-                    )
-                    if success:
-                        total_pushed += 1
-                
-                logger.info(f"合并推送结果: {results}")
-                
-                # 标记所有已推送
-                for _, source, _, new_items in all_updates:
-                    rss_fetcher.mark_as_pushed(source, new_items)
+                # 写入推送队列并标记所有已推送（同一事务），由后台 worker 发送
+                key = "combined:" + hashlib.sha1(
+                    "\n".join(sorted(f"{item.source}:{item.id}" for item in all_items)).encode()
+                ).hexdigest()
+                queued = await adb.run(
+                    self._enqueue_push, message, key,
+                    [(source, new_items) for _, source, _, new_items in all_updates]
+                )
+                push_queue.notify()
+
+                channels_queued = len(queued)
+                logger.info(f"合并推送已入队: {queued}")
 
             self._last_run_result = {
                 "success": True,
                 "sources_count": len(hot_lists),
+                "unchanged_sources": unchanged_count,
                 "new_items": total_new,
-                "pushed_count": total_pushed
+                "channels_queued": channels_queued
             }
             logger.info(f"抓取完成，共 {len(hot_lists)} 个源，{total_new} 条新内容")
 
@@ -426,74 +434,34 @@ class SchedulerService:
                 "error": str(e)
             }
 
-    def _apply_rules(self, items: List[HotItem], source: str, rules: list) -> List[HotItem]:
-        """应用推送规则过滤"""
-        if not rules:
-            return items
-
-        filtered = items
-        now = datetime.now()
-
-        for rule in rules:
-            rule_type = rule["rule_type"]
-            config = rule["rule_config"]
-
-            if rule_type == "keyword_include":
-                # 只保留包含关键词的
-                keywords = config.get("keywords", [])
-                filtered = [
-                    item for item in filtered
-                    if any(kw.lower() in item.title.lower() for kw in keywords)
-                ]
-
-            elif rule_type == "keyword_exclude":
-                # 排除包含关键词的
-                keywords = config.get("keywords", [])
-                filtered = [
-                    item for item in filtered
-                    if not any(kw.lower() in item.title.lower() for kw in keywords)
-                ]
-
-            elif rule_type == "time_range":
-                # 时间段限制
-                start_hour = config.get("start_hour", 0)
-                end_hour = config.get("end_hour", 23)
-                weekdays = config.get("weekdays", [])
-
-                current_hour = now.hour
-                current_weekday = now.isoweekday()  # 1=Monday, 7=Sunday
-
-                # 检查星期
-                if weekdays and current_weekday not in weekdays:
-                    filtered = []
-                    continue
-
-                # 检查时间
-                if start_hour <= end_hour:
-                    if not (start_hour <= current_hour <= end_hour):
-                        filtered = []
-                else:
-                    # 跨越午夜的情况
-                    if not (current_hour >= start_hour or current_hour <= end_hour):
-                        filtered = []
-
-            elif rule_type == "source_filter":
-                # 来源过滤
-                sources_list = config.get("sources", [])
-                mode = config.get("mode", "include")
-
-                if mode == "include" and source not in sources_list:
-                    filtered = []
-                elif mode == "exclude" and source in sources_list:
-                    filtered = []
-
-        return filtered
+    def _detect_new_items(
+        self, hot_lists: List[HotList], skipped_sources: List[str] = None
+    ) -> List[Tuple[List[HotItem], bool]]:
+        """批量检测各源新增条目，返回与 hot_lists 一一对应的 (新增条目, 是否首次抓取)"""
+        with db.bulk_write():
+            db.touch_sources(skipped_sources or [])
+            return [rss_fetcher.get_new_items(h.source, h.items) for h in hot_lists]
+
+    def _enqueue_push(
+        self,
+        message: PushMessage,
+        idempotency_key: Optional[str],
+        pushed: List[Tuple[str, List[HotItem]]] = None
+    ) -> List[str]:
+        """在同一事务中按渠道写入推送队列，并将条目标记为已推送，返回新入队的渠道"""
+        with db.bulk_write():
+            queued = push_queue.enqueue_sync(message, idempotency_key=idempotency_key)
+            for source_id, items in pushed or []:
+                rss_fetcher.mark_as_pushed(source_id, items)
+        return queued
 
     async def _cleanup_snapshots_job(self):
         """清理旧的快照数据"""
         try:
-            db.cleanup_old_snapshots(days=7)
-            logger.info("已清理 7 天前的快照数据")
+            await adb.cleanup_old_snapshots(days=7)
+            await adb.cleanup_push_queue(days=7)
+            await adb.cleanup_old_records(days=settings.push_dedup_retention_days)
+            logger.info("已清理过期的快照数据、已送达的推送任务和已推送记录")
         except Exception as e:
             logger.error(f"快照清理失败: {e}")
 
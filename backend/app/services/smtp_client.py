@@ -0,0 +1,209 @@
+"""
+SMTP 发送器
+在单独的线程中执行阻塞的 smtplib 调用，复用已认证的连接，空闲超时后自动断开
+"""
+import asyncio
+import hashlib
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.config import settings
+from app.utils.logger import logger
+
+
+# 隐式 TLS 端口
+SMTPS_PORT = 465
+
+
+def parse_recipients(value: Optional[str]) -> List[str]:
+    """解析收件人列表，支持逗号、分号或空白分隔"""
+    if not value:
+        return []
+    for sep in (";", "\n", " "):
+        value = value.replace(sep, ",")
+    return [addr.strip() for addr in value.split(",") if addr.strip()]
+
+
+class SMTPSender:
+    """
+    复用连接的 SMTP 发送器
+
+    - 所有 SMTP 操作都在同一个专用线程中串行执行，不阻塞事件循环
+    - 连接按 (host, port, username, 密码) 复用，发送前用 NOOP 检查连接是否仍可用
+    - 最后一次发送 idle_timeout 秒后关闭连接；服务器已断开时自动重连重发一次
+    - 非 465 端口在服务器支持 STARTTLS 时升级为加密连接，不支持且需要登录时拒绝发送；465 端口使用隐式 TLS
+    """
+
+    def __init__(self, idle_timeout: float = 60, timeout: float = 30, require_tls: bool = True):
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        # 为 False 时允许在未加密的连接上登录（仅用于本机中继和测试）
+        self.require_tls = require_tls
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._server: Optional[smtplib.SMTP] = None
+        self._key: Optional[Tuple[str, int, str, str]] = None
+        self._last_used = 0.0
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._connects = 0
+        self._reuses = 0
+        self._sends = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+            return self._executor
+
+    # ===== 以下方法只在 SMTP 线程中执行 =====
+
+    def _connect(self, host: str, port: int, username: Optional[str], password: Optional[str]) -> smtplib.SMTP:
+        if port == SMTPS_PORT:
+            server = smtplib.SMTP_SSL(host, port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(host, port, timeout=self.timeout)
+            server.ehlo()
+            if server.has_extn("starttls"):
+                server.starttls(context=ssl.create_default_context())
+                server.ehlo()
+            elif username and self.require_tls:
+                # 不支持 STARTTLS 时拒绝登录，避免以明文发送账号密码
+                server.close()
+                raise smtplib.SMTPNotSupportedError("SMTP 服务器不支持 STARTTLS，拒绝以明文发送登录凭据")
+        if username:
+            server.login(username, password or "")
+        self._connects += 1
+        return server
+
+    def _close_sync(self):
+        server, self._server, self._key = self._server, None, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+            logger.debug("SMTP 连接空闲超时，已断开")
+            self._close_sync()
+
+    def _get_server(self, host: str, port: int, username: Optional[str], password: Optional[str]) -> smtplib.SMTP:
+        # 密码变化时重新连接认证（只保存密码的哈希）
+        key = (host, port, username or "", hashlib.sha256((password or "").encode("utf-8")).hexdigest())
+        if self._server is not None:
+            reusable = self._key == key and time.monotonic() - self._last_used < self.idle_timeout
+            if reusable:
+                try:
+                    reusable = self._server.noop()[0] == 250
+                except (smtplib.SMTPException, OSError):
+                    reusable = False
+            if reusable:
+                self._reuses += 1
+                return self._server
+            self._close_sync()
+
+        self._server = self._connect(host, port, username, password)
+        self._key = key
+        return self._server
+
+    def _send_sync(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        from_addr: str,
+        recipients: List[str],
+        content: str,
+    ) -> Dict[str, Any]:
+        for attempt in range(2):
+            server = self._get_server(host, port, username, password)
+            try:
+                refused = server.sendmail(from_addr, recipients, content)
+                break
+            except smtplib.SMTPServerDisconnected:
+                # 连接在 NOOP 之后被服务器关闭，重连后重发一次
+                self._close_sync()
+                if attempt:
+                    raise
+            except smtplib.SMTPRecipientsRefused:
+                # 服务器仍可用，仅收件人全部被拒绝
+                self._last_used = time.monotonic()
+                raise
+            except Exception:
+                self._close_sync()
+                raise
+        self._last_used = time.monotonic()
+        self._sends += 1
+        return refused
+
+    # ===== 事件循环侧接口 =====
+
+    async def send(
+        self,
+        host: str,
+        port: Optional[int],
+        username: Optional[str],
+        password: Optional[str],
+        from_addr: str,
+        recipients: List[str],
+        content: str,
+    ) -> Dict[str, Any]:
+        """发送一封邮件给所有收件人（单次 SMTP 事务），返回被拒绝的收件人"""
+        loop = asyncio.get_running_loop()
+        refused = await loop.run_in_executor(
+            self._get_executor(),
+            self._send_sync, host, port or smtplib.SMTP_PORT, username, password, from_addr, recipients, content,
+        )
+        self._schedule_idle_close(loop)
+        return refused
+
+    def _schedule_idle_close(self, loop: asyncio.AbstractEventLoop):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = loop.call_later(self.idle_timeout, self._submit_idle_close)
+
+    def _submit_idle_close(self):
+        self._idle_handle = None
+        executor = self._executor
+        if executor is not None:
+            try:
+                executor.submit(self._close_if_idle)
+            except RuntimeError:
+                # 执行器已关闭
+                pass
+
+    def close(self):
+        """关闭连接和发送线程"""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.submit(self._close_sync)
+            executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._server is not None,
+            "connects": self._connects,
+            "reuses": self._reuses,
+            "sends": self._sends,
+        }
+
+
+# 全局实例
+smtp_sender = SMTPSender(
+    idle_timeout=settings.email_smtp_idle_timeout,
+    timeout=settings.push_channel_timeout,
+)
@@ -0,0 +1,223 @@
+"""
+增量 Feed 解析
+边接收响应边解析 RSS / Atom，只提取 HotItem 需要的字段，取满指定条数后停止
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, List
+from xml.etree.ElementTree import XMLPullParser, ParseError, Element
+
+from feedparser import FeedParserDict
+
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RSS1_NS = "http://purl.org/rss/1.0/"
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+MEDIA_NS = "http://search.yahoo.com/mrss/"
+SLASH_NS = "http://purl.org/rss/1.0/modules/slash/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+
+# 根元素 -> Feed 格式
+ROOT_FORMATS = {
+    "rss": "rss",
+    f"{{{RDF_NS}}}RDF": "rss1",
+    f"{{{ATOM_NS}}}feed": "atom",
+}
+
+# Feed 格式 -> 条目元素
+ENTRY_TAGS = {
+    "rss": "item",
+    "rss1": f"{{{RSS1_NS}}}item",
+    "atom": f"{{{ATOM_NS}}}entry",
+}
+
+
+class StreamParseError(Exception):
+    """内容不是可增量解析的 RSS / Atom，需要回退到 feedparser"""
+    pass
+
+
+def _parse_date(value: Optional[str]):
+    """解析 RFC 822（RSS）或 ISO 8601（Atom / dc:date）日期，返回 UTC struct_time"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.timetuple()
+
+
+def _text(elem: Optional[Element]) -> str:
+    if elem is None:
+        return ""
+    return (elem.text or "").strip()
+
+
+class StreamFeedParser:
+    """
+    增量 RSS / Atom 解析器
+
+    通过 feed() 逐块写入响应字节，返回 True 表示已取满 limit 条，调用方可停止读取。
+    条目以 FeedParserDict 表示，字段与 feedparser 一致（title / link / summary /
+    published_parsed / slash_comments / media_content / links），可直接替换 feedparser 结果。
+    """
+
+    def __init__(self, limit: int = 50):
+        self.limit = limit
+        self.entries: List[FeedParserDict] = []
+        self.format: Optional[str] = None
+        self.parse_time = 0.0  # 累计解析耗时（秒），不含网络等待
+
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._entry_tag: Optional[str] = None
+        self._root: Optional[Element] = None
+        self._hasher = hashlib.md5()
+
+    @property
+    def done(self) -> bool:
+        return len(self.entries) >= self.limit
+
+    def feed(self, chunk: bytes) -> bool:
+        """写入一块数据，取满 limit 条时返回 True"""
+        start = time.perf_counter()
+        try:
+            self._parser.feed(chunk)
+            return self._read_events()
+        except (ParseError, ValueError) as e:
+            # ValueError：expat 不支持的编码（如 GBK）
+            raise StreamParseError(str(e)) from e
+        finally:
+            self.parse_time += time.perf_counter() - start
+
+    def close(self):
+        """数据写入完毕"""
+        if self.done:
+            return
+        start = time.perf_counter()
+        try:
+            self._parser.close()
+            self._read_events()
+        except (ParseError, ValueError) as e:
+            # ValueError：expat 不支持的编码（如 GBK）
+            raise StreamParseError(str(e)) from e
+        finally:
+            self.parse_time += time.perf_counter() - start
+
+    def _read_events(self) -> bool:
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                    self.format = ROOT_FORMATS.get(elem.tag)
+                    if self.format is None:
+                        raise StreamParseError(f"unsupported root element: {elem.tag}")
+                    self._entry_tag = ENTRY_TAGS[self.format]
+                continue
+
+            if elem.tag == self._entry_tag:
+                entry = self._extract_atom(elem) if self.format == "atom" else self._extract_rss(elem)
+                self.entries.append(entry)
+                self._hasher.update(
+                    "\x1f".join([entry.get("title", ""), entry.get("link", ""), entry.get("summary", "")]).encode()
+                )
+                self._hasher.update(b"\x1e")
+                # 释放条目正文，避免大 Feed 占用内存
+                elem.clear()
+                if self.done:
+                    return True
+        return False
+
+    def _extract_rss(self, elem: Element) -> FeedParserDict:
+        """提取 RSS 2.0 / RSS 1.0 条目"""
+        ns = f"{{{RSS1_NS}}}" if self.format == "rss1" else ""
+        entry = FeedParserDict()
+        entry["title"] = _text(elem.find(f"{ns}title"))
+        link = _text(elem.find(f"{ns}link"))
+        if not link:
+            guid = elem.find("guid")
+            if guid is not None and guid.get("isPermaLink", "true") != "false" and _text(guid).startswith("http"):
+                link = _text(guid)
+        if link:
+            entry["link"] = link
+
+        summary = elem.find(f"{ns}description")
+        if summary is not None:
+            entry["summary"] = _text(summary)
+
+        published = _parse_date(_text(elem.find("pubDate")) or _text(elem.find(f"{{{DC_NS}}}date")))
+        if published:
+            entry["published_parsed"] = published
+
+        comments = elem.find(f"{{{SLASH_NS}}}comments")
+        if comments is not None:
+            entry["slash_comments"] = _text(comments)
+
+        media = [
+            {"url": m.get("url"), "type": m.get("type", "")}
+            for m in elem.iter(f"{{{MEDIA_NS}}}content")
+        ]
+        if media:
+            entry["media_content"] = media
+
+        # 与 feedparser 一致，附件保存在 links 中（entry.enclosures 由 links 派生）
+        links = [
+            FeedParserDict(rel="enclosure", href=e.get("url"), type=e.get("type", ""))
+            for e in elem.findall("enclosure")
+        ]
+        if links:
+            entry["links"] = links
+        return entry
+
+    def _extract_atom(self, elem: Element) -> FeedParserDict:
+        """提取 Atom 条目"""
+        ns = f"{{{ATOM_NS}}}"
+        entry = FeedParserDict()
+        entry["title"] = _text(elem.find(f"{ns}title"))
+
+        link = ""
+        links = []
+        for link_elem in elem.findall(f"{ns}link"):
+            rel = link_elem.get("rel", "alternate")
+            href = link_elem.get("href", "")
+            if rel == "alternate" and not link:
+                link = href
+            links.append(FeedParserDict(rel=rel, href=href, type=link_elem.get("type", "")))
+        if link:
+            entry["link"] = link
+        if links:
+            entry["links"] = links
+
+        summary = elem.find(f"{ns}summary")
+        if summary is None:
+            summary = elem.find(f"{ns}content")
+        if summary is not None:
+            entry["summary"] = _text(summary)
+
+        published = _parse_date(_text(elem.find(f"{ns}published")) or _text(elem.find(f"{ns}updated")))
+        if published:
+            entry["published_parsed"] = published
+
+        media = [
+            {"url": m.get("url"), "type": m.get("type", "")}
+            for m in elem.iter(f"{{{MEDIA_NS}}}content")
+        ]
+        if media:
+            entry["media_content"] = media
+        return entry
+
+    def content_hash(self) -> str:
+        """已解析条目的内容哈希（按顺序）"""
+        return self._hasher.hexdigest()
+
+    def result(self) -> FeedParserDict:
+        """返回与 feedparser 结构兼容的结果"""
+        return FeedParserDict(feed=FeedParserDict(), entries=self.entries, bozo=0)
@@ -0,0 +1,117 @@
+"""
+运行时指标
+进程内计数器和直方图，按名称和标签聚合，用于 /api/stats 展示
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Any, Tuple, List
+
+# 直方图默认分桶（毫秒）
+DEFAULT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Metrics:
+    """线程安全的进程内指标收集器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Dict[str, Any]]] = {}
+        self._started_at = datetime.now()
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """计数器累加"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def get_counter(self, name: str, **labels) -> float:
+        """读取计数器，未传标签时返回所有标签的合计"""
+        with self._lock:
+            series = self._counters.get(name, {})
+            if labels:
+                return series.get(self._key(labels), 0)
+            return sum(series.values())
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels):
+        """直方图记录一次观测值"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "count": 0, "sum": 0.0, "max": 0.0}
+                series[key] = hist
+            index = len(hist["buckets"])
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    index = i
+                    break
+            hist["counts"][index] += 1
+            hist["count"] += 1
+            hist["sum"] += value
+            hist["max"] = max(hist["max"], value)
+
+    def get_histogram(self, name: str, **labels) -> Dict[str, Any]:
+        """读取直方图摘要"""
+        with self._lock:
+            hist = self._histograms.get(name, {}).get(self._key(labels))
+            return self._summarize(hist) if hist else {"count": 0}
+
+    @staticmethod
+    def _quantile(hist: Dict[str, Any], q: float) -> float:
+        """按分桶估算分位数（返回所在分桶上界）"""
+        target = q * hist["count"]
+        seen = 0
+        for bound, count in zip(list(hist["buckets"]) + [hist["max"]], hist["counts"]):
+            seen += count
+            if seen >= target:
+                return min(bound, hist["max"])
+        return hist["max"]
+
+    def _summarize(self, hist: Dict[str, Any]) -> Dict[str, Any]:
+        count = hist["count"]
+        buckets: List[Dict[str, Any]] = [
+            {"le": bound, "count": c} for bound, c in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"])
+        ]
+        return {
+            "count": count,
+            "sum": round(hist["sum"], 3),
+            "avg": round(hist["sum"] / count, 3) if count else 0.0,
+            "max": round(hist["max"], 3),
+            "p50": round(self._quantile(hist, 0.5), 3),
+            "p95": round(self._quantile(hist, 0.95), 3),
+            "buckets": buckets,
+        }
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started_at = datetime.now()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """导出所有指标"""
+        with self._lock:
+            counters = {
+                name: {
+                    "total": sum(series.values()),
+                    "series": [{"labels": dict(key), "value": value} for key, value in series.items()],
+                }
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [{"labels": dict(key), **self._summarize(hist)} for key, hist in series.items()]
+                for name, series in self._histograms.items()
+            }
+        return {"since": self._started_at.isoformat(), "counters": counters, "histograms": histograms}
+
+
+# 全局实例
+metrics = Metrics()
@@ -5,6 +5,7 @@
 注意：部分源需要在 RSSHub 配置额外的环境变量才能正常工作
 - 微博：需要 WEIBO_COOKIE
 - B站：需要 BILIBILI_COOKIE
+（这类源标记 sticky=True，抓取时固定优先使用上次成功的实例）
 - 抖音：需要反代理配置
 - GitHub Trending：可能需要代理
 
@@ -22,7 +23,8 @@ HOT_SOURCES = {
         "name": "微博热搜",
         "route": "/weibo/search/hot",
         "icon": _icon("weibo.com"),
-        "category": "热搜榜"
+        "category": "热搜榜",
+        "sticky": True  # 需要 Cookie，固定使用配置了 Cookie 的实例
     },
     "zhihu": {
         "name": "知乎热榜",
@@ -34,7 +36,8 @@ HOT_SOURCES = {
         "name": "B站热搜",
         "route": "/bilibili/hot-search",
         "icon": _icon("bilibili.com"),
-        "category": "视频"
+        "category": "视频",
+        "sticky": True  # 需要 Cookie，固定使用配置了 Cookie 的实例
     },
 
     # --- 技术社区 ---
@@ -0,0 +1,99 @@
+"""
+异步数据库层基准测试
+
+模拟 SSE 连接的心跳：每 10ms 唤醒一次并记录延迟，同时并发执行趋势查询。
+对比在事件循环中直接调用同步 db 方法与通过 adb（数据库线程池）调用时的心跳延迟。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_async_db
+"""
+import os
+import sys
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp_dir = tempfile.mkdtemp(prefix="hotpush-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ["REDIS_URL"] = ""
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.schemas import HotItem  # noqa: E402
+from app.services.database import db, adb  # noqa: E402
+
+TICK = 0.01
+SOURCES = 13
+ITEMS_PER_SNAPSHOT = 50
+SNAPSHOTS = 288  # 一天，每 5 分钟一次
+QUERIES = 40
+
+
+def populate():
+    """写入一天的快照数据"""
+    now = datetime.now()
+    with db.bulk_write():
+        for snap in range(SNAPSHOTS):
+            snapshot_time = now - timedelta(minutes=5 * snap)
+            for s in range(SOURCES):
+                items = []
+                for rank in range(1, ITEMS_PER_SNAPSHOT + 1):
+                    item_id = f"s{s}-i{(rank + snap // 12) % 80}"
+                    items.append(HotItem(id=item_id, title=f"标题 {item_id}", url=f"https://example.com/{item_id}",
+                                         source=f"source{s}"))
+                db.save_snapshot(f"source{s}", items, snapshot_time=snapshot_time)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def heartbeat(latencies, stop: asyncio.Event):
+    """模拟 SSE 连接：按固定间隔唤醒，记录超出预期的延迟"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK
+        await asyncio.sleep(TICK)
+        latencies.append((loop.time() - expected) * 1000)
+
+
+async def run_queries(use_async: bool):
+    for i in range(QUERIES):
+        if use_async:
+            await adb.get_trending_items(hours=24)
+            await adb.get_platform_stats(hours=24)
+        else:
+            db.get_trending_items(hours=24)
+            db.get_platform_stats(hours=24)
+        await asyncio.sleep(0)
+
+
+async def measure(label: str, use_async: bool = None):
+    latencies = []
+    stop = asyncio.Event()
+    hb = asyncio.create_task(heartbeat(latencies, stop))
+    start = time.perf_counter()
+    if use_async is None:
+        await asyncio.sleep(1.0)
+    else:
+        await run_queries(use_async)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await hb
+    print(f"{label:<24} ticks={len(latencies):>4}  p50={percentile(latencies, 50):7.2f}ms  "
+          f"p99={percentile(latencies, 99):7.2f}ms  max={max(latencies):7.2f}ms  elapsed={elapsed:.2f}s")
+
+
+async def main():
+    print(f"写入测试数据：{SOURCES} 个源 × {SNAPSHOTS} 次快照 × {ITEMS_PER_SNAPSHOT} 条 ...")
+    populate()
+    await measure("idle")
+    await measure("sync db (blocking)", use_async=False)
+    await measure("adb (thread pool)", use_async=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Feed 解析池基准测试
+
+模拟 SSE 连接的心跳：每 10ms 唤醒一次并记录延迟，同时并发解析 100 个 50 条目的合成 Feed。
+对比在事件循环中直接解析（inline）与放到线程池 / 进程池中解析时的心跳延迟。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_feed_parse
+"""
+import os
+import sys
+import asyncio
+import time
+
+os.environ["REDIS_URL"] = ""
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.feed_parser import FeedParserPool  # noqa: E402
+
+TICK = 0.01
+FEEDS = 100
+ENTRIES = 50
+
+
+def build_feed(index: int) -> str:
+    """生成带 HTML 描述的 RSS 2.0 Feed"""
+    items = []
+    for i in range(ENTRIES):
+        description = "&lt;p&gt;" + f"热点 {index}-{i} 的详细描述，包含 &lt;b&gt;HTML&lt;/b&gt; 内容。" * 20 + "&lt;/p&gt;"
+        items.append(
+            f"<item><title>热点 {index}-{i}</title>"
+            f"<link>https://example.com/{index}/{i}</link>"
+            f"<guid>https://example.com/{index}/{i}</guid>"
+            f"<pubDate>Mon, 06 Sep 2021 16:45:00 +0000</pubDate>"
+            f"<description>{description}</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>源 {index}</title><link>https://example.com/{index}</link>"
+        + "".join(items)
+        + "</channel></rss>"
+    )
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def heartbeat(latencies, stop: asyncio.Event):
+    """模拟 SSE 连接：按固定间隔唤醒，记录超出预期的延迟"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK
+        await asyncio.sleep(TICK)
+        latencies.append((loop.time() - expected) * 1000)
+
+
+async def measure(mode: str, feeds):
+    pool = FeedParserPool(mode=mode, workers=4, queue_size=32)
+    # 预热（进程池启动子进程）
+    await pool.parse(feeds[0])
+
+    latencies = []
+    stop = asyncio.Event()
+    hb = asyncio.create_task(heartbeat(latencies, stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(pool.parse(feed, source=f"source{i}") for i, feed in enumerate(feeds)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await hb
+    pool.shutdown()
+
+    assert all(len(r.entries) == ENTRIES for r in results)
+    print(f"{mode:<8} ticks={len(latencies):>4}  p50={percentile(latencies, 50):8.2f}ms  "
+          f"p99={percentile(latencies, 99):8.2f}ms  max={max(latencies):8.2f}ms  elapsed={elapsed:.2f}s")
+
+
+async def main():
+    feeds = [build_feed(i) for i in range(FEEDS)]
+    size_kb = sum(len(f.encode()) for f in feeds) / 1024
+    print(f"{FEEDS} 个 Feed × {ENTRIES} 条，共 {size_kb:.0f} KB")
+    for mode in ("inline", "thread", "process"):
+        await measure(mode, feeds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+快照存储基准测试
+
+按旧表结构（hot_item_snapshots 每行保存标题和链接）写入 13 个源 × 7 天 × 每 5 分钟 50 条快照，
+再用 Database 打开触发迁移（items / snapshots / snapshot_entries），
+对比迁移前后的数据库文件大小（VACUUM 后）和 /api/trends/ranking 使用的 24 小时排名趋势查询耗时。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_snapshot_storage
+"""
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp_dir = tempfile.mkdtemp(prefix="hotpush-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ["REDIS_URL"] = ""
+os.environ["DEBUG"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.database import Database  # noqa: E402
+
+SOURCES = 13
+DAYS = 7
+SNAPSHOTS_PER_DAY = 288  # 每 5 分钟一次
+ITEMS_PER_SNAPSHOT = 50
+NEW_ITEMS_PER_SNAPSHOT = 2  # 每次快照新上榜的条目数
+QUERY_HOURS = 24
+ROUNDS = 3
+
+ALPHABET = "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手十用主行方又如前所本见经头面公同三已老从动两长知民样现分将外但身些与高意进把法此实回二理美点月明其种声全工己话儿者向情部正名定女问力机给等几很业最间新什打便位因重被走电四第门相次东政海口使教西再平真听世气信北少关并内加化由却代军产入先山五太水万市"
+
+LEGACY_SCHEMA = """
+    CREATE TABLE hot_item_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT NOT NULL,
+        item_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        url TEXT,
+        rank INTEGER NOT NULL,
+        hot_score TEXT,
+        snapshot_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_snapshots_source_time ON hot_item_snapshots(source, snapshot_time);
+    CREATE INDEX idx_snapshots_item ON hot_item_snapshots(item_id, snapshot_time);
+"""
+
+# 迁移前 get_trend_data 的查询
+LEGACY_QUERY = """
+    SELECT item_id, title, rank, snapshot_time
+    FROM hot_item_snapshots
+    WHERE source = ? AND snapshot_time > ?
+    ORDER BY snapshot_time ASC, rank ASC
+"""
+
+
+def populate(path: str):
+    """按旧表结构写入快照：每个源的榜单每次有少量新条目上榜，其余条目排名小幅变化"""
+    rng = random.Random(20240101)
+    now = datetime.now()
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    for s in range(SOURCES):
+        source = f"source{s}"
+        next_id = 0
+        board = []
+        rows = []
+        for snap in range(DAYS * SNAPSHOTS_PER_DAY - 1, -1, -1):
+            snapshot_time = now - timedelta(minutes=5 * snap)
+            while len(board) < ITEMS_PER_SNAPSHOT:
+                item_id = f"{source}-{next_id:06d}"
+                title = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(12, 30)))
+                board.insert(rng.randrange(len(board) + 1), (item_id, title, f"https://s.example.com/{source}/weibo?q={item_id}&t=31"))
+                next_id += 1
+            for rank, (item_id, title, url) in enumerate(board, 1):
+                rows.append((source, item_id, title, url, rank, str(rng.randint(10000, 9999999)), snapshot_time))
+            del board[-NEW_ITEMS_PER_SNAPSHOT:]
+            board.sort(key=lambda _: rng.random() < 0.1)
+        conn.executemany("""
+            INSERT INTO hot_item_snapshots (source, item_id, title, url, rank, hot_score, snapshot_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def timed(func, rounds: int = ROUNDS):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    return (time.perf_counter() - start) / rounds * 1000, result
+
+
+def legacy_trends(path: str):
+    """迁移前的 get_trend_data（结果同样转换为字典）"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    cutoff = datetime.now() - timedelta(hours=QUERY_HOURS)
+    results = []
+    for s in range(SOURCES):
+        rows = conn.execute(LEGACY_QUERY, (f"source{s}", cutoff)).fetchall()
+        results.append([
+            {
+                "item_id": row["item_id"],
+                "title": row["title"],
+                "rank": row["rank"],
+                "snapshot_time": str(row["snapshot_time"])
+            }
+            for row in rows
+        ])
+    conn.close()
+    return results
+
+
+def main():
+    path = os.path.join(_tmp_dir, "legacy.db")
+    rows = SOURCES * DAYS * SNAPSHOTS_PER_DAY * ITEMS_PER_SNAPSHOT
+    print(f"写入旧结构快照：{SOURCES} 个源 × {DAYS} 天 × {SNAPSHOTS_PER_DAY} 次 × {ITEMS_PER_SNAPSHOT} 条 = {rows} 行 ...")
+    populate(path)
+    legacy_size = os.path.getsize(path)
+    legacy_ms, expected = timed(lambda: legacy_trends(path))
+
+    start = time.perf_counter()
+    Database(f"sqlite:///{path}").close()
+    migrate_s = time.perf_counter() - start
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("items", "snapshots", "snapshot_entries")
+    }
+    conn.close()
+    new_size = os.path.getsize(path)
+
+    database = Database(f"sqlite:///{path}")
+    new_ms, result = timed(lambda: [database.get_trend_data(f"source{s}", hours=QUERY_HOURS) for s in range(SOURCES)])
+    database.close()
+
+    assert result == expected
+
+    print(f"迁移耗时 {migrate_s:.1f} s，{counts}（另含趋势统计的小时汇总表）")
+    print(f"数据库大小  旧 {legacy_size / 1024 / 1024:8.1f} MB  新 {new_size / 1024 / 1024:8.1f} MB  "
+          f"（减少 {(1 - new_size / legacy_size) * 100:.0f}%）")
+    print(f"{QUERY_HOURS} 小时排名趋势（{SOURCES} 个源）  旧 {legacy_ms:8.1f} ms  新 {new_ms:8.1f} ms  "
+          f"（{legacy_ms / new_ms:.1f}x）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Redis 缓存服务测试（使用内存版 Redis 客户端）
+"""
+import fnmatch
+from app.services.cache import CacheService
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        self.client.round_trips += 1
+        results = [getattr(self.client, name)(*args) for name, args in self.commands]
+        self.commands = []
+        return results
+
+
+class _FakeRedis:
+    """只实现位图相关命令的内存版 Redis"""
+
+    def __init__(self):
+        self.bitmaps = {}
+        self.expire_at = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def setbit(self, key, offset, value):
+        bitmap = self.bitmaps.setdefault(key, bytearray())
+        index = offset // 8
+        if index >= len(bitmap):
+            bitmap.extend(b"\x00" * (index + 1 - len(bitmap)))
+        bitmap[index] |= 0x80 >> (offset % 8)
+
+    def getbit(self, key, offset):
+        bitmap = self.bitmaps.get(key, b"")
+        index = offset // 8
+        return int(index < len(bitmap) and bool(bitmap[index] & (0x80 >> (offset % 8))))
+
+    def expireat(self, key, when):
+        self.expire_at[key] = when
+
+    def exists(self, *keys):
+        return sum(key in self.bitmaps for key in keys)
+
+    def execute_command(self, command, key, *args):
+        assert command == "BITFIELD"
+        return [self.getbit(key, args[i + 2]) for i in range(0, len(args), 3)]
+
+    def strlen(self, key):
+        return len(self.bitmaps.get(key, b""))
+
+    def scan_iter(self, match=None, count=None):
+        return [key for key in self.bitmaps if fnmatch.fnmatch(key, match)]
+
+
+def _cache(client):
+    cache = CacheService()
+    cache.client = client
+    cache.enabled = True
+    return cache
+
+
+class TestBloomBitmaps:
+    def test_add_and_check_in_one_round_trip(self):
+        client = _FakeRedis()
+        cache = _cache(client)
+        cache.bloom_add("dedup:weibo:1", [3, 17], expire_at=1000)
+        assert client.expire_at == {"dedup:weibo:1": 1000}
+
+        client.round_trips = 0
+        result = cache.bloom_check(["dedup:weibo:1", "dedup:weibo:0"], [3, 4, 17])
+        assert result == [[1, 0, 1], [0, 0, 0]]
+        assert client.round_trips == 1
+
+    def test_missing_bitmaps_return_none(self):
+        cache = _cache(_FakeRedis())
+        assert cache.bloom_check(["dedup:weibo:1"], [3]) is None
+
+    def test_key_sizes(self):
+        client = _FakeRedis()
+        cache = _cache(client)
+        cache.bloom_add("dedup:weibo:1", [100], expire_at=1000)
+        cache.bloom_add("other", [1], expire_at=1000)
+        assert cache.get_key_sizes("dedup:*") == {"dedup:weibo:1": 13}
@@ -0,0 +1,426 @@
+"""
+数据库服务测试
+"""
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.services.database import Database, AsyncDatabase
+from app.services.db_pool import ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'hotpush.db'}")
+    yield database
+    database.close()
+
+
+class _FakeConn:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+def _ping(conn):
+    if not conn.healthy:
+        raise RuntimeError("connection lost")
+
+
+class TestConnectionPool:
+    def test_connection_is_reused(self):
+        pool = ConnectionPool("test", _FakeConn, _ping, size=2)
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        assert second.conn is first.conn
+        stats = pool.get_stats()
+        assert stats["checkouts"] == 2
+        assert stats["created"] == 1
+
+    def test_unhealthy_connection_is_replaced(self):
+        pool = ConnectionPool("test", _FakeConn, _ping, size=1)
+        pooled = pool.acquire()
+        pooled.conn.healthy = False
+        pool.release(pooled)
+        replacement = pool.acquire()
+        assert replacement.conn is not pooled.conn
+        assert pooled.conn.closed is True
+        assert pool.get_stats()["health_check_failures"] == 1
+
+    def test_old_connection_is_recycled(self):
+        pool = ConnectionPool("test", _FakeConn, _ping, size=1, recycle=10)
+        pooled = pool.acquire()
+        pooled.created_at -= 11
+        pool.release(pooled)
+        replacement = pool.acquire()
+        assert replacement.conn is not pooled.conn
+        assert pool.get_stats()["recycled"] == 1
+
+    def test_acquire_times_out_when_exhausted(self):
+        pool = ConnectionPool("test", _FakeConn, _ping, size=1, timeout=0.05)
+        pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        stats = pool.get_stats()
+        assert stats["waits"] == 1
+        assert stats["timeouts"] == 1
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool("test", _FakeConn, _ping, size=1, timeout=5)
+        pooled = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, args=(pooled,))
+        timer.start()
+        waited = pool.acquire()
+        assert waited.conn is pooled.conn
+        stats = pool.get_stats()
+        assert stats["waits"] == 1
+        assert stats["wait_time_total"] > 0
+
+
+class TestDatabasePool:
+    def test_queries_share_pooled_connection(self, database):
+        database.set_setting("foo", "bar")
+        assert database.get_setting("foo") == "bar"
+        stats = database.get_pool_stats()
+        assert stats["created"] == 1
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 1
+
+    def test_failed_transaction_rolls_back(self, database):
+        with pytest.raises(ValueError):
+            with database.get_connection() as conn:
+                database._execute(conn, "INSERT INTO settings (key, value) VALUES (?, ?)", ("k", "v"))
+                raise ValueError("boom")
+        assert database.get_setting("k") is None
+        assert database.get_pool_stats()["in_use"] == 0
+
+
+class TestAsyncDatabase:
+    async def test_methods_run_in_executor(self, database):
+        adb = AsyncDatabase(database, max_workers=2)
+        try:
+            await adb.set_setting("foo", "bar")
+            assert await adb.get_setting("foo") == "bar"
+            thread_name = await adb.run(lambda: threading.current_thread().name)
+            assert thread_name.startswith("hotpush-db")
+        finally:
+            adb.shutdown()
+
+
+class TestBulkWrites:
+    def _items(self, count):
+        from app.models.schemas import HotItem
+        return [
+            HotItem(id=f"id-{i}", title=f"标题 {i}", url=f"https://example.com/{i}", source="weibo")
+            for i in range(count)
+        ]
+
+    def test_save_snapshot_inserts_all_ranks(self, database):
+        database.save_snapshot("weibo", self._items(50))
+        data = database.get_trend_data("weibo", hours=1)
+        assert len(data) == 50
+        assert [d["rank"] for d in data] == list(range(1, 51))
+
+    def test_mark_items_pushed_upserts(self, database):
+        items = self._items(3)
+        database.mark_items_pushed("weibo", items)
+        database.mark_items_pushed("weibo", items)
+        assert database.get_pushed_item_ids("weibo") == {"id-0", "id-1", "id-2"}
+
+    def test_filter_unpushed_item_ids(self, database):
+        assert database.filter_unpushed_item_ids("weibo", ["id-0", "id-1"]) == (["id-0", "id-1"], True)
+
+        database.record_fetch("weibo", 3)
+        database.mark_items_pushed("weibo", self._items(1))
+        database.mark_items_pushed("zhihu", [self._items(2)[1]])
+        assert database.filter_unpushed_item_ids("weibo", ["id-0", "id-1", "id-2"]) == (["id-1", "id-2"], False)
+        assert database.filter_unpushed_item_ids("weibo", []) == ([], False)
+        assert database.filter_unpushed_item_ids("zhihu", ["id-1"]) == ([], True)
+
+    def test_bulk_write_uses_single_transaction(self, database):
+        with database.bulk_write():
+            database.record_fetch("weibo", 10)
+            database.add_push_history("telegram", "weibo", "t", 1)
+            assert database.get_pool_stats()["in_use"] == 1
+        assert database.get_pool_stats()["checkouts"] == 2  # _init_db + bulk_write
+        assert database.is_first_fetch("weibo") is False
+        assert database.get_push_history_count() == 1
+
+    def test_bulk_write_rolls_back_on_error(self, database):
+        with pytest.raises(RuntimeError):
+            with database.bulk_write():
+                database.record_fetch("weibo", 10)
+                database.add_push_history("telegram", "weibo", "t", 1)
+                raise RuntimeError("boom")
+        assert database.is_first_fetch("weibo") is True
+        assert database.get_push_history_count() == 0
+
+
+class TestSourceState:
+    def test_one_row_per_source(self, database):
+        assert database.get_source_state("weibo") is None
+        database.record_fetch("weibo", 10, "hash-1", "etag-1")
+        first = database.get_source_state("weibo")
+        database.record_fetch("weibo", 20, "hash-2")
+        with database.get_connection() as conn:
+            rows = conn.execute("SELECT * FROM source_state").fetchall()
+        assert len(rows) == 1
+        assert rows[0]["first_seen"] == first["first_seen"]
+        assert rows[0]["last_item_count"] == 20
+        assert rows[0]["last_hash"] == "hash-2"
+        assert rows[0]["last_etag"] is None
+
+    def test_cached_state_skips_query(self, database, monkeypatch):
+        database.record_fetch("weibo", 10)
+        assert database.is_first_fetch("weibo") is False
+        monkeypatch.setattr(database, "get_connection", None)
+        assert database.is_first_fetch("weibo") is False
+        assert database.get_source_state("weibo")["last_item_count"] == 10
+
+    def test_migrated_from_fetch_records(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE fetch_records (id INTEGER PRIMARY KEY, source TEXT, fetched_at TIMESTAMP, item_count INTEGER)")
+        conn.executemany("INSERT INTO fetch_records (source, fetched_at, item_count) VALUES (?, ?, ?)", [
+            ("weibo", "2024-01-01 00:00:00", 10),
+            ("weibo", "2024-01-02 00:00:00", 10),
+        ])
+        conn.commit()
+        conn.close()
+
+        database = Database(f"sqlite:///{path}")
+        try:
+            state = database.get_source_state("weibo")
+            assert str(state["first_seen"]).startswith("2024-01-01")
+            assert str(state["last_fetch_at"]).startswith("2024-01-02")
+            assert database.is_first_fetch("zhihu") is True
+            with database.get_connection() as conn:
+                assert not database._table_exists(conn, "fetch_records")
+        finally:
+            database.close()
+
+    def test_cleanup_forgets_idle_sources(self, database):
+        database.record_fetch("weibo", 10)
+        assert database.is_first_fetch("weibo") is False
+        with database.get_connection() as conn:
+            conn.execute("UPDATE source_state SET last_fetch_at = '2000-01-01 00:00:00'")
+        database.cleanup_old_records(days=7)
+        assert database.is_first_fetch("weibo") is True
+
+
+    def test_touched_sources_survive_cleanup(self, database):
+        database.record_fetch("weibo", 10, "hash-1")
+        database.record_fetch("zhihu", 10)
+        with database.get_connection() as conn:
+            conn.execute("UPDATE source_state SET last_fetch_at = '2000-01-01 00:00:00'")
+        database.touch_sources(["weibo"])
+        database.cleanup_old_records(days=7)
+        assert database.is_first_fetch("weibo") is False
+        assert database.get_source_state("weibo")["last_hash"] == "hash-1"
+        assert database.is_first_fetch("zhihu") is True
+
+    def test_latest_snapshot(self, database):
+        from app.models.schemas import HotItem
+        items = [HotItem(id=i, title=f"t-{i}", url=f"https://example.com/{i}", hot_score="9", source="weibo") for i in "ab"]
+        assert database.get_latest_snapshot("weibo") is None
+        database.save_snapshot("weibo", items[:1], snapshot_time=datetime.now() - timedelta(minutes=5))
+        database.save_snapshot("weibo", items[::-1])
+        snapshot = database.get_latest_snapshot("weibo")
+        assert [(row["item_id"], row["title"], row["hot_score"]) for row in snapshot["items"]] == [
+            ("b", "t-b", "9"), ("a", "t-a", "9")
+        ]
+
+
+class TestSnapshotRollups:
+    def _items(self, *ids):
+        from app.models.schemas import HotItem
+        return [HotItem(id=i, title=f"title-{i}", url=f"https://example.com/{i}", source="weibo") for i in ids]
+
+    def test_rollups_match_raw_snapshots(self, database):
+        database.save_snapshot("weibo", self._items("a", "b", "c"))
+        database.save_snapshot("weibo", self._items("b", "a"))
+        database.save_snapshot("zhihu", self._items("z"))
+
+        top = database.get_trending_items(hours=24)
+        assert [i["item_id"] for i in top][2:] == ["z", "c"]
+        assert sorted((i["item_id"], i["appearances"], i["best_rank"], i["avg_rank"]) for i in top) == [
+            ("a", 2, 1, 1.5), ("b", 2, 1, 1.5), ("c", 1, 3, 3.0), ("z", 1, 1, 1.0)
+        ]
+        stats = database.get_platform_stats(hours=24)
+        assert stats == [
+            {"source": "weibo", "item_count": 3, "snapshot_count": 2},
+            {"source": "zhihu", "item_count": 1, "snapshot_count": 1},
+        ]
+
+    def test_window_combines_hourly_buckets(self, database):
+        database.save_snapshot("weibo", self._items("a"))
+        with database.get_connection() as conn:
+            conn.execute("UPDATE item_rollup_hourly SET bucket = '2000-01-01 00:00:00'")
+            conn.execute("UPDATE source_rollup_hourly SET bucket = '2000-01-01 00:00:00'")
+        database.save_snapshot("weibo", self._items("a"))
+        assert database.get_trending_items(hours=24)[0]["appearances"] == 1
+        assert database.get_platform_stats(hours=24)[0]["snapshot_count"] == 1
+
+    def test_trending_title_is_current_title(self, database):
+        from app.models.schemas import HotItem
+        old = HotItem(id="a", title="title-a（旧）", url="https://example.com/a", source="weibo")
+        database.save_snapshot("weibo", [old])
+        earlier = (datetime.now() - timedelta(hours=2)).strftime("%Y-%m-%d %H:00:00")
+        with database.get_connection() as conn:
+            conn.execute("UPDATE item_rollup_hourly SET bucket = ?", (earlier,))
+        database.save_snapshot("weibo", self._items("a"))
+        top = database.get_trending_items(hours=24)
+        assert (top[0]["title"], top[0]["appearances"]) == ("title-a", 2)
+
+    def test_backfilled_from_existing_snapshots(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        database = Database(f"sqlite:///{path}")
+        database.save_snapshot("weibo", self._items("a", "b"))
+        database.save_snapshot("weibo", self._items("b"))
+        expected = database.get_trending_items(hours=24)
+        with database.get_connection() as conn:
+            conn.execute("DELETE FROM item_rollup_hourly")
+            conn.execute("DELETE FROM source_rollup_hourly")
+        database.close()
+
+        database = Database(f"sqlite:///{path}")
+        try:
+            assert database.get_trending_items(hours=24) == expected
+            assert database.get_platform_stats(hours=24)[0]["snapshot_count"] == 2
+        finally:
+            database.close()
+
+    def test_cleanup_removes_old_buckets(self, database):
+        database.save_snapshot("weibo", self._items("a"))
+        with database.get_connection() as conn:
+            conn.execute("UPDATE item_rollup_hourly SET bucket = '2000-01-01 00:00:00'")
+        database.cleanup_old_snapshots(days=7)
+        with database.get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM item_rollup_hourly").fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM source_rollup_hourly").fetchone()[0] == 1
+
+
+class TestNormalizedSnapshots:
+    def _items(self, *ids, title="title"):
+        from app.models.schemas import HotItem
+        return [HotItem(id=i, title=f"{title}-{i}", url=f"https://example.com/{i}", source="weibo") for i in ids]
+
+    def _count(self, database, table):
+        with database.get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_titles_stored_once(self, database):
+        database.save_snapshot("weibo", self._items("a", "b"))
+        database.save_snapshot("weibo", self._items("b", "a", title="new"))
+        assert self._count(database, "items") == 2
+        assert self._count(database, "snapshots") == 2
+        assert self._count(database, "snapshot_entries") == 4
+
+        data = database.get_trend_data("weibo", hours=24)
+        assert [(d["item_id"], d["rank"]) for d in data] == [("a", 1), ("b", 2), ("b", 1), ("a", 2)]
+        assert data[0]["title"] == "new-a"
+        assert [d["rank"] for d in database.get_item_trend("a", hours=24)] == [1, 2]
+
+    def test_fetches_within_same_second_kept(self, database):
+        now = datetime.now().replace(microsecond=100)
+        database.save_snapshot("weibo", self._items("a"), snapshot_time=now)
+        database.save_snapshot("weibo", self._items("b"), snapshot_time=now.replace(microsecond=200))
+        assert self._count(database, "snapshots") == 2
+        assert [d["item_id"] for d in database.get_trend_data("weibo", hours=1)] == ["a", "b"]
+
+    def test_cleanup_removes_unreferenced_items(self, database):
+        database.save_snapshot("weibo", self._items("old"), snapshot_time=datetime.now() - timedelta(days=8))
+        database.save_snapshot("weibo", self._items("a"))
+        database.cleanup_old_snapshots(days=7)
+        assert self._count(database, "snapshots") == 1
+        assert self._count(database, "snapshot_entries") == 1
+        with database.get_connection() as conn:
+            assert [row[0] for row in conn.execute("SELECT item_id FROM items")] == ["a"]
+
+    def test_migrated_from_legacy_table(self, tmp_path):
+        path = tmp_path / "legacy.db"
+        now = datetime.now().replace(microsecond=0)
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE hot_item_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, item_id TEXT NOT NULL,
+                title TEXT NOT NULL, url TEXT, rank INTEGER NOT NULL, hot_score TEXT,
+                snapshot_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany("""
+            INSERT INTO hot_item_snapshots (source, item_id, title, url, rank, hot_score, snapshot_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            ("weibo", "a", "标题 a", "https://example.com/a", 1, "100", str(now - timedelta(minutes=10))),
+            ("weibo", "b", "标题 b", "https://example.com/b", 2, None, str(now - timedelta(minutes=10))),
+            ("weibo", "b", "标题 b（旧）", "https://example.com/b-old", 1, None, str(now - timedelta(minutes=5))),
+            ("weibo", "b", "标题 b", "https://example.com/b", 1, None, str(now)),
+        ])
+        conn.commit()
+        conn.close()
+
+        database = Database(f"sqlite:///{path}")
+        try:
+            with database.get_connection() as conn:
+                assert conn.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE name = 'hot_item_snapshots'"
+                ).fetchone()[0] == 0
+                # 原始数据保留在重命名后的表中
+                assert conn.execute("SELECT COUNT(*) FROM hot_item_snapshots_legacy").fetchone()[0] == 4
+                # 标题和链接取自最近一次快照，而不是字典序最大值
+                assert tuple(conn.execute(
+                    "SELECT title, url FROM items WHERE item_id = 'b'"
+                ).fetchone()) == ("标题 b", "https://example.com/b")
+            data = database.get_trend_data("weibo", hours=1)
+            assert [(d["item_id"], d["title"], d["rank"]) for d in data] == [
+                ("a", "标题 a", 1), ("b", "标题 b", 2), ("b", "标题 b", 1), ("b", "标题 b", 1)
+            ]
+            assert database.get_platform_stats(hours=1)[0]["snapshot_count"] == 3
+        finally:
+            database.close()
+
+        # 再次启动不会重复迁移
+        database = Database(f"sqlite:///{path}")
+        try:
+            assert self._count(database, "snapshot_entries") == 4
+        finally:
+            database.close()
+
+
+class TestPushHistory:
+    def test_latency_is_recorded(self, database):
+        database.add_push_history("telegram", "weibo", "t", 1, latency_ms=123)
+        database.add_push_history("discord", "weibo", "t", 1)
+        history = {h["channel"]: h for h in database.get_push_history()}
+        assert history["telegram"]["latency_ms"] == 123
+        assert history["discord"]["latency_ms"] is None
+
+    def test_latency_column_added_to_existing_table(self, tmp_path):
+        path = tmp_path / "old.db"
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE push_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                source TEXT,
+                title TEXT,
+                item_count INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'success',
+                error_message TEXT,
+                pushed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+        database = Database(f"sqlite:///{path}")
+        try:
+            database.add_push_history("telegram", "weibo", "t", 1, latency_ms=45)
+            assert database.get_push_history()[0]["latency_ms"] == 45
+        finally:
+            database.close()
@@ -0,0 +1,124 @@
+"""
+推送去重存储测试
+"""
+import pytest
+from app.models.schemas import HotItem
+from app.services import dedup_store as dedup_store_module
+from app.services.database import Database
+from app.services.dedup_store import BUCKET_SECONDS, PushDedupStore, bloom_size
+from tests.test_cache import _FakeRedis, _cache
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    database = Database(f"sqlite:///{tmp_path / 'hotpush.db'}")
+    monkeypatch.setattr(dedup_store_module, "db", database)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = _FakeRedis()
+    monkeypatch.setattr(dedup_store_module, "cache", _cache(client))
+    return client
+
+
+def _items(*ids):
+    return [HotItem(id=i, title=i, url=f"https://example.com/{i}", source="weibo") for i in ids]
+
+
+class TestBloomSize:
+    def test_size_from_capacity_and_fp_rate(self):
+        assert bloom_size(1000, 0.01) == (9586, 7)
+        bits, hashes = bloom_size(5000, 0.001)
+        assert bits // 8 < 10 * 1024
+        assert hashes == 10
+
+
+class TestPushDedupStore:
+    def test_first_fetch_detected_from_database(self, database, redis_client):
+        store = PushDedupStore()
+        assert store.filter_unpushed("weibo", ["a"])[1] is True
+        assert store.get_stats()["db_fallbacks"] == 1
+
+    def test_marked_items_found_in_bloom(self, database, redis_client, monkeypatch):
+        store = PushDedupStore(confirm=False)
+        store.mark_pushed("weibo", _items("a", "b"))
+        monkeypatch.setattr(database, "filter_unpushed_item_ids", None)
+        assert store.filter_unpushed("weibo", ["a", "b", "c"]) == (["c"], False)
+        assert database.get_pushed_item_ids("weibo") == {"a", "b"}
+
+    def test_false_positive_confirmed_by_database(self, database, redis_client):
+        store = PushDedupStore()
+        database.record_fetch("weibo", 1)
+        store.mark_pushed("weibo", _items("a"))
+        # 模拟误判：c 的所有位都已被置位
+        store._add("weibo", ["c"], dedup_store_module.time.time())
+
+        assert store.filter_unpushed("weibo", ["a", "c", "d"]) == (["c", "d"], False)
+        stats = store.get_stats()
+        assert stats["positives"] == 2
+        assert stats["false_positives"] == 1
+
+    def test_missing_buckets_resynced_from_database(self, database, redis_client, monkeypatch):
+        store = PushDedupStore()
+        database.record_fetch("weibo", 2)
+        database.mark_items_pushed("weibo", _items("a", "old"))
+        monkeypatch.setattr(database, "get_pushed_item_ids", None)
+        assert store.filter_unpushed("weibo", ["a", "b"]) == (["b"], False)
+        # 只回填候选中已推送的 a，并记录重建标记
+        assert set(redis_client.bitmaps) == {
+            store._bucket_keys("weibo", dedup_store_module.time.time())[0], "dedup:weibo:resync"
+        }
+        # 未回填的 old 在重建期间仍由数据库确认
+        assert store.filter_unpushed("weibo", ["old", "b"]) == (["b"], False)
+        assert store.get_stats()["db_fallbacks"] == 2
+
+    def test_bloom_used_after_resync_window(self, database, redis_client, monkeypatch):
+        store = PushDedupStore(confirm=False)
+        database.record_fetch("weibo", 2)
+        database.mark_items_pushed("weibo", _items("a"))
+        store.filter_unpushed("weibo", ["a", "b"])
+        del redis_client.bitmaps["dedup:weibo:resync"]
+        monkeypatch.setattr(database, "filter_unpushed_item_ids", None)
+        assert store.filter_unpushed("weibo", ["a", "b"]) == (["b"], False)
+        assert store.get_stats()["db_fallbacks"] == 1
+
+    def test_buckets_expire_after_retention_window(self, database, redis_client, monkeypatch):
+        store = PushDedupStore(retention_days=7)
+        now = 100 * BUCKET_SECONDS + 3600
+        monkeypatch.setattr(dedup_store_module.time, "time", lambda: now)
+        store.mark_pushed("weibo", _items("a"))
+        assert redis_client.expire_at == {"dedup:weibo:100": 108 * BUCKET_SECONDS}
+        # 再次写入同一个桶不会延长过期时间
+        now += 3600
+        store.mark_pushed("weibo", _items("b"))
+        assert redis_client.expire_at == {"dedup:weibo:100": 108 * BUCKET_SECONDS}
+        assert store._bucket_keys("weibo", 107 * BUCKET_SECONDS)[-1] == "dedup:weibo:100"
+
+    def test_memory_stats(self, database, redis_client):
+        store = PushDedupStore(capacity=1000, fp_rate=0.01)
+        store.mark_pushed("weibo", _items("a"))
+        store.mark_pushed("zhihu", _items("b"))
+        stats = store.get_stats()
+        assert stats["buckets"] == 2
+        assert 0 < stats["memory_bytes"] <= 2 * (9586 // 8 + 1)
+
+    def test_without_redis_uses_database(self, database, monkeypatch):
+        monkeypatch.setattr(dedup_store_module, "cache", _cache(None))
+        monkeypatch.setattr(dedup_store_module.cache, "enabled", False)
+        store = PushDedupStore()
+        database.record_fetch("weibo", 1)
+        store.mark_pushed("weibo", _items("a"))
+        assert store.filter_unpushed("weibo", ["a", "b"]) == (["b"], False)
+
+
+class TestCleanupOldRecords:
+    def test_removes_records_outside_retention(self, database):
+        database.mark_items_pushed("weibo", _items("a"))
+        with database.get_connection() as conn:
+            database._execute(conn, "UPDATE pushed_items SET pushed_at = '2000-01-01 00:00:00'")
+        database.mark_items_pushed("weibo", _items("b"))
+        database.cleanup_old_records(days=7)
+        assert database.get_pushed_item_ids("weibo") == {"b"}
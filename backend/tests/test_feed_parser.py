@@ -0,0 +1,65 @@
+"""
+Feed 解析池测试
+"""
+import threading
+import pytest
+from app.services import feed_parser as feed_parser_module
+from app.services.feed_parser import FeedParserPool
+from app.utils.metrics import metrics
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>hot</title>
+<item><title>第一条</title><link>https://example.com/1</link></item>
+</channel></rss>"""
+
+
+class TestFeedParserPool:
+    @pytest.mark.parametrize("mode", ["thread", "process", "inline"])
+    async def test_parse_modes(self, mode):
+        pool = FeedParserPool(mode=mode, workers=1)
+        try:
+            feed = await pool.parse(FEED, source="test")
+            assert feed.entries[0].title == "第一条"
+            assert feed.feed.title == "hot"
+        finally:
+            pool.shutdown()
+
+    async def test_thread_mode_runs_off_loop(self, monkeypatch):
+        threads = []
+        original = feed_parser_module.feedparser.parse
+
+        def parse(content):
+            threads.append(threading.current_thread().name)
+            return original(content)
+
+        monkeypatch.setattr(feed_parser_module.feedparser, "parse", parse)
+        pool = FeedParserPool(mode="thread", workers=1)
+        try:
+            await pool.parse(FEED)
+        finally:
+            pool.shutdown()
+        assert threads[0].startswith("hotpush-parse")
+
+    async def test_parse_time_recorded_per_source(self):
+        metrics.reset()
+        pool = FeedParserPool(mode="thread", workers=1)
+        try:
+            await pool.parse(FEED, source="weibo")
+            await pool.parse(FEED, source="weibo")
+        finally:
+            pool.shutdown()
+        assert metrics.get_histogram("feed_parse_ms", source="weibo")["count"] == 2
+        assert pool.get_stats()["in_flight"] == 0
+
+    @pytest.mark.parametrize("mode", ["thread", "process"])
+    async def test_run_executes_in_parse_thread(self, mode):
+        pool = FeedParserPool(mode=mode, workers=1)
+        try:
+            name = await pool.run(lambda: threading.current_thread().name)
+        finally:
+            pool.shutdown()
+        assert name.startswith("hotpush-parse")
+        assert pool.get_stats()["in_flight"] == 0
+
+    def test_unknown_mode_falls_back_to_thread(self):
+        assert FeedParserPool(mode="gpu").mode == "thread"
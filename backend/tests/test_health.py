@@ -15,3 +15,12 @@ async def test_health_check(client):
 async def test_root_returns_ok(client):
     response = await client.get("/")
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_instances_endpoint(client, admin_token):
+    response = await client.get("/api/instances", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    data = response.json()
+    assert sorted(data["route_order"]) == sorted(i["url"] for i in data["instances"])
+    assert "sticky" in data
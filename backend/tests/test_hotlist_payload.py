@@ -0,0 +1,157 @@
+"""
+热榜预序列化测试
+"""
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models.schemas import HotList, HotItem
+from app.routers import api
+from app.services.hotlist_payload import (
+    HotListPayload, PayloadRegistry, build_list_body, parse_accept_encoding,
+)
+
+
+def _hot_list(count=20):
+    return HotList(
+        source="weibo",
+        source_name="微博热搜",
+        items=[
+            HotItem(id=str(i), title=f"热点 {i}", url=f"https://example.com/{i}", source="weibo")
+            for i in range(count)
+        ],
+        updated_at=datetime(2026, 1, 1, 12, 0),
+    )
+
+
+class TestHotListPayload:
+    def test_json_matches_model(self):
+        hot_list = _hot_list()
+        payload = HotListPayload.build(hot_list)
+        assert json.loads(payload.json) == json.loads(hot_list.model_dump_json())
+        assert "热点 0".encode() in payload.json
+
+    def test_sse_frame(self):
+        payload = HotListPayload.build(_hot_list())
+        assert payload.sse_frame.startswith(b"event: hotlist\ndata: {")
+        assert payload.sse_frame.endswith(b"}\n\n")
+        assert payload.sse_frame.count(b"\n") == 3
+
+    def test_gzip_variant(self):
+        payload = HotListPayload.build(_hot_list())
+        assert gzip.decompress(payload.gzip) == payload.json
+        assert payload.encode("gzip, deflate") == (payload.gzip, "gzip")
+        assert payload.encode(None) == (payload.json, None)
+        assert payload.encode("gzip;q=0") == (payload.json, None)
+
+    def test_small_or_uncompressed_payload(self):
+        assert HotListPayload.build(_hot_list(count=0)).gzip is None
+        assert HotListPayload.build(_hot_list(), compress=False).gzip is None
+
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding("br;q=1.0, gzip;q=0.5, *;q=0") == {"br", "gzip"}
+        assert parse_accept_encoding("") == set()
+
+    def test_build_list_body(self):
+        payloads = [HotListPayload.build(_hot_list(count=1)) for _ in range(2)]
+        data = json.loads(build_list_body(payloads))
+        assert data["count"] == 2
+        assert data["data"][0]["source"] == "weibo"
+
+
+class TestPayloadRegistry:
+    def test_same_fetch_reuses_payload(self, monkeypatch):
+        registry = PayloadRegistry()
+        payload = registry.get(_hot_list())
+        assert payload.gzip is not None
+        # 从缓存数据重建的新对象（同一次抓取）不再序列化
+        monkeypatch.setattr(HotList, "model_dump_json", lambda self: (_ for _ in ()).throw(AssertionError))
+        assert registry.get(_hot_list()) is payload
+
+    def test_new_fetch_replaces_payload(self):
+        registry = PayloadRegistry()
+        old = registry.get(_hot_list())
+        new_list = _hot_list().model_copy(update={"updated_at": datetime(2026, 1, 1, 12, 5)})
+        new = registry.get(new_list)
+        assert new is not old
+        assert registry.get(new_list) is new
+
+    def test_discard(self):
+        registry = PayloadRegistry()
+        payload = registry.get(_hot_list())
+        registry.discard("weibo")
+        assert registry.get(_hot_list()) is not payload
+
+
+class TestHotEndpoints:
+    @pytest.fixture
+    def registry(self, monkeypatch):
+        registry = PayloadRegistry()
+        monkeypatch.setattr(api, "payload_registry", registry)
+        return registry
+
+    @pytest.fixture
+    def hot_list(self, monkeypatch, registry):
+        hot_list = _hot_list()
+
+        # 每次返回新对象，模拟无 Redis / 过期数据路径从缓存数据重建热榜
+        async def fetch_hot_list(source_id, **kwargs):
+            return _hot_list()
+
+        async def fetch_all_hot_lists(source_ids=None, **kwargs):
+            return [_hot_list()]
+
+        monkeypatch.setattr(api.rss_fetcher, "fetch_hot_list", fetch_hot_list)
+        monkeypatch.setattr(api.rss_fetcher, "fetch_all_hot_lists", fetch_all_hot_lists)
+        return hot_list
+
+    async def test_single_source_gzip(self, client, admin_token, hot_list):
+        response = await client.get(
+            "/api/hot/weibo",
+            headers={"Authorization": f"Bearer {admin_token}", "Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["items"][0]["title"] == "热点 0"
+        assert "unchanged" not in response.json()
+
+    async def test_rebuilt_lists_share_one_build(self, client, admin_token, hot_list, registry, monkeypatch):
+        headers = {"Authorization": f"Bearer {admin_token}", "Accept-Encoding": "gzip"}
+        first = await client.get("/api/hot/weibo", headers=headers)
+        monkeypatch.setattr(HotList, "model_dump_json", lambda self: (_ for _ in ()).throw(AssertionError))
+        second = await client.get("/api/hot/weibo", headers=headers)
+        assert second.headers["content-encoding"] == "gzip"
+        assert first.content == second.content
+
+    async def test_custom_source_gzip(self, client, admin_token, registry, monkeypatch):
+        custom = _hot_list().model_copy(update={"source": "custom_demo"})
+
+        async def get_custom_source(source_id):
+            return {"id": source_id, "name": "自定义", "url": "https://example.com/rss"}
+
+        async def fetch_custom_source(source_config):
+            return custom
+
+        monkeypatch.setattr(api.adb, "get_custom_source", get_custom_source)
+        monkeypatch.setattr(api.rss_fetcher, "fetch_custom_source", fetch_custom_source)
+        response = await client.get(
+            "/api/hot/custom_demo",
+            headers={"Authorization": f"Bearer {admin_token}", "Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json()["source"] == "custom_demo"
+
+    async def test_all_sources(self, client, admin_token, hot_list):
+        response = await client.get("/api/hot", headers={"Authorization": f"Bearer {admin_token}"})
+        data = response.json()
+        assert data["count"] == 1
+        assert len(data["data"][0]["items"]) == 20
+
+    async def test_stream_uses_prebuilt_frame(self, client, admin_token, hot_list):
+        response = await client.get(
+            "/api/hot/stream?sources=weibo", headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        assert HotListPayload.build(hot_list).sse_frame.decode() in response.text
@@ -0,0 +1,73 @@
+"""
+HTTP 客户端池测试
+"""
+import asyncio
+import httpx
+from app.services.http_pool import HTTPClientPool
+
+
+class TestHTTPClientPool:
+    def test_same_host_shares_client(self):
+        pool = HTTPClientPool("test")
+        a = pool.get_client("https://rsshub.app/weibo/search/hot")
+        b = pool.get_client("https://RSSHub.app/zhihu/hot")
+        c = pool.get_client("https://rsshub.rssforever.com/weibo/search/hot")
+        assert a is b
+        assert a is not c
+
+    async def test_close_recreates_client(self):
+        pool = HTTPClientPool("test")
+        client = pool.get_client("https://rsshub.app/a")
+        await pool.start()
+        assert pool.get_stats()["started"] is True
+        await pool.close()
+        assert client.is_closed
+        assert pool.get_client("https://rsshub.app/a") is not client
+        await pool.close()
+
+    async def test_stats_count_requests(self):
+        pool = HTTPClientPool("test", http2=False)
+        client = pool.get_client("https://example.com/feed")
+        client._transport = httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+        await client.get("https://example.com/feed")
+        pool.record_error("https://example.com/feed")
+        stats = pool.get_stats()["hosts"]["https://example.com"]
+        assert stats["requests"] == 1
+        assert stats["responses"] == 1
+        assert stats["errors"] == 1
+        await pool.close()
+
+    async def test_proxy_gets_separate_client(self):
+        pool = HTTPClientPool("test")
+        direct = pool.get_client("https://api.telegram.org/bot1/sendMessage")
+        proxied = pool.get_client("https://api.telegram.org/bot1/sendMessage", proxy="http://user:pw@proxy:8080")
+        assert direct is not proxied
+        assert pool.get_client("https://api.telegram.org/x", proxy="http://user:pw@proxy:8080") is proxied
+        # 统计信息中不暴露代理账号密码
+        hosts = pool.get_stats()["hosts"]
+        assert "https://api.telegram.org via http://proxy:8080" in hosts
+        assert not any("pw" in key for key in hosts)
+        await pool.close()
+
+    async def test_retain_closes_only_stale_clients(self):
+        pool = HTTPClientPool("test")
+        keep = pool.get_client("https://oapi.dingtalk.com/robot/send")
+        stale = pool.get_client("https://open.feishu.cn/hook/a")
+        closed = pool.retain({HTTPClientPool.client_key("https://oapi.dingtalk.com/robot/send")})
+        assert closed == 1
+        await asyncio.sleep(0.01)
+        assert stale.is_closed
+        assert not keep.is_closed
+        assert pool.get_client("https://oapi.dingtalk.com/robot/send") is keep
+        await pool.close()
+
+    async def test_retain_defers_close_until_lease_released(self):
+        pool = HTTPClientPool("test")
+        async with pool.lease("https://open.feishu.cn/hook/a") as client:
+            assert pool.retain(set()) == 1
+            await asyncio.sleep(0.01)
+            assert not client.is_closed
+            # 新请求使用新的客户端
+            assert pool.get_client("https://open.feishu.cn/hook/a") is not client
+        assert client.is_closed
+        await pool.close()
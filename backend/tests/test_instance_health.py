@@ -0,0 +1,154 @@
+"""
+RSSHub 实例健康度测试
+"""
+import threading
+from app.services import instance_health as instance_health_module
+from app.services.instance_health import InstanceHealthRegistry, CLOSED, OPEN, HALF_OPEN
+
+A = "https://a.test"
+B = "https://b.test"
+C = "https://c.test"
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        registry = InstanceHealthRegistry(failure_threshold=3, open_seconds=60)
+        for _ in range(2):
+            registry.record_failure(A)
+        assert registry._get(A).state(60) == CLOSED
+        registry.record_failure(A)
+        assert registry._get(A).state(60) == OPEN
+
+    def test_half_open_probe(self):
+        registry = InstanceHealthRegistry(failure_threshold=1, open_seconds=60)
+        registry.record_failure(A)
+        health = registry._get(A)
+        health.opened_at -= 61
+        assert health.state(60) == HALF_OPEN
+        # 半开试探失败，重新熔断
+        registry.record_failure(A)
+        assert health.state(60) == OPEN
+        health.opened_at -= 61
+        registry.record_success(A, 0.1)
+        assert health.state(60) == CLOSED
+
+    def test_single_half_open_probe(self):
+        registry = InstanceHealthRegistry(failure_threshold=1, open_seconds=60)
+        registry.record_failure(A)
+        registry._get(A).opened_at -= 61
+        assert registry.is_half_open(A)
+        assert registry.acquire_probe(A) is True
+        assert registry.acquire_probe(A) is False
+        # 试探进行中按熔断排序
+        assert registry.get_stats([A])["instances"][0]["state"] == OPEN
+        registry.release_probe(A)
+        assert registry.acquire_probe(A) is True
+
+
+class TestRouting:
+    def test_unknown_instances_keep_configured_order(self):
+        registry = InstanceHealthRegistry()
+        assert registry.route([A, B, C]) == [A, B, C]
+
+    def test_healthy_fast_instances_first(self):
+        registry = InstanceHealthRegistry(failure_threshold=2)
+        registry.record_failure(A)
+        registry.record_failure(A)
+        registry.record_success(B, 2.0)
+        registry.record_success(C, 0.1)
+        # 熔断打开的 A 不参与路由
+        assert registry.route([A, B, C]) == [C, B]
+
+    def test_open_instance_rejoins_when_probe_slot_free(self):
+        registry = InstanceHealthRegistry(failure_threshold=1, open_seconds=60)
+        registry.record_failure(A)
+        assert registry.route([A, B]) == [B]
+        registry._get(A).opened_at -= 61
+        assert registry.route([A, B]) == [B, A]
+        # 试探进行中不再分配请求
+        registry.acquire_probe(A)
+        assert registry.route([A, B]) == [B]
+        assert registry.route([A]) == []
+
+    def test_low_success_rate_ranks_lower(self):
+        registry = InstanceHealthRegistry(failure_threshold=100)
+        for _ in range(5):
+            registry.record_success(A, 0.1)
+            registry.record_failure(A)
+            registry.record_success(B, 0.5)
+        assert registry.route([A, B]) == [B, A]
+
+    def test_sticky_source_prefers_last_successful_instance(self):
+        registry = InstanceHealthRegistry()
+        registry.record_success(B, 1.0, source_id="weibo")
+        registry.record_success(A, 0.1, source_id="weibo")
+        registry.record_success(B, 1.0, source_id="weibo")
+        assert registry.route([A, B], "weibo") == [B, A]
+        # 非 sticky 源不受影响
+        registry.record_success(B, 1.0, source_id="zhihu")
+        assert registry.route([A, B], "zhihu") == [A, B]
+
+    def test_stats(self):
+        registry = InstanceHealthRegistry()
+        registry.record_success(A, 0.2)
+        registry.record_failure(A, "timeout")
+        stats = registry.get_stats([A])["instances"][0]
+        assert stats["success_rate"] == 0.5
+        assert stats["last_error"] == "timeout"
+        assert stats["state"] == CLOSED
+
+
+class _FakeCache:
+    """记录调用线程的共享状态存储"""
+
+    def __init__(self):
+        self.health = {}
+        self.sticky = {}
+        self.threads = set()
+
+    def is_available(self):
+        return True
+
+    def get_instance_health(self, urls):
+        self.threads.add(threading.current_thread().name)
+        return {url: self.health[url] for url in urls if url in self.health}
+
+    def set_instance_health(self, url, data):
+        self.threads.add(threading.current_thread().name)
+        self.health[url] = data
+
+    def get_sticky_instances(self):
+        return dict(self.sticky)
+
+    def set_sticky_instance(self, source, url):
+        self.sticky[source] = url
+
+
+class TestSharedState:
+    async def test_sync_runs_off_event_loop(self, monkeypatch):
+        fake = _FakeCache()
+        monkeypatch.setattr(instance_health_module, "cache", fake)
+        registry = InstanceHealthRegistry()
+        registry.record_success(A, 0.2, source_id="weibo")
+        # 记录结果只修改进程内状态
+        assert fake.health == {}
+
+        await registry.sync([A, B])
+        assert fake.health[A]["latency_ewma"] == 0.2
+        assert fake.sticky == {"weibo": A}
+        assert threading.current_thread().name not in fake.threads
+
+    async def test_sync_loads_newer_remote_state(self, monkeypatch):
+        fake = _FakeCache()
+        monkeypatch.setattr(instance_health_module, "cache", fake)
+        other = InstanceHealthRegistry(failure_threshold=1)
+        other.record_failure(B, "timeout")
+        fake.health[B] = other._get(B).to_dict()
+
+        registry = InstanceHealthRegistry()
+        await registry.sync([A, B])
+        assert registry.route([B, A]) == [A]
+        # 同步间隔内不重复读写
+        fake.health.clear()
+        await registry.sync([A, B])
+        assert fake.health == {}
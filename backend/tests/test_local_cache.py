@@ -0,0 +1,78 @@
+"""
+进程内热榜缓存测试
+"""
+import time
+from datetime import datetime
+
+from app.models.schemas import HotList, HotItem
+from app.services import local_cache as local_cache_module
+from app.services.hotlist_payload import PayloadRegistry
+from app.services.local_cache import LocalHotListCache
+
+
+def _hot_list(source="weibo"):
+    return HotList(
+        source=source,
+        source_name="微博热搜",
+        items=[HotItem(id="1", title="热点", url="https://example.com/1", source=source)],
+        updated_at=datetime(2026, 1, 1),
+    )
+
+
+class TestLocalHotListCache:
+    def test_get_and_set(self):
+        local_cache = LocalHotListCache(maxsize=4, ttl=30)
+        hot_list = _hot_list()
+        local_cache.set("weibo", hot_list)
+        assert local_cache.get("weibo") is hot_list
+        assert local_cache.get("zhihu") is None
+        stats = local_cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    def test_lru_eviction(self):
+        local_cache = LocalHotListCache(maxsize=2, ttl=30)
+        local_cache.set("a", _hot_list("a"))
+        local_cache.set("b", _hot_list("b"))
+        local_cache.get("a")
+        local_cache.set("c", _hot_list("c"))
+        assert local_cache.get("b") is None
+        assert local_cache.get("a") is not None
+        assert local_cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        local_cache = LocalHotListCache(maxsize=4, ttl=30)
+        local_cache.set("weibo", _hot_list())
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+        assert local_cache.get("weibo") is None
+
+    def test_max_age_uses_redis_write_time(self):
+        local_cache = LocalHotListCache(maxsize=4, ttl=30)
+        local_cache.set("weibo", _hot_list(), cached_at=time.time() - 290)
+        assert local_cache.get("weibo", max_age=300) is not None
+        assert local_cache.get("weibo", max_age=280) is None
+
+    def test_disabled(self):
+        local_cache = LocalHotListCache(maxsize=0, ttl=30)
+        local_cache.set("weibo", _hot_list())
+        assert local_cache.get("weibo") is None
+
+    def test_set_prebuilds_payload(self, monkeypatch):
+        registry = PayloadRegistry()
+        monkeypatch.setattr(local_cache_module, "payload_registry", registry)
+        local_cache = LocalHotListCache(maxsize=4, ttl=30)
+        hot_list = _hot_list()
+        local_cache.set("weibo", hot_list)
+        monkeypatch.setattr(HotList, "model_dump_json", lambda self: (_ for _ in ()).throw(AssertionError))
+        payload = registry.get(_hot_list())
+        assert payload is registry.get(hot_list)
+        assert b'"source":"weibo"' in payload.json
+
+    def test_invalidation_from_other_worker(self):
+        local_cache = LocalHotListCache(maxsize=4, ttl=30)
+        local_cache.set("weibo", _hot_list())
+        local_cache._on_message({"source": "weibo", "origin": local_cache.worker_id})
+        assert local_cache.get("weibo") is not None
+        local_cache._on_message({"source": "weibo", "origin": "other"})
+        assert local_cache.get("weibo") is None
+        assert local_cache.get_stats()["invalidations"] == 1
@@ -0,0 +1,22 @@
+"""
+运行时指标测试
+"""
+from app.utils.metrics import Metrics
+
+
+class TestMetrics:
+    def test_counters_aggregate_by_labels(self):
+        m = Metrics()
+        m.incr("feed_fetch", source="weibo", result="parsed")
+        m.incr("feed_fetch", source="weibo", result="parsed")
+        m.incr("feed_fetch", result="parsed", source="zhihu")
+        assert m.get_counter("feed_fetch", source="weibo", result="parsed") == 2
+        assert m.get_counter("feed_fetch") == 3
+        assert m.get_counter("missing") == 0
+
+    def test_stats_export(self):
+        m = Metrics()
+        m.incr("feed_fetch", source="weibo")
+        stats = m.get_stats()
+        assert stats["counters"]["feed_fetch"]["total"] == 1
+        assert stats["counters"]["feed_fetch"]["series"] == [{"labels": {"source": "weibo"}, "value": 1}]
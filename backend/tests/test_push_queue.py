@@ -0,0 +1,177 @@
+"""
+推送队列测试
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.models.schemas import HotItem, PushChannel, PushMessage
+from app.services import push_queue as push_queue_module
+from app.services.database import Database, AsyncDatabase
+from app.services.push_queue import PushQueue, TokenBucket
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    database = Database(f"sqlite:///{tmp_path / 'hotpush.db'}")
+    adb = AsyncDatabase(database, max_workers=2)
+    monkeypatch.setattr(push_queue_module, "db", database)
+    monkeypatch.setattr(push_queue_module, "adb", adb)
+    yield database
+    adb.shutdown()
+    database.close()
+
+
+class _FakePushService:
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.calls = []
+
+    def get_configured_channels(self):
+        return [PushChannel.TELEGRAM, PushChannel.DINGTALK]
+
+    async def push_to_channel_timed(self, channel, message):
+        self.calls.append((channel.value, message.title))
+        success = self.results.get(channel.value, True)
+        return {"success": success, "latency_ms": 5, "error": None if success else "HTTP 500"}
+
+
+@pytest.fixture
+def push_service(monkeypatch):
+    service = _FakePushService()
+    monkeypatch.setattr(push_queue_module, "push_service", service)
+    return service
+
+
+def _message(title="热榜更新"):
+    return PushMessage(
+        title=title,
+        content="测试",
+        source="combined",
+        items=[HotItem(id="1", title="新闻", url="https://example.com/1", source="weibo")],
+    )
+
+
+class TestTokenBucket:
+    def test_capacity_and_refill(self):
+        bucket = TokenBucket(2, 1)
+        asyncio.run(bucket.acquire())
+        asyncio.run(bucket.acquire())
+        assert bucket.available() is False
+        assert 0 < bucket.wait_time() <= 0.5
+
+        bucket._updated -= 0.5
+        assert bucket.available() is True
+
+
+class TestEnqueue:
+    def test_one_job_per_configured_channel(self, database, push_service):
+        queue = PushQueue()
+        assert sorted(queue.enqueue_sync(_message(), idempotency_key="k1")) == ["dingtalk", "telegram"]
+
+        jobs = database.get_push_queue(status="pending")
+        assert {job["idempotency_key"] for job in jobs} == {"k1:telegram", "k1:dingtalk"}
+        assert jobs[0]["item_count"] == 1
+        assert PushMessage.model_validate_json(jobs[0]["payload"]).title == "热榜更新"
+
+    def test_idempotency_key_deduplicates(self, database, push_service):
+        queue = PushQueue()
+        queue.enqueue_sync(_message(), channels=["telegram"], idempotency_key="digest:2024-01-01:08:00")
+        assert queue.enqueue_sync(_message(), channels=["telegram"], idempotency_key="digest:2024-01-01:08:00") == []
+        assert database.get_push_queue_counts() == {"pending": 1}
+
+    def test_without_key_always_enqueues(self, database, push_service):
+        queue = PushQueue()
+        queue.enqueue_sync(_message(), channels=["telegram"])
+        queue.enqueue_sync(_message(), channels=["telegram"])
+        assert database.get_push_queue_counts() == {"pending": 2}
+
+
+class TestDelivery:
+    async def test_success_marks_sent_and_records_history(self, database, push_service):
+        queue = PushQueue()
+        queue.enqueue_sync(_message(), channels=["telegram"], idempotency_key="k")
+
+        assert await queue.run_once() is True
+        assert await queue.run_once() is False
+        assert push_service.calls == [("telegram", "热榜更新")]
+        assert database.get_push_queue_counts() == {"sent": 1}
+        history = database.get_push_history()
+        assert history[0]["status"] == "success"
+        assert history[0]["latency_ms"] == 5
+
+    async def test_failure_retries_with_backoff(self, database, push_service):
+        push_service.results["telegram"] = False
+        queue = PushQueue(max_attempts=3, base_delay=60)
+        queue.enqueue_sync(_message(), channels=["telegram"], idempotency_key="k")
+
+        assert await queue.run_once() is True
+        job = database.get_push_queue()[0]
+        assert job["status"] == "pending"
+        assert job["attempts"] == 1
+        assert job["last_error"] == "HTTP 500"
+        assert datetime.fromisoformat(job["next_attempt_at"]) > datetime.now() + timedelta(seconds=25)
+        # 未到重试时间
+        assert await queue.run_once() is False
+        assert database.get_push_history() == []
+
+    async def test_dead_letter_after_max_attempts(self, database, push_service):
+        push_service.results["telegram"] = False
+        queue = PushQueue(max_attempts=2, base_delay=0)
+        queue.enqueue_sync(_message(), channels=["telegram"], idempotency_key="k")
+
+        assert await queue.run_once() is True
+        assert await queue.run_once() is True
+        job = database.get_push_queue(status="dead")[0]
+        assert job["attempts"] == 2
+        assert database.get_push_history()[0]["status"] == "failed"
+
+        # 死信重新入队后再次发送
+        push_service.results["telegram"] = True
+        assert database.requeue_push(job["id"]) is True
+        assert await queue.run_once() is True
+        assert database.get_push_queue_counts() == {"sent": 1}
+
+    async def test_rate_limited_channel_does_not_block_others(self, database, push_service):
+        queue = PushQueue(rate_limits={"telegram": (1, 60)})
+        queue.enqueue_sync(_message("a"), channels=["telegram"])
+        queue.enqueue_sync(_message("b"), channels=["telegram"])
+        queue.enqueue_sync(_message("c"), channels=["dingtalk"])
+
+        for _ in range(3):
+            await queue.run_once()
+        assert sorted(push_service.calls) == [("dingtalk", "c"), ("telegram", "a")]
+        assert database.get_push_queue_counts() == {"pending": 1, "sent": 2}
+
+    def test_jobs_of_same_message_share_parsed_message(self):
+        queue = PushQueue()
+        payload = _message().model_dump_json()
+        assert queue._load_message(payload) is queue._load_message(payload)
+
+    def test_claim_is_exclusive(self, database):
+        database.enqueue_pushes([{"idempotency_key": "k:telegram", "channel": "telegram", "payload": "{}"}])
+        assert database.claim_due_push() is not None
+        assert database.claim_due_push() is None
+
+    def test_reset_stuck_jobs(self, database):
+        database.enqueue_pushes([{"idempotency_key": "k:telegram", "channel": "telegram", "payload": "{}"}])
+        database.claim_due_push()
+        assert database.reset_stuck_pushes(datetime.now() - timedelta(minutes=5)) == 0
+        assert database.reset_stuck_pushes(datetime.now() + timedelta(seconds=1)) == 1
+        assert database.get_push_queue_counts() == {"pending": 1}
+
+
+class TestWorkers:
+    async def test_notify_wakes_worker(self, database, push_service):
+        queue = PushQueue(workers=1, poll_interval=30)
+        queue.start()
+        try:
+            await asyncio.sleep(0.05)
+            await push_queue_module.adb.run(queue.enqueue_sync, _message(), ["telegram"], None)
+            queue.notify()
+            deadline = time.monotonic() + 2
+            while not push_service.calls and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+        assert push_service.calls == [("telegram", "热榜更新")]
@@ -0,0 +1,99 @@
+"""
+推送消息渲染测试
+"""
+from app.models.schemas import HotItem, PushMessage
+from app.services import push_render
+from app.services.push_render import (
+    TELEGRAM_MAX_LENGTH,
+    get_view,
+    md_strip,
+    parse_summary,
+    render,
+)
+
+
+def _combined(count=4, ai_summary=None):
+    items = [
+        HotItem(
+            id=str(i),
+            title=f"[{'微博' if i % 2 else '知乎'}] 标题{i}",
+            url=f"https://example.com/{i}",
+            source="weibo" if i % 2 else "zhihu",
+        )
+        for i in range(count)
+    ]
+    return PushMessage(title="🔥 热榜更新", content="", source="combined", items=items, ai_summary=ai_summary)
+
+
+class TestParseSummary:
+    def test_line_kinds(self):
+        lines = parse_summary("# 总览\n## 科技\n### 小节\n---\n\n**重点** <b>")
+        assert [kind for kind, _ in lines] == ["h1", "h2", "h3", "hr", "blank", "text"]
+        assert lines[0][1] == "总览"
+        assert lines[-1][1] == "**重点** &lt;b&gt;"
+
+    def test_md_strip(self):
+        assert md_strip("## 标题\n**加粗** 文本\n---") == "标题\n加粗 文本\n─────────"
+
+
+class TestMessageView:
+    def test_groups_by_source_and_strips_prefix(self):
+        view = get_view(_combined())
+        assert [name for name, _ in view.groups] == ["知乎", "微博"]
+        assert view.groups[0][1][0] == ("标题0", "https://example.com/0")
+
+    def test_plain_message_limited_to_ten_items(self):
+        items = [HotItem(id=str(i), title=f"t{i}", url="https://e.com", source="weibo") for i in range(20)]
+        view = get_view(PushMessage(title="微博", content="", source="weibo", items=items))
+        assert view.grouped is False
+        assert len(view.items) == 10
+
+
+class TestRender:
+    def test_markdown(self):
+        text = render(_combined(2, ai_summary="**摘要**"), "markdown")
+        assert text.startswith("### 🔥 热榜更新\n\n**摘要**\n")
+        assert "\n**📌 知乎**\n\n1. [标题0](https://example.com/0)" in text
+
+    def test_telegram_summary_html(self):
+        texts = render(_combined(2, ai_summary="## 科技\n**重点** & 更多"), "telegram")
+        assert "\n<b>科技</b>\n<b>重点</b> &amp; 更多" in texts[0]
+
+    def test_telegram_splits_long_messages(self):
+        items = [
+            HotItem(id=str(i), title="[微博] " + "长" * 50, url=f"https://example.com/{i}" + "x" * 40, source="weibo")
+            for i in range(50)
+        ]
+        message = PushMessage(title="摘要", content="", source="digest", items=items)
+        texts = render(message, "telegram")
+        assert len(texts) > 1
+        assert all(len(text) <= TELEGRAM_MAX_LENGTH for text in texts)
+        assert texts[1].startswith("<b>摘要（续）</b>")
+
+    def test_feishu_and_email(self):
+        message = _combined(2, ai_summary="# 总览\n**重点**")
+        content = render(message, "feishu")
+        assert content[0] == [{"tag": "text", "text": "总览\n重点\n\n"}]
+        html = render(message, "email")
+        assert "<strong>重点</strong><br>" in html
+        assert "聚合推送 | 由 HotPush 推送" in html
+
+    def test_results_cached_per_format(self, monkeypatch):
+        calls = []
+        original = push_render.RENDERERS["markdown"]
+        monkeypatch.setitem(push_render.RENDERERS, "markdown", lambda view: calls.append(1) or original(view))
+
+        message = _combined()
+        assert render(message, "markdown") is render(message, "markdown")
+        assert len(calls) == 1
+
+    def test_copy_is_rendered_again(self):
+        message = _combined()
+        render(message, "markdown")
+        copy = message.model_copy(update={"title": "新标题"})
+        assert render(copy, "markdown").startswith("### 新标题")
+
+    def test_cache_not_serialized(self):
+        message = _combined()
+        render(message, "markdown")
+        assert "_render_view" not in message.model_dump_json()
@@ -1,8 +1,16 @@
 """
 推送服务测试
 """
-from app.models.schemas import PushChannel
+import asyncio
+import time
+import httpx
+import pytest
+from app.config import settings
+from app.models.schemas import PushChannel, PushMessage
+from app.services import push_service as push_service_module
+from app.services.http_pool import HTTPClientPool
 from app.services.push_service import (
+    BasePusher,
     PushService,
     TelegramPusher,
     DiscordPusher,
@@ -59,3 +67,130 @@ class TestPusherConfiguration:
         configured = service.get_configured_channels()
         for ch in configured:
             assert service.pushers[ch].is_configured() is True
+
+
+class _SlowPusher(BasePusher):
+    """按指定耗时返回结果的测试推送器"""
+
+    def __init__(self, delay: float, result: bool = True):
+        super().__init__()
+        self.delay = delay
+        self.result = result
+
+    def is_configured(self) -> bool:
+        return True
+
+    async def push(self, message: PushMessage) -> bool:
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+class TestConcurrentPush:
+    @pytest.fixture
+    def message(self):
+        return PushMessage(title="t", content="c", source="weibo", items=[])
+
+    def _service(self, delays):
+        service = PushService()
+        service.pushers = {channel: _SlowPusher(delay) for channel, delay in delays.items()}
+        return service
+
+    async def test_channels_pushed_concurrently(self, message):
+        service = self._service({PushChannel.TELEGRAM: 0.1, PushChannel.DISCORD: 0.1, PushChannel.WECOM: 0.1})
+        start = time.perf_counter()
+        results = await service.push_to_all(message)
+        assert time.perf_counter() - start < 0.25
+        assert results == {"telegram": True, "discord": True, "wecom": True}
+
+    async def test_slow_channel_times_out(self, message, monkeypatch):
+        monkeypatch.setattr(settings, "push_channel_timeout", 0.05)
+        service = self._service({PushChannel.TELEGRAM: 1, PushChannel.DISCORD: 0})
+        results = await service.push_to_all_detailed(message)
+        assert results["telegram"]["success"] is False
+        assert "超时" in results["telegram"]["error"]
+        assert results["discord"]["success"] is True
+        assert results["discord"]["latency_ms"] < 50
+
+    async def test_global_deadline_cancels_pending_channels(self, message, monkeypatch):
+        monkeypatch.setattr(settings, "push_channel_timeout", 10)
+        monkeypatch.setattr(settings, "push_deadline", 0.05)
+        service = self._service({PushChannel.TELEGRAM: 1, PushChannel.DISCORD: 0})
+        start = time.perf_counter()
+        results = await service.push_to_all(message)
+        assert time.perf_counter() - start < 0.5
+        assert results == {"telegram": False, "discord": True}
+
+
+class TestPushHTTPClients:
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        pool = HTTPClientPool("push-test")
+        monkeypatch.setattr(push_service_module, "push_http_pool", pool)
+        return pool
+
+    async def test_pushers_reuse_client(self, pool):
+        pusher = DiscordPusher()
+        pusher.set_config({"webhook_url": "https://discord.com/api/webhooks/1"})
+        requests = []
+        client = pusher.get_client(pusher.webhook_url)
+        client._transport = httpx.MockTransport(lambda request: requests.append(request) or httpx.Response(204))
+        message = PushMessage(title="t", content="c", source="weibo", items=[])
+        assert await pusher.push(message) is True
+        assert await pusher.push(message) is True
+        assert len(requests) == 2
+        assert pusher.get_client(pusher.webhook_url) is client
+        await pool.close()
+
+    async def test_refresh_config_rebuilds_only_changed_clients(self, pool, monkeypatch):
+        service = PushService()
+        configs = {
+            "discord": {"webhook_url": "https://discord.com/api/webhooks/1"},
+            "feishu": {"webhook_url": "https://open.feishu.cn/hook/a"},
+        }
+        monkeypatch.setattr(service, "_load_config", lambda: [
+            pusher.set_config(configs.get(channel.value, {})) for channel, pusher in service.pushers.items()
+        ])
+        service.refresh_config()
+        discord = service.pushers[PushChannel.DISCORD]
+        feishu = service.pushers[PushChannel.FEISHU]
+        discord_client = discord.get_client(discord.webhook_url)
+        feishu_client = feishu.get_client(feishu.webhook_url)
+
+        configs["feishu"] = {"webhook_url": "https://open.larksuite.com/hook/b"}
+        service.refresh_config()
+        await asyncio.sleep(0.01)
+        assert feishu_client.is_closed
+        assert not discord_client.is_closed
+        assert discord.get_client(discord.webhook_url) is discord_client
+        await pool.close()
+
+    async def test_refresh_config_waits_for_in_flight_push(self, pool, monkeypatch):
+        service = PushService()
+        configs = {"feishu": {"webhook_url": "https://open.feishu.cn/hook/a"}}
+        monkeypatch.setattr(service, "_load_config", lambda: [
+            pusher.set_config(configs.get(channel.value, {})) for channel, pusher in service.pushers.items()
+        ])
+        service.refresh_config()
+        feishu = service.pushers[PushChannel.FEISHU]
+        client = feishu.get_client(feishu.webhook_url)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def handler(request):
+            started.set()
+            await release.wait()
+            return httpx.Response(200, json={})
+
+        client._transport = httpx.MockTransport(handler)
+        push = asyncio.create_task(feishu.push(PushMessage(title="t", content="c", source="weibo", items=[])))
+        await started.wait()
+
+        configs["feishu"] = {"webhook_url": "https://open.larksuite.com/hook/b"}
+        service.refresh_config()
+        await asyncio.sleep(0.01)
+        assert not client.is_closed
+
+        release.set()
+        assert await push is True
+        assert client.is_closed
+        await pool.close()
@@ -0,0 +1,539 @@
+"""
+RSS 抓取服务测试
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from app.services import dedup_store as dedup_store_module
+from app.services import rss_fetcher as rss_fetcher_module
+from app.services.rss_fetcher import RSSFetcher
+from app.services.instance_health import InstanceHealthRegistry
+from app.services.local_cache import LocalHotListCache
+from app.services.database import Database
+from app.models.schemas import HotItem
+from app.utils.metrics import metrics
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>hot</title>
+<item><title>第一条</title><link>https://example.com/1</link></item>
+<item><title>第二条</title><link>https://example.com/2</link></item>
+</channel></rss>"""
+
+
+class _Upstream:
+    """模拟 RSSHub 实例，etag 为 None 时不支持条件请求"""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.body = FEED
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.etag and request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304)
+        headers = {"ETag": self.etag} if self.etag else {}
+        return httpx.Response(200, text=self.body, headers=headers)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = _Upstream()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+
+    snapshots = []
+
+    async def save_snapshot(source_id, items):
+        snapshots.append(source_id)
+
+    monkeypatch.setattr(rss_fetcher_module.adb, "save_snapshot", save_snapshot)
+    upstream.snapshots = snapshots
+    return upstream
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    registry = InstanceHealthRegistry(failure_threshold=3, open_seconds=60)
+    monkeypatch.setattr(rss_fetcher_module, "instance_health", registry)
+    return registry
+
+
+@pytest.fixture(autouse=True)
+def local_cache(monkeypatch):
+    local_cache = LocalHotListCache(maxsize=16, ttl=30)
+    monkeypatch.setattr(rss_fetcher_module, "hotlist_cache", local_cache)
+    return local_cache
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = RSSFetcher()
+    fetcher.instances = ["https://rsshub.test"]
+    return fetcher
+
+
+class TestConditionalGet:
+    async def test_not_modified_reuses_previous_list(self, fetcher, upstream):
+        first = await fetcher.fetch_hot_list("weibo")
+        assert first.unchanged is False
+        assert len(first.items) == 2
+        assert "if-none-match" not in upstream.requests[0].headers
+
+        second = await fetcher.fetch_hot_list("weibo")
+        assert upstream.requests[1].headers["if-none-match"] == '"v1"'
+        assert second.unchanged is True
+        assert [i.id for i in second.items] == [i.id for i in first.items]
+        assert second.updated_at == first.updated_at
+        # 304 时不再保存快照
+        assert upstream.snapshots == ["weibo"]
+
+    async def test_changed_feed_is_parsed_again(self, fetcher, upstream):
+        await fetcher.fetch_hot_list("weibo")
+        upstream.etag = '"v2"'
+        upstream.body = FEED.replace("第二条", "第三条")
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert hot_list.unchanged is False
+        assert upstream.snapshots == ["weibo", "weibo"]
+
+    async def test_state_restored_from_database(self, fetcher, upstream, tmp_path, monkeypatch):
+        database = Database(f"sqlite:///{tmp_path / 'hotpush.db'}")
+        monkeypatch.setattr(rss_fetcher_module, "db", database)
+        try:
+            database.save_snapshot("weibo", [HotItem(id="a", title="第一条", url="https://example.com/1", source="weibo")])
+            database.record_fetch("weibo", 1, "hash", '"v1"')
+            hot_list = await fetcher.fetch_hot_list("weibo")
+            assert upstream.requests[0].headers["if-none-match"] == '"v1"'
+            assert hot_list.unchanged is True
+            assert [(item.id, item.title) for item in hot_list.items] == [("a", "第一条")]
+            assert upstream.snapshots == []
+        finally:
+            database.close()
+
+    async def test_unchanged_flag_not_serialized(self, fetcher, upstream):
+        await fetcher.fetch_hot_list("weibo")
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert "unchanged" not in hot_list.model_dump()
+
+
+class TestContentHash:
+    async def test_same_body_skips_parsing(self, fetcher, upstream, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "feed_stream_parse", False)
+        upstream.etag = None
+        metrics.reset()
+        first = await fetcher.fetch_hot_list("weibo")
+
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("feed should not be parsed again")
+
+        monkeypatch.setattr(rss_fetcher_module.feedparser, "parse", fail_parse)
+        second = await fetcher.fetch_hot_list("weibo")
+        assert second.unchanged is True
+        assert second.updated_at == first.updated_at
+        assert upstream.snapshots == ["weibo"]
+        assert metrics.get_counter("feed_fetch", source="weibo", result="parsed") == 1
+        assert metrics.get_counter("feed_fetch", source="weibo", result="content_unchanged") == 1
+
+    @pytest.mark.parametrize("stream", [True, False])
+    async def test_changed_body_is_parsed(self, fetcher, upstream, monkeypatch, stream):
+        monkeypatch.setattr(rss_fetcher_module.settings, "feed_stream_parse", stream)
+        upstream.etag = None
+        await fetcher.fetch_hot_list("weibo")
+        upstream.body = FEED.replace("第二条", "第三条")
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert hot_list.unchanged is False
+        assert hot_list.items[1].title == "第三条"
+
+    async def test_same_entries_skip_snapshot_in_stream_mode(self, fetcher, upstream, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "feed_stream_parse", True)
+        upstream.etag = None
+        await fetcher.fetch_hot_list("weibo")
+        # 频道级字段变化不影响条目哈希
+        upstream.body = FEED.replace("<title>hot</title>", "<title>hot list</title>")
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert hot_list.unchanged is True
+        assert upstream.snapshots == ["weibo"]
+
+
+class TestStreamParsing:
+    @pytest.mark.parametrize("stream", [True, False])
+    async def test_items_without_link_get_distinct_ids(self, fetcher, upstream, monkeypatch, stream):
+        monkeypatch.setattr(rss_fetcher_module.settings, "feed_stream_parse", stream)
+        upstream.body = FEED.replace("<link>https://example.com/1</link>", "").replace(
+            "<link>https://example.com/2</link>", ""
+        )
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert [item.title for item in hot_list.items] == ["第一条", "第二条"]
+        assert hot_list.items[0].id != hot_list.items[1].id
+        assert hot_list.items[0].url == ""
+
+    async def test_chunks_parsed_in_parse_pool(self, fetcher, upstream, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "feed_stream_parse", True)
+        calls = []
+        original = rss_fetcher_module.feed_parser.run
+
+        async def run(func, *args):
+            calls.append(func.__name__)
+            return await original(func, *args)
+
+        monkeypatch.setattr(rss_fetcher_module.feed_parser, "run", run)
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert len(hot_list.items) == 2
+        assert calls[0] == "feed"
+
+    async def test_stops_reading_after_item_limit(self, fetcher, monkeypatch):
+        fetcher.MAX_ITEMS = 3
+        sent = []
+
+        async def body():
+            yield b'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>t</title>'
+            for i in range(1000):
+                sent.append(i)
+                yield f"<item><title>{i}</title><link>https://example.com/{i}</link></item>".encode()
+            yield b"</channel></rss>"
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+
+        feed, _ = await fetcher.fetch_feed("/test", "test")
+        assert [e.title for e in feed.entries] == ["0", "1", "2"]
+        assert len(sent) < 10
+
+    async def test_falls_back_to_feedparser_for_non_utf8(self, fetcher, monkeypatch):
+        content = FEED.replace("UTF-8", "GBK").encode("gbk")
+        client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=content, headers={"Content-Type": "application/xml; charset=gbk"})
+        ))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+        metrics.reset()
+
+        feed, _ = await fetcher.fetch_feed("/test", "test", source_id="gbk")
+        assert feed.entries[0].title == "第一条"
+        assert metrics.get_counter("feed_stream_fallback", source="gbk") == 1
+
+    async def test_late_parse_error_refetches_instead_of_buffering(self, fetcher, monkeypatch):
+        head = b'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>t</title>'
+        first = "<item><title>第一条</title><link>https://example.com/1</link></item>".encode()
+        # HTML 实体无法增量解析，且出现在第一个条目之后
+        late = b"<item><title>a&nbsp;b</title><link>https://example.com/2</link></item></channel></rss>"
+        requests = []
+
+        async def body():
+            yield head
+            yield first
+            yield late
+
+        def handler(request):
+            requests.append(request)
+            if len(requests) == 1:
+                return httpx.Response(200, content=body())
+            return httpx.Response(200, content=head + first + late)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+        metrics.reset()
+
+        feed, _ = await fetcher.fetch_feed("/test", "test", source_id="late")
+        assert [e.title for e in feed.entries] == ["第一条", "a\xa0b"]
+        assert len(requests) == 2
+        assert metrics.get_counter("feed_stream_refetch", source="late") == 1
+
+
+class TestHedgedRequests:
+    @pytest.fixture
+    def instances(self, fetcher, monkeypatch):
+        """主实例和备用实例，行为由测试设置"""
+        behaviours = {}
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            delay, status = behaviours[request.url.host]
+            await asyncio.sleep(delay)
+            return httpx.Response(status, text=FEED)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_default_delay", 0.05)
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_min_delay", 0.01)
+        fetcher.instances = ["https://primary.test", "https://backup.test"]
+        return behaviours
+
+    async def test_slow_primary_is_hedged(self, fetcher, instances):
+        instances.update({"primary.test": (2, 200), "backup.test": (0, 200)})
+        start = time.perf_counter()
+        feed, instance = await fetcher.fetch_feed("/weibo", "weibo")
+        assert instance == "https://backup.test"
+        assert feed.entries
+        assert time.perf_counter() - start < 1
+
+    async def test_fast_primary_is_not_hedged(self, fetcher, instances, registry):
+        instances.update({"primary.test": (0, 200), "backup.test": (0, 200)})
+        feed, instance = await fetcher.fetch_feed("/weibo", "weibo")
+        assert instance == "https://primary.test"
+        assert "https://backup.test" not in registry._instances
+
+    async def test_failed_primary_falls_back_immediately(self, fetcher, instances, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_default_delay", 5)
+        instances.update({"primary.test": (0, 503), "backup.test": (0, 200)})
+        start = time.perf_counter()
+        feed, instance = await fetcher.fetch_feed("/weibo", "weibo")
+        assert instance == "https://backup.test"
+        assert time.perf_counter() - start < 1
+
+    def test_hedge_delay_adapts_to_latency(self, fetcher, registry, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_min_delay", 0.1)
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_max_delay", 5)
+        for latency in [0.2] * 19 + [1.5]:
+            registry.record_success("https://a.test", latency)
+        for _ in range(20):
+            registry.record_success("https://b.test", 0.01)
+        assert fetcher._hedge_delay("https://a.test") == 1.5
+        assert fetcher._hedge_delay("https://b.test") == 0.1
+        assert fetcher._hedge_delay("https://unknown.test") == rss_fetcher_module.settings.fetch_hedge_default_delay
+
+
+class TestInstanceRouting:
+    async def test_open_circuit_instance_is_skipped(self, fetcher, registry, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_enabled", False)
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.host)
+            return httpx.Response(200, text=FEED)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+        fetcher.instances = ["https://primary.test", "https://backup.test"]
+        for _ in range(3):
+            registry.record_failure("https://primary.test", "boom")
+
+        feed, instance = await fetcher.fetch_feed("/zhihu/hot", "知乎", source_id="zhihu")
+        assert instance == "https://backup.test"
+        assert requested == ["backup.test"]
+
+    async def test_all_open_fails_fast(self, fetcher, registry, monkeypatch):
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.host)
+            return httpx.Response(200, text=FEED)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+        fetcher.instances = ["https://primary.test", "https://backup.test"]
+        for url in fetcher.instances:
+            for _ in range(3):
+                registry.record_failure(url, "boom")
+        metrics.reset()
+
+        assert await fetcher.fetch_feed("/zhihu/hot", "知乎", source_id="zhihu") == (None, None)
+        assert requested == []
+        assert metrics.get_counter("feed_fetch", source="zhihu", result="all_open") == 1
+
+    async def test_half_open_instance_gets_single_probe(self, fetcher, registry, monkeypatch):
+        monkeypatch.setattr(rss_fetcher_module.settings, "fetch_hedge_enabled", False)
+        requested = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(request.url.host)
+            if request.url.host == "backup.test":
+                return httpx.Response(503)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, text=FEED)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(rss_fetcher_module.http_pool, "get_client", lambda url: client)
+        fetcher.instances = ["https://primary.test", "https://backup.test"]
+        for _ in range(3):
+            registry.record_failure("https://primary.test", "boom")
+        registry._get("https://primary.test").opened_at -= 61
+
+        results = await asyncio.gather(*(fetcher.fetch_feed(f"/route/{i}", "test") for i in range(3)))
+        assert [instance for _, instance in results].count("https://primary.test") == 1
+        assert requested.count("primary.test") == 1
+        # 试探成功后恢复
+        assert registry.route(fetcher.instances)[0] == "https://primary.test"
+
+
+class _FakeCache:
+    """只实现抓取相关方法的内存版 CacheService"""
+
+    def __init__(self):
+        self.hotlists = {}
+        self.locks = {}
+
+    def is_available(self):
+        return True
+
+    def get_hotlist(self, source):
+        return self.hotlists.get(source)
+
+    def set_hotlist(self, source, data, ttl=300):
+        self.hotlists[source] = data
+
+    def acquire_fetch_lock(self, source, ttl=60, token="1"):
+        if source in self.locks:
+            return False
+        self.locks[source] = token
+        return True
+
+    def is_fetch_locked(self, source):
+        return source in self.locks
+
+    def release_fetch_lock(self, source, token=None):
+        if token is None or self.locks.get(source) == token:
+            self.locks.pop(source, None)
+
+    def get_feed_state(self, source):
+        return None
+
+    def set_feed_state(self, source, state, ttl=86400):
+        pass
+
+    def incr_fetch_count(self, source):
+        pass
+
+
+class TestRequestCoalescing:
+    async def test_concurrent_callers_share_one_fetch(self, fetcher, upstream):
+        results = await asyncio.gather(*(fetcher.fetch_hot_list("weibo") for _ in range(10)))
+        assert len(upstream.requests) == 1
+        assert all(r is results[0] for r in results)
+        assert fetcher._inflight == {}
+
+    async def test_cancelled_caller_does_not_cancel_shared_fetch(self, fetcher, upstream):
+        first = asyncio.create_task(fetcher.fetch_hot_list("weibo"))
+        second = asyncio.create_task(fetcher.fetch_hot_list("weibo"))
+        await asyncio.sleep(0)
+        first.cancel()
+        hot_list = await second
+        assert hot_list is not None and len(hot_list.items) == 2
+
+    async def test_waits_for_fetch_in_other_process(self, fetcher, upstream, monkeypatch):
+        fake = _FakeCache()
+        monkeypatch.setattr(rss_fetcher_module, "cache", fake)
+        monkeypatch.setattr(fetcher, "LOCK_POLL_INTERVAL", 0.01)
+        fake.locks["weibo"] = "peer"
+
+        async def peer_finishes():
+            await asyncio.sleep(0.05)
+            fake.hotlists["weibo"] = {
+                "source": "weibo", "source_name": "微博热搜", "items": [],
+                "updated_at": "2026-01-01T00:00:00", "icon": None, "cached_at": time.time()
+            }
+            fake.release_fetch_lock("weibo", "peer")
+
+        asyncio.create_task(peer_finishes())
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert hot_list.updated_at.year == 2026
+        assert upstream.requests == []
+
+    async def test_fetches_itself_when_peer_fails(self, fetcher, upstream, monkeypatch):
+        fake = _FakeCache()
+        monkeypatch.setattr(rss_fetcher_module, "cache", fake)
+        monkeypatch.setattr(fetcher, "LOCK_POLL_INTERVAL", 0.01)
+        fake.locks["weibo"] = "peer"
+        asyncio.get_running_loop().call_later(0.03, fake.release_fetch_lock, "weibo", "peer")
+
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert len(hot_list.items) == 2
+        assert len(upstream.requests) == 1
+        assert fake.locks == {}
+
+
+class TestStaleWhileRevalidate:
+    @pytest.fixture
+    def fake_cache(self, monkeypatch):
+        fake = _FakeCache()
+        monkeypatch.setattr(rss_fetcher_module, "cache", fake)
+        monkeypatch.setattr(rss_fetcher_module.settings, "redis_cache_ttl", 300)
+        monkeypatch.setattr(rss_fetcher_module.settings, "redis_cache_stale_ttl", 3600)
+        return fake
+
+    def _cached(self, age):
+        return {
+            "source": "weibo", "source_name": "微博热搜", "items": [],
+            "updated_at": "2026-01-01T00:00:00", "icon": None, "cached_at": time.time() - age
+        }
+
+    async def test_fresh_hit(self, fetcher, upstream, fake_cache):
+        fake_cache.hotlists["weibo"] = self._cached(10)
+        metrics.reset()
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert hot_list.items == []
+        assert upstream.requests == []
+        assert metrics.get_counter("hotlist_cache", source="weibo", result="hit") == 1
+
+    async def test_stale_hit_refreshes_in_background(self, fetcher, upstream, fake_cache):
+        fake_cache.hotlists["weibo"] = self._cached(600)
+        metrics.reset()
+        results = await asyncio.gather(*(fetcher.fetch_hot_list("weibo") for _ in range(3)))
+        # 立即返回旧数据
+        assert all(r.items == [] for r in results)
+        assert metrics.get_counter("hotlist_cache", source="weibo", result="stale") == 3
+        await asyncio.gather(*fetcher._background_tasks)
+        # 后台只刷新一次
+        assert len(upstream.requests) == 1
+        assert len(fake_cache.hotlists["weibo"]["items"]) == 2
+
+    async def test_stale_not_allowed_fetches_synchronously(self, fetcher, upstream, fake_cache):
+        fake_cache.hotlists["weibo"] = self._cached(600)
+        hot_list = await fetcher.fetch_hot_list("weibo", allow_stale=False)
+        assert len(hot_list.items) == 2
+        assert len(upstream.requests) == 1
+
+
+class TestLocalCache:
+    @pytest.fixture
+    def fake_cache(self, monkeypatch):
+        fake = _FakeCache()
+        monkeypatch.setattr(rss_fetcher_module, "cache", fake)
+        return fake
+
+    async def test_fresh_fetch_is_served_from_local_cache(self, fetcher, upstream, fake_cache):
+        first = await fetcher.fetch_hot_list("weibo")
+        fake_cache.hotlists.clear()
+        metrics.reset()
+        second = await fetcher.fetch_hot_list("weibo")
+        assert second is first
+        assert len(upstream.requests) == 1
+        assert metrics.get_counter("hotlist_cache", source="weibo", result="local_hit") == 1
+
+    async def test_redis_hit_populates_local_cache(self, fetcher, upstream, fake_cache, local_cache):
+        fake_cache.hotlists["weibo"] = {
+            "source": "weibo", "source_name": "微博热搜", "items": [],
+            "updated_at": "2026-01-01T00:00:00", "icon": None, "cached_at": time.time()
+        }
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert local_cache.get("weibo") is hot_list
+
+    async def test_unchanged_fetch_is_cached_without_flag(self, fetcher, upstream, fake_cache, local_cache):
+        await fetcher.fetch_hot_list("weibo")
+        local_cache.clear()
+        fake_cache.hotlists.clear()
+        hot_list = await fetcher.fetch_hot_list("weibo")
+        assert hot_list.unchanged
+        assert local_cache.get("weibo").unchanged is False
+
+    async def test_local_cache_respects_redis_soft_ttl(self, fetcher, upstream, fake_cache, local_cache, monkeypatch):
+        await fetcher.fetch_hot_list("weibo")
+        monkeypatch.setattr(rss_fetcher_module.settings, "redis_cache_ttl", 0)
+        await fetcher.fetch_hot_list("weibo", allow_stale=False)
+        assert len(upstream.requests) == 2
+
+
+class TestNewItemDetection:
+    @pytest.fixture
+    def database(self, tmp_path, monkeypatch):
+        database = Database(f"sqlite:///{tmp_path / 'hotpush.db'}")
+        monkeypatch.setattr(rss_fetcher_module, "db", database)
+        monkeypatch.setattr(dedup_store_module, "db", database)
+        yield database
+        database.close()
+
+    def _items(self, *ids):
+        return [HotItem(id=i, title=i, url=f"https://example.com/{i}", source="weibo") for i in ids]
+
+    def test_first_fetch_marks_all_pushed(self, fetcher, database):
+        assert fetcher.get_new_items("weibo", self._items("a", "b")) == ([], True)
+        assert fetcher.get_new_items("weibo", self._items("a", "b", "c"))[0] == self._items("c")
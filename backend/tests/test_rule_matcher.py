@@ -0,0 +1,131 @@
+"""
+推送规则匹配测试
+"""
+import random
+import re
+from datetime import datetime
+import pytest
+from app.models.schemas import HotItem
+from app.services import rule_matcher as rule_matcher_module
+from app.services.database import Database, AsyncDatabase
+from app.services.rule_matcher import (
+    AHO_CORASICK_THRESHOLD,
+    AhoCorasick,
+    CompiledRules,
+    KeywordMatcher,
+    PushRuleCache,
+    build_trie_pattern,
+)
+
+
+def _items(*titles):
+    return [HotItem(id=str(i), title=t, url=f"https://example.com/{i}", source="weibo") for i, t in enumerate(titles)]
+
+
+def _rule(rule_type, **config):
+    return {"rule_type": rule_type, "rule_config": config}
+
+
+class TestKeywordMatcher:
+    def test_prefix_keywords_collapsed(self):
+        assert build_trie_pattern(["苹果", "苹果手机", "苹"]) == "苹"
+        assert build_trie_pattern(["ab", "ac", "b"]) == "(?:a[bc]|b)"
+
+    def test_special_characters_escaped(self):
+        regex = re.compile(build_trie_pattern(["c++", "a.b", "[x]"]))
+        assert regex.search("learn c++ now")
+        assert regex.search("a.b")
+        assert not regex.search("axb")
+        assert regex.search("[x]")
+
+    @pytest.mark.parametrize("use_automaton", [False, True])
+    def test_equivalent_to_substring_search(self, use_automaton):
+        rng = random.Random(42)
+        alphabet = "abc苹果华为"
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(60)]
+        matcher = KeywordMatcher(keywords, use_automaton=use_automaton)
+        for _ in range(500):
+            title = "".join(rng.choice(alphabet + "xyz ") for _ in range(rng.randint(0, 12)))
+            assert matcher.search(title) == any(kw in title for kw in keywords), title
+
+    def test_automaton_for_large_keyword_sets(self):
+        keywords = [f"词{i}" for i in range(AHO_CORASICK_THRESHOLD + 1)]
+        matcher = KeywordMatcher(keywords)
+        assert isinstance(matcher._search.__self__, AhoCorasick)
+        assert matcher.search("包含词42的标题")
+        assert not matcher.search("词")
+
+    def test_case_insensitive_and_empty_keyword(self):
+        assert KeywordMatcher(["OpenAI"]).search("openai 发布新模型")
+        assert KeywordMatcher([""]).search("任意标题")
+        assert not KeywordMatcher([]).search("任意标题")
+
+
+class TestCompiledRules:
+    def test_include_rules_all_required(self):
+        rules = CompiledRules([
+            _rule("keyword_include", keywords=["苹果", "华为"]),
+            _rule("keyword_include", keywords=["手机"]),
+        ])
+        result = rules.filter(_items("苹果手机发布", "华为汽车", "小米手机", "华为手机"), "weibo")
+        assert [i.title for i in result] == ["苹果手机发布", "华为手机"]
+
+    def test_exclude_rules_merged(self):
+        rules = CompiledRules([
+            _rule("keyword_exclude", keywords=["广告"]),
+            _rule("keyword_exclude", keywords=["明星"]),
+        ])
+        result = rules.filter(_items("新闻", "广告推广", "明星八卦"), "weibo")
+        assert [i.title for i in result] == ["新闻"]
+
+    def test_source_filter(self):
+        rules = CompiledRules([_rule("source_filter", sources=["zhihu"], mode="include")])
+        assert rules.filter(_items("a"), "weibo") == []
+        assert len(rules.filter(_items("a"), "zhihu")) == 1
+
+    def test_time_range_across_midnight(self):
+        rules = CompiledRules([_rule("time_range", start_hour=22, end_hour=6)])
+        items = _items("a")
+        assert rules.filter(items, "weibo", now=datetime(2024, 1, 1, 23)) == items
+        assert rules.filter(items, "weibo", now=datetime(2024, 1, 1, 12)) == []
+
+    def test_no_rules_returns_items(self):
+        items = _items("a", "b")
+        assert CompiledRules([]).filter(items, "weibo") is items
+
+
+class TestPushRuleCache:
+    @pytest.fixture
+    def database(self, tmp_path, monkeypatch):
+        database = Database(f"sqlite:///{tmp_path / 'hotpush.db'}")
+        adb = AsyncDatabase(database, max_workers=1)
+        monkeypatch.setattr(rule_matcher_module, "adb", adb)
+        yield database
+        adb.shutdown()
+        database.close()
+
+    async def test_compiled_once_until_invalidated(self, database, monkeypatch):
+        loads = []
+        original = database.get_enabled_push_rules
+        monkeypatch.setattr(database, "get_enabled_push_rules", lambda: loads.append(1) or original())
+        database.save_push_rule("r", "keyword_include", {"keywords": ["苹果"]})
+
+        cache = PushRuleCache()
+        first = await cache.get()
+        assert await cache.get() is first
+        assert len(loads) == 1
+
+        database.save_push_rule("r2", "keyword_exclude", {"keywords": ["手机"]})
+        cache.invalidate()
+        second = await cache.get()
+        assert second is not first
+        assert len(loads) == 2
+        assert [i.title for i in second.filter(_items("苹果", "苹果手机"), "weibo")] == ["苹果"]
+
+    def test_ignores_own_invalidation_message(self):
+        cache = PushRuleCache()
+        cache._compiled = CompiledRules([])
+        cache._on_message({"origin": cache.worker_id})
+        assert cache._compiled is not None
+        cache._on_message({"origin": "other"})
+        assert cache._compiled is None
@@ -0,0 +1,191 @@
+"""
+SMTP 发送器测试（使用本地测试 SMTP 服务器）
+"""
+import asyncio
+import smtplib
+import socketserver
+import threading
+
+import pytest
+
+from app.models.schemas import PushMessage, HotItem
+from app.services import push_service as push_service_module
+from app.services.push_service import EmailPusher
+from app.services.smtp_client import SMTPSender, parse_recipients
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """最小 SMTP 服务端：支持 EHLO / AUTH / MAIL / RCPT / DATA / NOOP / RSET / QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 test ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-test")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                server.logins += 1
+                self.reply("235 ok")
+            elif verb in ("MAIL", "RSET"):
+                recipients = []
+                self.reply("250 ok")
+            elif verb in ("NOOP", "HELO"):
+                self.reply("250 ok")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip("<> ")
+                if address.startswith("bad"):
+                    self.reply("550 no such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 ok")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    data.append(data_line)
+                server.messages.append((list(recipients), b"".join(data).decode()))
+                self.reply("250 queued")
+                if server.close_after_message:
+                    return
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 not implemented")
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.close_after_message = False
+
+
+@pytest.fixture
+def smtp_server():
+    server = _SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sender():
+    # 测试服务器不支持 STARTTLS
+    sender = SMTPSender(idle_timeout=60, timeout=5, require_tls=False)
+    yield sender
+    sender.close()
+
+
+async def _send(sender, server, recipients, body="Subject: hi\r\n\r\nhello"):
+    host, port = server.server_address
+    return await sender.send(host, port, "user", "secret", "user@test", recipients, body)
+
+
+class TestSMTPSender:
+    async def test_connection_reused_across_sends(self, sender, smtp_server):
+        await _send(sender, smtp_server, ["a@test"])
+        await _send(sender, smtp_server, ["a@test"])
+        assert smtp_server.connections == 1
+        assert smtp_server.logins == 1
+        assert len(smtp_server.messages) == 2
+        assert sender.get_stats()["reuses"] == 1
+
+    async def test_multiple_recipients_in_one_transaction(self, sender, smtp_server):
+        refused = await _send(sender, smtp_server, ["a@test", "b@test", "bad@test"])
+        assert smtp_server.messages[0][0] == ["a@test", "b@test"]
+        assert list(refused) == ["bad@test"]
+
+    async def test_idle_connection_is_closed(self, smtp_server):
+        sender = SMTPSender(idle_timeout=0.05, timeout=5, require_tls=False)
+        try:
+            await _send(sender, smtp_server, ["a@test"])
+            await asyncio.sleep(0.2)
+            assert sender.get_stats()["connected"] is False
+            await _send(sender, smtp_server, ["a@test"])
+            assert smtp_server.connections == 2
+        finally:
+            sender.close()
+
+    async def test_reconnects_after_server_disconnect(self, sender, smtp_server):
+        smtp_server.close_after_message = True
+        await _send(sender, smtp_server, ["a@test"])
+        await _send(sender, smtp_server, ["a@test"])
+        assert len(smtp_server.messages) == 2
+        assert smtp_server.connections == 2
+
+    async def test_refuses_plaintext_login_without_starttls(self, smtp_server):
+        sender = SMTPSender(idle_timeout=60, timeout=5)
+        try:
+            with pytest.raises(smtplib.SMTPNotSupportedError):
+                await _send(sender, smtp_server, ["a@test"])
+            assert smtp_server.logins == 0
+            assert smtp_server.messages == []
+        finally:
+            sender.close()
+
+    async def test_password_change_reconnects(self, sender, smtp_server):
+        host, port = smtp_server.server_address
+        await sender.send(host, port, "user", "secret", "user@test", ["a@test"], "Subject: hi\r\n\r\nhello")
+        await sender.send(host, port, "user", "changed", "user@test", ["a@test"], "Subject: hi\r\n\r\nhello")
+        assert smtp_server.connections == 2
+        assert smtp_server.logins == 2
+
+    async def test_send_does_not_block_event_loop(self, sender, smtp_server):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await _send(sender, smtp_server, ["a@test"])
+        task.cancel()
+        assert ticks > 0
+
+
+def test_parse_recipients():
+    assert parse_recipients("a@test, b@test;c@test") == ["a@test", "b@test", "c@test"]
+    assert parse_recipients("") == []
+
+
+class TestEmailPusher:
+    async def test_push_to_multiple_recipients(self, sender, smtp_server, monkeypatch):
+        monkeypatch.setattr(push_service_module, "smtp_sender", sender)
+        host, port = smtp_server.server_address
+        pusher = EmailPusher()
+        pusher.set_config({
+            "smtp_host": host, "smtp_port": port, "username": "user@test",
+            "password": "secret", "to_email": "a@test, b@test",
+        })
+        message = PushMessage(
+            title="热榜", content="c", source="weibo",
+            items=[HotItem(id="1", title="热点", url="https://example.com/1", source="weibo")],
+        )
+        assert await pusher.push(message) is True
+        recipients, body = smtp_server.messages[0]
+        assert recipients == ["a@test", "b@test"]
+        assert "To: a@test, b@test" in body
@@ -0,0 +1,85 @@
+"""
+增量 Feed 解析测试
+"""
+from datetime import datetime
+import pytest
+from app.services.stream_parser import StreamFeedParser, StreamParseError
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" xmlns:slash="http://purl.org/rss/1.0/modules/slash/">
+<channel><title>hot</title>
+<item>
+  <title>第一条 &amp; 标题</title>
+  <link>https://example.com/1</link>
+  <description><![CDATA[<p>描述</p>]]></description>
+  <pubDate>Mon, 06 Sep 2021 16:45:00 +0800</pubDate>
+  <slash:comments>42</slash:comments>
+  <media:content url="https://example.com/1.jpg" type="image/jpeg"/>
+</item>
+<item>
+  <title>第二条</title>
+  <guid>https://example.com/2</guid>
+  <enclosure url="https://example.com/2.png" type="image/png"/>
+</item>
+</channel></rss>"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>atom</title>
+<entry>
+  <title>Atom 条目</title>
+  <link rel="alternate" href="https://example.com/a"/>
+  <link rel="enclosure" href="https://example.com/a.png" type="image/png"/>
+  <summary>摘要</summary>
+  <updated>2021-09-06T08:45:00Z</updated>
+</entry>
+</feed>"""
+
+
+def parse(text, limit=50, chunk=64):
+    parser = StreamFeedParser(limit=limit)
+    data = text.encode()
+    for i in range(0, len(data), chunk):
+        if parser.feed(data[i:i + chunk]):
+            break
+    else:
+        parser.close()
+    return parser
+
+
+class TestStreamFeedParser:
+    def test_rss_fields(self):
+        entries = parse(RSS).result().entries
+        assert len(entries) == 2
+        first = entries[0]
+        assert first.title == "第一条 & 标题"
+        assert first.link == "https://example.com/1"
+        assert first.summary == "<p>描述</p>"
+        assert datetime(*first.published_parsed[:6]) == datetime(2021, 9, 6, 8, 45)
+        assert first.slash_comments == "42"
+        assert first.media_content[0]["url"] == "https://example.com/1.jpg"
+        second = entries[1]
+        assert second.link == "https://example.com/2"
+        assert second.enclosures[0].href == "https://example.com/2.png"
+        assert not hasattr(second, "published_parsed")
+
+    def test_atom_fields(self):
+        entry = parse(ATOM).result().entries[0]
+        assert entry.title == "Atom 条目"
+        assert entry.link == "https://example.com/a"
+        assert entry.summary == "摘要"
+        assert entry.enclosures[0].href == "https://example.com/a.png"
+        assert datetime(*entry.published_parsed[:6]) == datetime(2021, 9, 6, 8, 45)
+
+    def test_stops_at_limit(self):
+        parser = parse(RSS, limit=1)
+        assert parser.done
+        assert len(parser.entries) == 1
+
+    def test_content_hash_ignores_chunking(self):
+        assert parse(RSS, chunk=7).content_hash() == parse(RSS, chunk=500).content_hash()
+
+    def test_unsupported_document_raises(self):
+        with pytest.raises(StreamParseError):
+            parse("<html><body>not a feed</body></html>")
+        with pytest.raises(StreamParseError):
+            parse("<rss><channel><item><title>&nbsp;</title></item></channel></rss>")